@@ -0,0 +1,120 @@
+# BackgroundWorker.py
+# Copyright (c) 2023 Masaya Yamamoto
+# Released under the MIT license.
+# see https://opensource.org/licenses/MIT (英語)
+# see https://licenses.opensource.jp/MIT/MIT.html (日本語)
+import queue
+import threading
+from concurrent.futures import CancelledError
+
+
+class BackgroundWorker:
+    def __init__(self, root, interval=50):
+        # 結果を受け取るウィジェット / Widget that receives the results
+        self.root = root
+        # 結果を確認する間隔[ms] / Interval for checking the results [ms]
+        self.kInterval = interval
+
+        self.kStatusProgress = 0   # 途中経過 / Progress
+        self.kStatusDone = 1       # 完了 / Done
+        self.kStatusCancelled = 2  # 中止 / Cancelled
+        self.kStatusFailed = 3     # 失敗 / Failed
+
+        self.thread = None
+        self.cancel_event = threading.Event()
+        self.queue = queue.Queue()
+        self.on_progress = None
+        self.on_done = None
+
+    # 処理をバックグラウンドで開始する。
+    # Start a task in the background.
+    def start(self, func, on_progress=None, on_done=None):
+        """
+        :param func: バックグラウンドで実行する関数(引数はこのクラス) / Function to run in the background
+                     (its argument is this class)
+        :type func: function
+        :param on_progress: 途中経過を受け取る関数 / Function that receives the progress
+        :type on_progress: function
+        :param on_done: 終了を受け取る関数 / Function that receives the end
+        :type on_done: function
+
+        処理をバックグラウンドで開始する。
+        Tkのウィジェットは作成したスレッドからしか操作できないため、途中経過と結果はキューに入れ、
+        ウィジェットのafterで定期的に取り出してから、on_progress(msg), on_done(status, result, error)を呼び出す。
+        Start a task in the background.
+        Tk widgets can only be used from the thread that created them, so the progress and the result
+        are put in a queue, taken out periodically with the widget's after,
+        and then on_progress(msg) and on_done(status, result, error) are called.
+        """
+        if self.is_running():
+            return False
+
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.cancel_event.clear()
+        self.thread = threading.Thread(target=self.__run, args=(func,), daemon=True)
+        self.thread.start()
+        self.root.after(self.kInterval, self.__poll)
+        return True
+
+    # 実行中か否かを取得する。
+    # Get whether a task is running.
+    def is_running(self):
+        return self.thread is not None
+
+    # 処理の中止を要求する。
+    # Request cancellation of the task.
+    def cancel(self):
+        """
+        処理の中止を要求する。
+        処理は次にcheck_cancelを呼び出したところで中止する。
+        Request cancellation of the task.
+        The task stops the next time it calls check_cancel.
+        """
+        self.cancel_event.set()
+
+    # 中止を要求されたか否かを取得する。
+    # Get whether cancellation was requested.
+    def is_cancelled(self):
+        return self.cancel_event.is_set()
+
+    # 中止を要求された場合は、処理を中止する(バックグラウンドから呼び出す)。
+    # Stop the task if cancellation was requested (called from the background).
+    def check_cancel(self):
+        if self.is_cancelled():
+            raise CancelledError()
+
+    # 途中経過を通知する(バックグラウンドから呼び出す)。
+    # Report the progress (called from the background).
+    def report(self, msg):
+        self.queue.put((self.kStatusProgress, msg, None))
+
+    def __run(self, func):
+        try:
+            result = func(self)
+            self.queue.put((self.kStatusDone, result, None))
+        except CancelledError:
+            self.queue.put((self.kStatusCancelled, None, None))
+        except Exception as e:
+            self.queue.put((self.kStatusFailed, None, e))
+
+    def __poll(self):
+        while True:
+            try:
+                (status, value, error) = self.queue.get_nowait()
+            except queue.Empty:
+                break
+
+            if status == self.kStatusProgress:
+                if self.on_progress is not None:
+                    self.on_progress(value)
+            else:
+                # 次の処理を開始できるように、結果を通知する前に終了させる。
+                # Finish before notifying the result so that the next task can be started.
+                self.thread.join()
+                self.thread = None
+                if self.on_done is not None:
+                    self.on_done(status, value, error)
+                return
+
+        self.root.after(self.kInterval, self.__poll)
@@ -6,6 +6,31 @@
 
 import os
 
+
+# 生徒名と出題モード名から漢字プリントのパスを作成する.
+# Create the path of the kanji worksheet from the student name and the mode name.
+def create_path_of_kanji_worksheet(name_t, mode_str):
+    name = ''
+    # 苗字と名前の間にスペースがある場合はアンダーバーに変換する.
+    for word in list(name_t):
+        if word == u' ' or word == u'　':
+            name += '_'
+        else:
+            name += word
+
+    return './' + name + '_漢字テスト_' + mode_str + 'モード' + '.pdf'
+
+
+# 生徒名と出題モードからログファイルのパスを作成する.
+# Create the path of the log file from the student name and the mode.
+def create_path_of_log(name, mode):
+    logdir = './result/'
+    if not os.path.isdir(logdir):
+        os.mkdir(logdir)
+
+    return logdir + '.' + name + str(mode) + '.log'
+
+
 class CreateFilePath:
     def __init__(self, wg_select_student, wg_select_mode):
         self.WidgetSelectStudent = wg_select_student
@@ -13,27 +38,13 @@ class CreateFilePath:
 
     # 漢字プリントのパスを取得する.
     def get_path_of_kanji_worksheet(self):
-        name_t = self.WidgetSelectStudent.get_selected_student_name()
-        name = ''
-        # 苗字と名前の間にスペースがある場合はアンダーバーに変換する.
-        for word in list(name_t):
-            if word == u' ' or word == u'　':
-                name += '_'
-            else:
-                name += word
-
+        name = self.WidgetSelectStudent.get_selected_student_name()
         mode = self.WidgetSelectMode.get_selected_student_mode()
         mode_str = self.WidgetSelectMode.kModeKeyList[mode]
-        return './' + name + '_漢字テスト_' + mode_str + 'モード' + '.pdf'
+        return create_path_of_kanji_worksheet(name, mode_str)
 
     # ログファイルのパスを取得する.
     def get_path_of_log(self):
         name = self.WidgetSelectStudent.get_selected_student_name()
-
-        logdir = './result/'
-        if not os.path.isdir(logdir):
-            os.mkdir(logdir)
-
         mode = self.WidgetSelectMode.get_selected_student_mode()
-
-        return logdir + '.' + name + str(mode) + '.log'
+        return create_path_of_log(name, mode)
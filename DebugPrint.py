@@ -3,10 +3,139 @@
 # Released under the MIT license.
 # see https://opensource.org/licenses/MIT (英語)
 # see https://licenses.opensource.jp/MIT/MIT.html (日本語)
+import os
+import sys
+import json
+import time
+import atexit
+import functools
+import threading
+from collections import deque
+
+
+class DebugSpan:
+    def __init__(self, name, rows=None, args=None):
+        """
+        :param name: 区間の名前 / Name of the span
+        :type name: string
+        :param rows: 処理した行数 / Number of rows processed
+        :type rows: int
+        :param args: 記録する付加情報 / Additional information to record
+        :type args: dict
+
+        処理の区間の経過時間とCPU時間を測る。
+        withの中でrowsを設定すると、処理した行数も記録する。
+        Measure the wall time and CPU time of a span of processing.
+        Setting rows inside the with block also records the number of rows processed.
+        """
+        self.name = name
+        self.rows = rows
+        self.args = args if args is not None else {}
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        # バックグラウンドのスレッドでも測れるように、スレッドごとのCPU時間を使う。
+        # Use per-thread CPU time so that background threads can be measured too.
+        self.cpu_start = time.thread_time_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        end = time.perf_counter_ns()
+        cpu_end = time.thread_time_ns()
+        DebugPrint.span_list.append({
+            'name': self.name,
+            'start': self.start,
+            'wall': end - self.start,
+            'cpu': cpu_end - self.cpu_start,
+            'rows': self.rows,
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+            'error': None if exc_type is None else exc_type.__name__,
+            'args': self.args,
+        })
+        return False
+
 
 class DebugPrint:
-    def __init__(self, debug):
-        self.kDebug = debug
+    # 表示の水準(数値が大きいほど重要) / Levels of output (larger is more important)
+    kLevelDebug = 10
+    kLevelInfo = 20
+    kLevelError = 40
+    kLevelOff = 100
+    kLevelDict = {'DEBUG': kLevelDebug, 'INFO': kLevelInfo, 'ERROR': kLevelError, 'OFF': kLevelOff}
+    kLevelPrefix = {kLevelDebug: 'Debug: ', kLevelInfo: 'Info: ', kLevelError: 'Error: '}
+    # 表示の水準を指定する環境変数(DEBUG, INFO, ERROR, OFF)
+    # Environment variable that specifies the level of output (DEBUG, INFO, ERROR, OFF)
+    kLogLevelEnv = 'KANJIWORKSHEET_LOG_LEVEL'
+    # 記録するメッセージの最大数(古いものから捨てる) / Maximum number of messages to record (the oldest are dropped)
+    kLogMax = 1000
+    # メッセージの記録(すべてのインスタンスで共有する) / Records of messages (shared by all instances)
+    log_list = deque(maxlen=kLogMax)
+
+    # 記録する区間の最大数(古いものから捨てる) / Maximum number of spans to record (the oldest are dropped)
+    kSpanMax = 100000
+    # 区間の記録(すべてのインスタンスで共有する) / Records of spans (shared by all instances)
+    span_list = deque(maxlen=kSpanMax)
+    # 終了時に区間を書き出すファイルのパスを指定する環境変数
+    # Environment variable that specifies the path of the file the spans are written to at exit
+    kTraceEnv = 'KANJIWORKSHEET_TRACE'
+
+    def __init__(self, debug=None):
+        """
+        :param debug: Trueの場合はすべて表示し、Falseの場合は何も表示しない。
+                      Noneの場合は環境変数の水準(既定はERROR)に従う。
+                      Displays everything if True and nothing if False.
+                      If None, follows the level of the environment variable (ERROR by default).
+        :type debug: bool
+        """
+        if debug is None:
+            self.kLevel = self.kLevelDict.get(os.environ.get(self.kLogLevelEnv, '').upper(), self.kLevelError)
+        elif debug:
+            self.kLevel = self.kLevelDebug
+        else:
+            self.kLevel = self.kLevelOff
+        # デバッグ用の重い検査をするか否か / Whether to run heavy checks for debugging
+        self.kDebug = self.is_enabled(self.kLevelDebug)
+
+    # 指定した水準のメッセージを表示するか否かを取得する。
+    # Get whether messages of the specified level are displayed.
+    def is_enabled(self, level):
+        return level >= self.kLevel
+
+    # メッセージを記録し、表示する水準の場合は標準出力する。
+    # Record a message, and output it to standard output if its level is displayed.
+    def __log(self, level, msg, args):
+        # 文字列の組み立ては、表示するときか記録を書き出すときまで遅らせる。
+        # Defer building the string until it is displayed or the records are written out.
+        DebugPrint.log_list.append((time.time(), level, msg, args))
+        if self.is_enabled(level):
+            text = self.kLevelPrefix[level] + self.format_message(msg, args)
+            if level >= self.kLevelError:
+                text = '\033[31m' + text + '\033[0m'
+            print(text)
+
+    # メッセージの書式に引数を埋め込む。
+    # Embed the arguments in the message format.
+    @staticmethod
+    def format_message(msg, args):
+        return msg % args if len(args) > 0 else msg
+
+    # デバッグ情報を標準出力する(繰り返しの中で使う詳細な情報)。
+    # Outputs debug information to standard output (detailed information used in loops).
+    def print_debug(self, msg, *args):
+        """
+        :param msg: 出力メッセージの書式(%s などで引数を埋め込む) / Format of the output message (%s etc. embed the arguments)
+        :type msg: string
+        :param args: 書式に埋め込む引数 / Arguments to embed in the format
+
+        デバッグ情報を標準出力する。
+        表示しない場合は文字列を組み立てないため、繰り返しの中でも負荷にならない。
+        Outputs debug information to standard output.
+        The string is not built when not displayed, so it does not slow down loops.
+
+        例) self.DebugPrint.print_debug('Before: %s', statement)
+        """
+        self.__log(self.kLevelDebug, msg, args)
 
     # デバッグ情報を標準出力する。
     # Outputs debug information to standard output.
@@ -18,8 +147,7 @@ class DebugPrint:
         デバッグ情報を標準出力する。
         Outputs debug information to standard output.
         """
-        if self.kDebug:
-            print('Info: ' + msg)
+        self.__log(self.kLevelInfo, msg, ())
         return msg
 
     # エラーメッセージを標準出力する。
@@ -32,6 +160,150 @@ class DebugPrint:
         エラーメッセージを標準出力する。
         Outputs error messages to standard output.
         """
-        if self.kDebug:
-            print('\033[31m' + 'Error: ' + msg + '\033[0m')
+        self.__log(self.kLevelError, msg, ())
         return msg
+
+    # 記録した直近のメッセージを取得する。
+    # Get the most recent recorded messages.
+    @classmethod
+    def get_log_list(cls, num=None):
+        """
+        :param num: 取得する数(Noneの場合はすべて) / Number of messages to get (all if None)
+        :type num: int
+
+        記録した直近のメッセージを、日時と水準を付けた文字列のリストで返す。
+        Returns the most recent recorded messages as a list of strings with the date and level.
+        """
+        log_list = list(cls.log_list)
+        if num is not None:
+            log_list = log_list[-num:] if num > 0 else []
+        return [
+            time.strftime('%H:%M:%S', time.localtime(date)) + ' ' + cls.kLevelPrefix[level]
+            + cls.format_message(msg, args)
+            for date, level, msg, args in log_list
+        ]
+
+    # 記録した直近のメッセージを書き出す(失敗したときの調査用)。
+    # Write out the most recent recorded messages (to investigate failures).
+    @classmethod
+    def dump_log(cls, num=50, file=None, title=''):
+        """
+        :param num: 書き出す数(Noneの場合はすべて) / Number of messages to write (all if None)
+        :type num: int
+        :param file: 書き出し先(Noneの場合は標準エラー出力) / Destination (standard error if None)
+        :param title: 見出し / Heading
+        :type title: string
+
+        表示しなかったメッセージも含めて、記録した直近のメッセージを書き出す。
+        Write out the most recent recorded messages, including those that were not displayed.
+        """
+        if file is None:
+            file = sys.stderr
+        print('---------- 直近のログ / Recent log ' + title + ' ----------', file=file)
+        for line in cls.get_log_list(num):
+            print(line, file=file)
+
+    # 処理の区間を測る。
+    # Measure a span of processing.
+    @classmethod
+    def span(cls, name, rows=None, **args):
+        """
+        :param name: 区間の名前 / Name of the span
+        :type name: string
+        :param rows: 処理した行数 / Number of rows processed
+        :type rows: int
+
+        with文で使い、区間の経過時間、CPU時間、行数を記録する。
+        Use with a with statement to record the wall time, CPU time and number of rows of the span.
+
+        例) with self.DebugPrint.span('load', rows=len(worksheet)) as span:
+        """
+        return DebugSpan(name, rows, args)
+
+    # 関数の呼び出しを区間として測るデコレータを作成する。
+    # Create a decorator that measures function calls as spans.
+    @classmethod
+    def trace(cls, name=None, rows=None):
+        """
+        :param name: 区間の名前(Noneの場合は関数名) / Name of the span (the function name if None)
+        :type name: string
+        :param rows: 呼び出した後に、関数と同じ引数で行数を返す関数
+                     Function that returns the number of rows, called after the call with the same arguments
+        :type rows: function
+
+        関数の呼び出しを区間として測るデコレータを作成する。
+        Create a decorator that measures function calls as spans.
+
+        例) @DebugPrint.trace('write_log', rows=lambda self, path: len(self.kanji_worksheet))
+        """
+        def decorator(func):
+            span_name = func.__name__ if name is None else name
+
+            @functools.wraps(func)
+            def wrapper(*func_args, **func_kwargs):
+                with cls.span(span_name) as span:
+                    result = func(*func_args, **func_kwargs)
+                    if rows is not None:
+                        span.rows = rows(*func_args, **func_kwargs)
+                return result
+            return wrapper
+        return decorator
+
+    # 記録した区間を取得する。
+    # Get the recorded spans.
+    @classmethod
+    def get_span_list(cls):
+        return list(cls.span_list)
+
+    # 記録した区間を消去する。
+    # Clear the recorded spans.
+    @classmethod
+    def clear_span(cls):
+        cls.span_list.clear()
+
+    # 記録した区間をChromeのトレース形式(JSON)で書き出す。
+    # Write the recorded spans in Chrome trace format (JSON).
+    @classmethod
+    def export_trace(cls, path, span_list=None):
+        """
+        :param path: 書き出すファイルのパス / Path of the file to write
+        :type path: string
+        :param span_list: 書き出す区間(Noneの場合は記録した区間)
+                          Spans to write (the recorded spans if None)
+        :type span_list: list
+
+        記録した区間をChromeのトレース形式(JSON)で書き出す。
+        chrome://tracing や https://ui.perfetto.dev で読み込むと、処理の時系列を確認できる。
+        Write the recorded spans in Chrome trace format (JSON).
+        Loading it in chrome://tracing or https://ui.perfetto.dev shows the timeline of the processing.
+        """
+        if span_list is None:
+            span_list = cls.get_span_list()
+
+        event_list = []
+        for span in span_list:
+            args = dict(span['args'])
+            args['cpu_ms'] = span['cpu'] / 1e6
+            if span['rows'] is not None:
+                args['rows'] = span['rows']
+            if span['error'] is not None:
+                args['error'] = span['error']
+            event_list.append({
+                'name': span['name'],
+                'cat': 'KanjiWorkSheet',
+                'ph': 'X',
+                'ts': span['start'] / 1e3,
+                'dur': span['wall'] / 1e3,
+                'pid': span['pid'],
+                'tid': span['tid'],
+                'args': args,
+            })
+
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': event_list, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+
+
+# 環境変数を設定した場合は、終了時に記録した区間を書き出す。
+# If the environment variable is set, write the recorded spans at exit.
+if len(os.environ.get(DebugPrint.kTraceEnv, '')) > 0:
+    atexit.register(DebugPrint.export_trace, os.environ[DebugPrint.kTraceEnv])
@@ -4,14 +4,19 @@
 # see https://opensource.org/licenses/MIT (英語)
 # see https://licenses.opensource.jp/MIT/MIT.html (日本語)
 import os
+import json
+import base64
+import hashlib
+import numpy as np
 import pandas as pd
 from DebugPrint import DebugPrint
+from KanjiWorkSheet_token import tokenize_problem_statement
 
 
 class KanjiWorkSheet:
-    def __init__(self, debug=False):
-        # デバッグ情報を表示する場合はTrue
-        # Set to True if you want to display debug information
+    def __init__(self, debug=None):
+        # デバッグ情報を表示する場合はTrue(Noneの場合は環境変数の水準に従う)
+        # Set to True if you want to display debug information (None follows the level of the environment variable)
         self.DebugPrint = DebugPrint(debug=debug)
 
         # 学年の最小値と最大値(上下限のチェックに使用)
@@ -42,6 +47,31 @@ class KanjiWorkSheet:
             self.kHistory
         ]
 
+        # 最終更新日を日時に変換した列(問題集/ログには保存しない)
+        # Last update date parsed into datetime (not saved to the problem set/log)
+        self.kLastUpdateTime = '最終更新日時'
+        # 次に出題する日時(問題集/ログには保存しない)
+        # Next due date and time (not saved to the problem set/log)
+        self.kNextDue = '次回出題日時'
+        # 内部で使用する列 / Columns used internally
+        self.kInternalColumns = [
+            self.kLastUpdateTime,
+            self.kNextDue
+        ]
+
+        # 問題集の検査で確認する列
+        # Columns checked when validating the problem set
+        self.kCheckColumns = [
+            self.kGrade,
+            self.kProblem,
+            self.kAnswer,
+            self.kNumber,
+            self.kAdminNumber
+        ]
+        # 検査結果のキャッシュの版数(検査の内容を変えたときは更新する)
+        # Version of the check result cache (update it when the checks change)
+        self.kCheckCacheVersion = 1
+
         # 漢字テストの結果
         # Results of kanji tests
         self.kNotMk = '-'
@@ -62,6 +92,38 @@ class KanjiWorkSheet:
             self.kMonthMk,   # 一ヶ月後
         ]
 
+        # 結果の遷移表 / Transition table of results
+        # 前回の結果: (今回正解したときの結果, 今回不正解だったときの結果)
+        # Previous result: (result when correct this time, result when incorrect this time)
+        self.transition_table = {
+            self.kNotMk: (self.kCrctMk, self.kIncrctMk),     # - -> o
+            self.kCrctMk: (self.kCrctMk, self.kIncrctMk),    # o -> o
+            self.kIncrctMk: (self.kDayMk, self.kIncrctMk),   # x -> d
+            self.kDayMk: (self.kWeekMk, self.kIncrctMk),     # d -> w
+            self.kWeekMk: (self.kMonthMk, self.kIncrctMk),   # w -> m
+            self.kMonthMk: (self.kCrctMk, self.kIncrctMk),   # m -> o
+        }
+        # 結果ごとの、最終更新日から再出題するまでの日数(表にない結果は再出題しない)
+        # 練習モードでは、この表の順に優先して出題する。
+        # Days from the last update until the problem is asked again, per result
+        # (results not in the table are not scheduled).
+        # Training mode gives priority in the order of this table.
+        self.interval_table = {
+            self.kIncrctMk: 0,        # 間違えた問題(復習モード) / Wrong problems (review mode)
+            self.kDayMk: 3,           # 3日後 / After 3 days
+            self.kWeekMk: 7 - 1,      # 1週間後 / After 1 week
+            self.kMonthMk: 7 * 4 - 7  # 1ヶ月後 / After 1 month
+        }
+        # 毎日同じ時間帯に学習する場合でも前日の問題を出題できるように、出題日時を早める時間
+        # Time to bring the due date forward, so that problems from the previous day
+        # can be asked even when studying at the same time every day
+        self.kDueOffset = pd.Timedelta(hours=2)
+        # 出題スケジュールの設定ファイルのパス
+        # Path of the schedule setting file
+        self.path_of_schedule_file = r'./.schedule'
+        # 出題スケジュールの設定ファイルの列 / Columns of the schedule setting file
+        self.kScheduleColumns = ['結果', '正解', '不正解', '間隔']
+
         # 問題集のパス
         # Path to the problem set
         self.path_of_worksheet = ''
@@ -71,9 +133,38 @@ class KanjiWorkSheet:
         # 学年毎の漢字リスト
         # Kanji lists by grade level
         self.kanji_by_grade_list = [[] for _ in range(self.kGradeRange[1] + 1)]
+        # 答えの漢字から問題のインデックスを引くための索引(学年毎)
+        # Index from answer kanji to problem indices (per grade)
+        # 例) self.answer_index[1]['雨'] = {0, 5, 8}
+        self.answer_index = [{} for _ in range(self.kGradeRange[1] + 1)]
+        # 索引に登録した各問題の学年と答え(索引を更新するときに使用する)
+        # Grade and answer registered in the index for each problem (used when updating the index)
+        self.answer_index_row = {}
+        # 学年と結果ごとの問題数(結果を更新するたびに差分だけ更新する)
+        # Number of problems by grade and result (only the difference is updated each time a result is updated)
+        self.report_count = np.zeros((self.kGradeRange[1] - self.kGradeRange[0] + 1, len(self.report_key_list)), dtype=int)
+        # 直近に結果を反映したときの問題数の増減
+        # Change in the number of problems when the results were last applied
+        self.report_count_diff = np.zeros_like(self.report_count)
+        # 再出題する問題の優先度索引(結果ごとに、次に出題する日時の昇順に並べた配列)
+        # Priority index of problems to be asked again (arrays sorted by next due time, per result)
+        # 例) self.due_index['d'] = (次に出題する日時[ns]の配列, 問題のインデックスの配列)
+        self.due_index = {}
+        # 優先度索引に登録した各問題の結果と次に出題する日時(索引を更新するときに使用する)
+        # Result and next due time registered in the priority index for each problem (used when updating the index)
+        self.due_index_row = {}
+        # 習熟度表のキャッシュ(問題集の内容のハッシュ値, 習熟度表)
+        # Cache of the mastery table (hash of the problem set contents, mastery table)
+        self.mastery_cache = (None, None)
+
+        # 出題スケジュールの設定ファイルがある場合は、遷移表と間隔表を置き換える。
+        # If there is a schedule setting file, replace the transition and interval tables.
+        if os.path.exists(self.path_of_schedule_file):
+            self.load_schedule_file(self.path_of_schedule_file)
 
     # 漢字の問題集を読み込む。
     # Load the kanji worksheet.
+    @DebugPrint.trace('load_worksheet', rows=lambda self, path: len(self.worksheet))
     def load_worksheet(self, path):
         """
         :parameter path: 問題集のパス / Path to the problem set
@@ -92,16 +183,18 @@ class KanjiWorkSheet:
             try:
                 # 問題集を読み込む。
                 # Read the problem set.
-                self.worksheet = pd.read_csv(self.path_of_worksheet, sep=',', encoding='shift-jis')
+                with self.DebugPrint.span('read_csv') as span:
+                    self.worksheet = pd.read_csv(self.path_of_worksheet, sep=',', encoding='shift-jis')
+                    span.rows = len(self.worksheet)
                 self.print_info('問題集(' + self.path_of_worksheet + ')の読み込みに成功しました。')
             # ファイルが空だった場合
             # If the file is empty.
             except pd.errors.EmptyDataError:
                 fmt_err_msg.append(self.print_error('問題集が空です。'))
 
-            # 問題集の内容をチェックする。
-            # Check the content of the problem set.
-            fmt_err_msg = self.__check_worksheet()
+            # 問題集の内容をチェックする。前回から変わっていない行は検査を省略する。
+            # Check the content of the problem set. Skip rows that have not changed since last time.
+            fmt_err_msg = self.__check_worksheet_with_cache()
 
         # ファイルが存在しない。
         # If the file does not exist.
@@ -109,6 +202,8 @@ class KanjiWorkSheet:
             # データを初期化し、エラーメッセージを出力する。
             # Initialize data and output an error message.
             self.worksheet = pd.DataFrame()
+            self.__create_answer_index()
+            self.__create_report_count()
             opn_err_msg.append(self.print_error('問題集が存在しません。'))
 
             # エラーコードを出しすぎても仕方がないので、制限を5回までとする。
@@ -119,9 +214,14 @@ class KanjiWorkSheet:
         # Replace results other than self.report_key_list with self.kNotMk.
         self.__replace_undef_char_with_NotMk()
 
-
+        # 最終更新日を日時に変換する。
+        # Parse the last update date into datetime.
         self.__replace_err_last_update()
 
+        # 次に出題する日時を計算する。
+        # Calculate the next due date and time.
+        self.update_next_due()
+
         # 履歴がNanの場合は、''に置き換える。
         # Replace NaN values in history with an empty string.
         self.__replace_nan_char_with_space()
@@ -130,6 +230,14 @@ class KanjiWorkSheet:
         # Check kanji by grade level.
         self.__create_list_kanji_by_grade()
 
+        # 答えの漢字の索引を作成する。
+        # Create the index of answer kanji.
+        self.__create_answer_index()
+
+        # 学年と結果ごとの問題数を数える。
+        # Count the number of problems by grade and result.
+        self.__create_report_count()
+
         # 学年毎の合計出題数を表示する。
         # Display the total number of questions per grade level.
         for grade in range(self.kGradeRange[0], self.kGradeRange[-1] + 1):
@@ -163,8 +271,12 @@ class KanjiWorkSheet:
         # If the file exists.
         if os.path.exists(self.path_of_worksheet):
             try:
-                self.worksheet.to_csv(self.path_of_worksheet, index=False, encoding='shift-jis')
+                self.get_worksheet_to_save(self.worksheet).to_csv(
+                    self.path_of_worksheet, index=False, encoding='shift-jis')
                 self.print_info('問題集(' + self.path_of_worksheet + ')を更新しました。')
+                # 検査済みの内容を書き込んだ場合は、次に読み込むときの検査を省略できるようにする。
+                # If the checked contents were written, allow the check to be skipped next time.
+                self.__update_check_cache()
             # 問題集を開くなどして、書き込みができない。
             # If unable to write due to the problem set being open, etc.
             except PermissionError:
@@ -177,9 +289,132 @@ class KanjiWorkSheet:
 
         return len(wrt_err_msg) != 0, wrt_err_msg
 
+    # 前回の検査結果を使って、漢字の問題集をチェックする。
+    # Check the kanji worksheet using the previous check results.
+    def __check_worksheet_with_cache(self):
+        """
+        前回の検査結果を使って、漢字の問題集をチェックする。
+        Check the kanji worksheet using the previous check results.
+
+        ファイルサイズ、更新日時、内容のハッシュ値が前回検査したときと同じ場合は、検査を省略する。
+        内容が変わっている場合は、前回検査したときから変わった行だけを検査する。
+        Skip the check if the file size, modification time and content hash are the same as last time.
+        If the contents have changed, check only the rows that changed since last time.
+        """
+        # ファイル形式が正しくない場合は、行を比較できない。
+        # If the file format is wrong, the rows cannot be compared.
+        fmt_err_msg = self.__check_file_format()
+        if len(fmt_err_msg) != 0:
+            return fmt_err_msg
+
+        cache_path = self.get_path_of_check_cache(self.path_of_worksheet)
+        (cache_key, cache_row_hash) = self.__load_check_cache(cache_path)
+        key = self.__get_check_cache_key()
+
+        # ファイルが変わっていない場合は、検査を省略する。
+        # If the file has not changed, skip the check.
+        if key == cache_key:
+            self.print_info('問題集が前回から変更されていないため、検査を省略しました。')
+            return fmt_err_msg
+
+        # 前回検査した時から変わった行だけを検査する。
+        # Check only the rows that changed since last time.
+        row_hash = pd.util.hash_pandas_object(self.worksheet[self.kCheckColumns], index=False).values
+        rows = self.worksheet.index[~np.isin(row_hash, cache_row_hash)]
+        if len(rows) != 0:
+            fmt_err_msg = self.__check_worksheet(rows)
+        self.print_info('問題集の' + str(len(rows)) + '行を検査しました。')
+
+        # すべての行が正しい場合だけ、検査結果を保存する。
+        # Save the check results only if all rows are valid.
+        if len(fmt_err_msg) == 0:
+            self.__save_check_cache(cache_path, key, row_hash)
+
+        return fmt_err_msg
+
+    # 検査結果のキャッシュのパスを取得する。
+    # Get the path of the check result cache.
+    def get_path_of_check_cache(self, path):
+        """
+        :param path: 問題集のパス / Path to the problem set
+        :type path: string
+
+        検査結果のキャッシュのパスを取得する。
+        Get the path of the check result cache.
+        """
+        return os.path.join(os.path.dirname(path), '.' + os.path.basename(path) + '.cache')
+
+    # 検査結果のキャッシュのキーを作成する。
+    # Create the key of the check result cache.
+    def __get_check_cache_key(self):
+        stat = os.stat(self.path_of_worksheet)
+        with open(self.path_of_worksheet, 'rb') as f:
+            content_hash = hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+
+        return {
+            'version': self.kCheckCacheVersion,
+            'grade_range': self.kGradeRange,
+            'size': stat.st_size,
+            'mtime': stat.st_mtime_ns,
+            'hash': content_hash,
+        }
+
+    # 検査結果のキャッシュを読み込む。
+    # Load the check result cache.
+    def __load_check_cache(self, cache_path):
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+            row_hash = np.frombuffer(base64.b64decode(cache['rows']), dtype='<u8')
+            return cache['key'], row_hash
+        # キャッシュがない、または壊れている場合は、すべての行を検査する。
+        # If the cache does not exist or is broken, check all rows.
+        except (OSError, ValueError, KeyError, TypeError):
+            return None, np.array([], dtype='<u8')
+
+    # 検査結果のキャッシュを保存する。
+    # Save the check result cache.
+    def __save_check_cache(self, cache_path, key, row_hash):
+        cache = {
+            'key': key,
+            'rows': base64.b64encode(np.unique(row_hash).astype('<u8').tobytes()).decode('ascii'),
+        }
+        try:
+            # 書き込み途中のキャッシュを読まないように、書き込んでから置き換える。
+            # Write and then replace, so that a half-written cache is never read.
+            with open(cache_path + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump(cache, f)
+            os.replace(cache_path + '.tmp', cache_path)
+        # キャッシュを保存できなくても、問題集は使える。
+        # The problem set can be used even if the cache cannot be saved.
+        except OSError:
+            self.print_info('検査結果のキャッシュ(' + cache_path + ')を保存できませんでした。')
+
+    # 問題集を書き込んだ後に、検査結果のキャッシュのキーを更新する。
+    # Update the key of the check result cache after writing the problem set.
+    def __update_check_cache(self):
+        cache_path = self.get_path_of_check_cache(self.path_of_worksheet)
+        (cache_key, cache_row_hash) = self.__load_check_cache(cache_path)
+        if cache_key is None or self.worksheet.empty:
+            return
+
+        # 検査する列が検査済みの行だけの場合に更新する。
+        # Update only if the checked columns consist of checked rows only.
+        row_hash = pd.util.hash_pandas_object(self.worksheet[self.kCheckColumns], index=False).values
+        if np.isin(row_hash, cache_row_hash).all():
+            self.__save_check_cache(cache_path, self.__get_check_cache_key(), row_hash)
+
     # 漢字の問題集をチェックする。
     # Check the kanji worksheet.
-    def __check_worksheet(self):
+    def __check_worksheet(self, rows=None):
+        """
+        :param rows: 検査する行(Noneの場合はすべての行) / Rows to check (all rows if None)
+        :type rows: pandas.Index
+
+        漢字の問題集をチェックする。
+        Check the kanji worksheet.
+        """
+        worksheet = self.worksheet if rows is None else self.worksheet.loc[rows]
         fmt_err_msg = []
 
         # ファイル形式をチェックする。
@@ -189,27 +424,27 @@ class KanjiWorkSheet:
         # 欠損値をチェックする。
         # Check for missing values.
         if len(fmt_err_msg) == 0:
-            fmt_err_msg = self.__check_column_nan(fmt_err_msg)
+            fmt_err_msg = self.__check_column_nan(worksheet, fmt_err_msg)
         # 数値以外をチェックする。
         # Check for non-numeric values.
         if len(fmt_err_msg) == 0:
-            fmt_err_msg = self.__check_column_non_numeric(fmt_err_msg)
+            fmt_err_msg = self.__check_column_non_numeric(worksheet, fmt_err_msg)
         # 整数以外をチェックする。
         # Check for non-integer values.
         if len(fmt_err_msg) == 0:
-            fmt_err_msg = self.__check_column_non_integer(fmt_err_msg)
+            fmt_err_msg = self.__check_column_non_integer(worksheet, fmt_err_msg)
         # 範囲外の数値をチェックする。
         # Check for out-of-range values.
         if len(fmt_err_msg) == 0:
-            fmt_err_msg = self.__check_column_out_of_range(fmt_err_msg)
+            fmt_err_msg = self.__check_column_out_of_range(worksheet, fmt_err_msg)
         # ルビの有無をチェックする。
         # Check for presence of ruby annotations.
         if len(fmt_err_msg) == 0:
-            fmt_err_msg = self.__check_kanji_ruby(fmt_err_msg)
+            fmt_err_msg = self.__check_kanji_ruby(worksheet, fmt_err_msg)
         # 問題文の構文をチェックする。
         # Check the syntax of problem statements.
         if len(fmt_err_msg) == 0:
-            fmt_err_msg = self.__check_kanji_syntax(fmt_err_msg)
+            fmt_err_msg = self.__check_kanji_syntax(worksheet, fmt_err_msg)
 
         return fmt_err_msg
 
@@ -243,14 +478,42 @@ class KanjiWorkSheet:
     # 問題集から指定した答えの問題を取得する。
     # Retrieve problems from the worksheet with the specified answer.
     def get_problem_with_answer(self, kanji, grade):
+        """
+        :param kanji: 漢字 / Kanji characters
+        :type kanji: string
+        :param grade: 学年 / Grade level
+        :type grade: list
+
+        問題集から指定した答えの問題を取得する。
+        Retrieve problems from the worksheet with the specified answer.
+        """
+        return self.worksheet.loc[self.get_problem_index_with_answer(kanji, grade)]
+
+    # 問題集から指定した答えの問題のインデックスを取得する。
+    # Retrieve the indices of problems from the worksheet with the specified answer.
+    def get_problem_index_with_answer(self, kanji, grade):
+        """
+        :param kanji: 漢字 / Kanji characters
+        :type kanji: string
+        :param grade: 学年 / Grade level
+        :type grade: list
+
+        問題集から指定した答えの問題のインデックスを取得する。
+        Retrieve the indices of problems from the worksheet with the specified answer.
+
+        答えに指定した漢字のいずれかが含まれている、指定した学年までの問題を索引から引く。
+        Look up problems up to the specified grade whose answers contain any of the specified kanji.
+        """
         if not isinstance(grade, list):
             grade = [grade]
 
-        # 答えに指定した漢字が含まれている問題を抽出する。
-        # Extract problems where the answer contains the specified kanji characters.
-        temp = self.worksheet[self.worksheet[self.kAnswer].apply(lambda x: any(char in x for char in kanji))]
-        grade_list = list(range(1, max(grade) + 1))
-        return temp[temp[self.kGrade].isin(grade_list)]
+        idx = set()
+        for grade_i in range(self.kGradeRange[0], max(grade) + 1):
+            for char in kanji:
+                idx.update(self.answer_index[grade_i].get(char, ()))
+
+        # 問題集の並び順で返す。 / Return them in the order of the problem set.
+        return sorted(idx)
 
     # 指定した学年の漢字のリストを取得する。
     # Retrieve the list of kanji characters for the specified grade level.
@@ -265,27 +528,322 @@ class KanjiWorkSheet:
         # 指定した学年の漢字のリストを取得する。
         # Get the list of kanji characters for the specified grade level.
         kanji_list = self.get_kanji_by_grade_list(grade)
-        result_dict = {}
+        # 全学年の習熟度表を取得する。
+        # Get the mastery table of all grades.
+        status = self.get_analysis_mastery_table()[self.kResult]
 
         # 指定した学年の漢字だけ処理をする。
         # Process only the kanji characters for the specified grade level.
-        for kanji in kanji_list:
-            # 問題集から指定した答えの問題を取得する。
-            # Retrieve problems from the worksheet with the specified answer.
-            problem_list = self.get_problem_with_answer(kanji, grade)
-
-            # 漢字毎に辞書化し、その漢字が正解しているか否かを確認する。
-            # Create a dictionary for each kanji character and check if it is correct.
-            # 1つでも正解していれば正解と判断する。
-            # If at least one problem is correct, consider the kanji as correct.#
-            # その漢字ではなく、熟語が分からず間違っている可能性があるため。
-            # It might be a compound word that the user doesn't recognize.
-            result_dict[kanji] = False
-            for result in problem_list[self.kResult]:
-                if result == self.kCrctMk:
-                    result_dict[kanji] = True
-
-        return result_dict
+        return {kanji: status.get(kanji) == self.kCrctMk for kanji in kanji_list}
+
+    # 全学年の漢字の習熟度表を取得する。
+    # Get the mastery table of kanji for all grades.
+    def get_analysis_mastery_table(self):
+        """
+        全学年の漢字の習熟度表を取得する。
+        Get the mastery table of kanji for all grades.
+
+        インデックスは漢字で、[学年]列はその漢字を習う学年、[結果]列は以下の通り。
+        The index is kanji, the [Grade] column is the grade where it is learned,
+        and the [Result] column is as follows.
+
+        - self.kCrctMk  : 正解している / Correct
+        - self.kIncrctMk: 出題したが正解していない / Asked but not correct
+        - self.kNotMk   : 未出題 / Never asked
+
+        問題集の内容が変わらない限り、前回作成した表を返す。
+        Returns the previously created table as long as the problem set contents do not change.
+        """
+        key = self.__get_mastery_hash()
+        if self.mastery_cache[0] != key:
+            self.mastery_cache = (key, self.__create_mastery_table())
+        return self.mastery_cache[1]
+
+    # 出題スケジュールの設定ファイルを読み込む。
+    # Load the schedule setting file.
+    def load_schedule_file(self, path):
+        """
+        :param path: 設定ファイルのパス / Path of the setting file
+        :type path: string
+
+        出題スケジュールの設定ファイルを読み込み、遷移表と間隔表を置き換える。
+        Load the schedule setting file and replace the transition and interval tables.
+
+        1行が1つの結果で、列は[結果, 正解, 不正解, 間隔]。[間隔]が空欄の結果は再出題しない。
+        One row per result, and the columns are [Result, Correct, Incorrect, Interval].
+        Results with an empty [Interval] are not scheduled.
+        """
+        err_msg = []
+        try:
+            schedule = pd.read_csv(path, sep=',', encoding='shift-jis', dtype={self.kScheduleColumns[3]: float})
+        except (OSError, ValueError) as e:
+            err_msg.append(self.print_error('出題スケジュール(' + path + ')を読み込めません: ' + str(e)))
+            return len(err_msg) != 0, err_msg
+
+        if list(schedule.columns) != self.kScheduleColumns:
+            err_msg.append(self.print_error('出題スケジュールの列は' + str(self.kScheduleColumns) + 'にしてください.'))
+            return len(err_msg) != 0, err_msg
+
+        marks = schedule[self.kScheduleColumns[0:3]].values.ravel()
+        if not all(mark in self.report_key_list for mark in marks):
+            err_msg.append(self.print_error('出題スケジュールの結果は' + str(self.report_key_list) + 'にしてください.'))
+            return len(err_msg) != 0, err_msg
+
+        (result, correct, incorrect, interval) = self.kScheduleColumns
+        self.transition_table = dict(zip(schedule[result], zip(schedule[correct], schedule[incorrect])))
+        schedule = schedule[schedule[interval].notna()]
+        self.interval_table = dict(zip(schedule[result], schedule[interval]))
+        self.print_info('出題スケジュール(' + path + ')を読み込みました。')
+
+        return len(err_msg) != 0, err_msg
+
+    # 前回の結果と今回の正誤から、次の結果を取得する。
+    # Get the next result from the previous result and whether the answer is correct this time.
+    def get_next_result(self, old, correct):
+        """
+        :param old: 前回の結果 / Previous result
+        :type old: string
+        :param correct: 今回正解したか / Whether the answer is correct this time
+        :type correct: bool
+
+        前回の結果と今回の正誤から、次の結果を取得する。
+        Get the next result from the previous result and whether the answer is correct this time.
+        """
+        (crct, incrct) = self.transition_table.get(old, (self.kCrctMk, self.kIncrctMk))
+        return crct if correct else incrct
+
+    # 次に出題する日時を計算する。
+    # Calculate the next due date and time.
+    def update_next_due(self, idx=None):
+        """
+        :param idx: 計算する問題のインデックス(Noneの場合はすべての問題) / Indices of the problems (all if None)
+        :type idx: list
+
+        結果と最終更新日から、次に出題する日時をまとめて計算する。再出題しない問題は NaT にする。
+        Calculate the next due date and time from the result and the last update date at once.
+        Problems that are not scheduled are set to NaT.
+        """
+        worksheet = self.worksheet if idx is None else self.worksheet.loc[idx]
+        days = pd.to_numeric(worksheet[self.kResult].map(self.interval_table), errors='coerce')
+        due = worksheet[self.kLastUpdateTime] + days * pd.Timedelta(days=1) - self.kDueOffset
+
+        if idx is None:
+            self.worksheet[self.kNextDue] = due
+            self.__create_due_index()
+        else:
+            self.worksheet.loc[idx, self.kNextDue] = due
+            self.__update_due_index(idx)
+
+    # 出題する日時を過ぎた問題のインデックスを、優先度索引から取得する。
+    # Get the indices of the problems past their due time from the priority index.
+    def get_due_index(self, result_list, time, num=None):
+        """
+        :param result_list: 対象の結果(先頭ほど優先する) / Target results (earlier ones have priority)
+        :type result_list: list
+        :param time: 基準の日時 / Reference time
+        :type time: pandas.Timestamp
+        :param num: 取得する数(Noneの場合はすべて) / Number to get (all if None)
+        :type num: int
+
+        出題する日時を過ぎた問題のインデックスを、(結果の優先順, 次に出題する日時)の順に返す。
+        結果ごとに二分探索して先頭から取り出すため、問題集の大きさによらず取得する数に比例した時間で済む。
+        Return the indices of the problems past their due time, ordered by (result priority, next due time).
+        Since each result is binary-searched and taken from the head,
+        the cost is proportional to the number taken regardless of the size of the problem set.
+        """
+        now = pd.Timestamp(time).value
+        idx_list = []
+        rest = num
+        for result in result_list:
+            if result not in self.due_index or (rest is not None and rest <= 0):
+                continue
+            (due_arr, idx_arr) = self.due_index[result]
+            cnt = int(np.searchsorted(due_arr, now, side='right'))
+            if rest is not None:
+                cnt = min(cnt, rest)
+                rest -= cnt
+            idx_list.append(idx_arr[0:cnt])
+
+        if len(idx_list) == 0:
+            return np.array([], dtype=np.int64)
+        return np.concatenate(idx_list)
+
+    # 学年と結果ごとの問題数を数えたか否かを取得する。
+    # Get whether the problem counts by grade and result are available.
+    def has_report_count(self):
+        """
+        学年と結果ごとの問題数を数えたか否かを取得する。
+        問題集を読み込んでいない場合、self.report_countはすべて0のため、学年と結果の列があるかで判定する。
+        Get whether the problem counts by grade and result are available.
+        If no problem set is loaded, self.report_count is all zeros,
+        so decide by whether the grade and result columns exist.
+        """
+        return self.kGrade in self.worksheet.columns and self.kResult in self.worksheet.columns
+
+    # 学年と結果ごとの問題数の集計表を取得する。
+    # Get the table of problem counts by grade and result.
+    def get_report_count_table(self):
+        """
+        学年と結果ごとの問題数の集計表を取得する。
+        Get the table of problem counts by grade and result.
+
+        インデックスは学年、列は結果(self.report_key_list)で、値は問題数。
+        問題集を読み込んでいない場合はNoneを返す。
+        The index is the grade, the columns are the results (self.report_key_list),
+        and the values are the numbers of problems.
+        Returns None if no problem set is loaded.
+        """
+        if not self.has_report_count():
+            return None
+
+        return pd.DataFrame(
+            self.report_count.copy(),
+            index=pd.Index(range(self.kGradeRange[0], self.kGradeRange[1] + 1), name=self.kGrade),
+            columns=self.report_key_list
+        )
+
+    # 指定した学年と結果の問題数を取得する。
+    # Get the number of problems for the specified grades and result.
+    def get_report_count(self, grade, status=None):
+        """
+        :param grade: 学年 / Grade
+        :type grade: list
+        :param status: 結果(Noneの場合はすべての結果) / Result (all results if None)
+        :type status: string
+
+        指定した学年と結果の問題数を取得する。
+        Get the number of problems for the specified grades and result.
+        """
+        return self.__get_report_count(self.report_count, grade, status)
+
+    # 直近に結果を反映したときの、指定した学年と結果の問題数の増減を取得する。
+    # Get the change in the number of problems for the specified grades and result
+    # when the results were last applied.
+    def get_report_count_diff(self, grade, status=None):
+        """
+        :param grade: 学年 / Grade
+        :type grade: list
+        :param status: 結果(Noneの場合はすべての結果) / Result (all results if None)
+        :type status: string
+
+        直近に結果を反映したときの、指定した学年と結果の問題数の増減を取得する。
+        Get the change in the number of problems for the specified grades and result
+        when the results were last applied.
+        """
+        return self.__get_report_count(self.report_count_diff, grade, status)
+
+    # 問題の結果を更新する。
+    # Update the result of a problem.
+    def update_result(self, idx, status):
+        """
+        :param idx: 問題のインデックス / Index of the problem
+        :type idx: int
+        :param status: 結果 / Result
+        :type status: string
+
+        問題の結果を更新し、学年と結果ごとの問題数を差分だけ更新する。
+        Update the result of a problem and update only the difference
+        in the number of problems by grade and result.
+        """
+        grade = self.worksheet.loc[idx, self.kGrade]
+        old = self.worksheet.loc[idx, self.kResult]
+        self.worksheet.loc[idx, self.kResult] = status
+
+        for key, value in [(old, -1), (status, 1)]:
+            if key in self.report_key_list and self.kGradeRange[0] <= grade <= self.kGradeRange[1]:
+                pos = (int(grade) - self.kGradeRange[0], self.report_key_list.index(key))
+                self.report_count[pos] += value
+                self.report_count_diff[pos] += value
+
+    # 結果の増減を数え直す。
+    # Start counting the change in results again.
+    def clear_report_count_diff(self):
+        """
+        結果の増減を数え直す。
+        Start counting the change in results again.
+        """
+        self.report_count_diff = np.zeros_like(self.report_count)
+
+    # 学年と結果ごとの問題数を、数え直した結果と比較する。
+    # Compare the number of problems by grade and result with a full recount.
+    def verify_report_count(self):
+        """
+        学年と結果ごとの問題数を、数え直した結果と比較する。
+        Compare the number of problems by grade and result with a full recount.
+
+        一致しない場合は、エラーメッセージを出力し、数え直した結果に置き換える。
+        If they do not match, output an error message and replace them with the recount.
+        """
+        count = self.__count_report()
+        if not np.array_equal(count, self.report_count):
+            self.print_error('学年と結果ごとの問題数が一致しません。数え直しました。')
+            self.report_count = count
+            return False
+        return True
+
+    # 答えの漢字の索引を更新する。
+    # Update the index of answer kanji.
+    def update_answer_index(self, idx_list):
+        """
+        :param idx_list: 更新した問題のインデックス / Indices of the updated problems
+        :type idx_list: list
+
+        答えの漢字の索引を更新する。
+        Update the index of answer kanji.
+
+        問題の学年や答えを変更した場合、または問題を追加/削除した場合に呼び出す。
+        Call this when the grade or answer of problems changes, or when problems are added/removed.
+        """
+        for idx in idx_list:
+            # 以前の登録を取り除く。 / Remove the previous entries.
+            if idx in self.answer_index_row:
+                (grade, ans) = self.answer_index_row.pop(idx)
+                for char in ans:
+                    rows = self.answer_index[grade][char]
+                    rows.discard(idx)
+                    if len(rows) == 0:
+                        del self.answer_index[grade][char]
+
+            # 問題集に存在する問題を登録する。 / Register the problems that exist in the problem set.
+            if idx in self.worksheet.index:
+                grade = self.worksheet.at[idx, self.kGrade]
+                ans = self.worksheet.at[idx, self.kAnswer]
+                # 学年が数値でない問題は、書式の検査でエラーにするため登録しない。
+                # Problems whose grade is not a number are reported by the format check, so do not register them.
+                if not isinstance(grade, (int, float, np.integer, np.floating)) or isinstance(grade, bool):
+                    continue
+                if isinstance(ans, str) and self.kGradeRange[0] <= grade <= self.kGradeRange[1]:
+                    self.answer_index_row[idx] = (int(grade), ans)
+                    for char in ans:
+                        self.answer_index[int(grade)].setdefault(char, set()).add(idx)
+
+    # 最終更新日の文字列を日時に変換する。
+    # Convert the last update date strings into datetime.
+    def to_last_update_time(self, date_str):
+        """
+        :param date_str: 最終更新日 / Last update date
+        :type date_str: pandas.Series
+
+        最終更新日の文字列を日時に変換する。
+        Convert the last update date strings into datetime.
+
+        Excel対策で囲っているクォートを取り除き、まとめて変換する。
+        Strip the quotes added for Excel and convert them all at once.
+        """
+        date_str = date_str.astype(str).str.strip('\'"')
+        return pd.to_datetime(date_str, errors='coerce', format='ISO8601')
+
+    # 問題集から内部で使用する列を取り除く。
+    # Remove the columns used internally from the problem set.
+    def get_worksheet_to_save(self, worksheet):
+        """
+        :param worksheet: 問題集 / Problem set
+        :type worksheet: pandas.DataFrame
+
+        問題集から内部で使用する列を取り除く。
+        Remove the columns used internally from the problem set.
+        """
+        return worksheet.drop(columns=self.kInternalColumns, errors='ignore')
 
     # デバッグ情報を標準出力する.
     def print_info(self, msg):
@@ -296,6 +854,7 @@ class KanjiWorkSheet:
         return self.DebugPrint.print_error(msg)
 
     # ファイル形式をチェックする.
+    @DebugPrint.trace('check_file_format', rows=lambda self, *args: len(self.worksheet))
     def __check_file_format(self, fmt_err_msg=None):
         """
         :param fmt_err_msg: エラーメッセージ
@@ -320,7 +879,8 @@ class KanjiWorkSheet:
         return fmt_err_msg
 
     # 欠損値をチェックする.
-    def __check_column_nan(self, fmt_err_msg=None):
+    @DebugPrint.trace('check_column_nan', rows=lambda self, worksheet, *args: len(worksheet))
+    def __check_column_nan(self, worksheet, fmt_err_msg=None):
         """
         :param fmt_err_msg: エラーメッセージ
         :type fmt_err_msg: string
@@ -332,13 +892,14 @@ class KanjiWorkSheet:
         if fmt_err_msg is None:
             fmt_err_msg = []
         for col in chk_list:
-            if self.worksheet[col].isna().any():
+            if worksheet[col].isna().any():
                 fmt_err_msg.append(self.print_error('[' + col + ']列に空欄があります.'))
 
         return fmt_err_msg
 
     # 数値以外をチェックする.
-    def __check_column_non_numeric(self, fmt_err_msg=None):
+    @DebugPrint.trace('check_column_non_numeric', rows=lambda self, worksheet, *args: len(worksheet))
+    def __check_column_non_numeric(self, worksheet, fmt_err_msg=None):
         """
         :param fmt_err_msg: エラーメッセージ
         :type fmt_err_msg: string
@@ -351,7 +912,7 @@ class KanjiWorkSheet:
             fmt_err_msg = []
         for col in chk_list:
             # 数値に変換し、変換に失敗した場合に欠損値にすることで、数値が入っているかを確認する.
-            data = pd.to_numeric(self.worksheet[col], errors='coerce')
+            data = pd.to_numeric(worksheet[col], errors='coerce')
             msg = '[' + str(col) + ']列には数値を入れてください.'
             if pd.isna(data).any():
                 fmt_err_msg.append(self.print_error(msg))
@@ -359,14 +920,15 @@ class KanjiWorkSheet:
         return fmt_err_msg
 
     # 整数以外をチェックする.
-    def __check_column_non_integer(self, fmt_err_msg=None):
+    @DebugPrint.trace('check_column_non_integer', rows=lambda self, worksheet, *args: len(worksheet))
+    def __check_column_non_integer(self, worksheet, fmt_err_msg=None):
         """整数以外をチェックする."""
         # '学年', '番号' 列に整数以外が入っていないか確認.
         chk_list = [self.kGrade, self.kNumber]
         if fmt_err_msg is None:
             fmt_err_msg = []
         for col in chk_list:
-            data = self.worksheet[col]
+            data = worksheet[col]
             msg = '[' + str(col) + ']列には数値を入れてください.'
             if any(list(data.astype(int).values) != data):
                 fmt_err_msg.append(self.print_error(msg))
@@ -374,11 +936,12 @@ class KanjiWorkSheet:
         return fmt_err_msg
 
     # 範囲外の数値をチェックする.
-    def __check_column_out_of_range(self, fmt_err_msg):
+    @DebugPrint.trace('check_column_out_of_range', rows=lambda self, worksheet, *args: len(worksheet))
+    def __check_column_out_of_range(self, worksheet, fmt_err_msg):
         """範囲外の数値をチェックする."""
         # [学年] 列の範囲外の数値が入っていないか確認.
-        low = len(self.worksheet[self.worksheet[self.kGrade] < self.kGradeRange[0]])
-        high = len(self.worksheet[self.worksheet[self.kGrade] > self.kGradeRange[-1]])
+        low = len(worksheet[worksheet[self.kGrade] < self.kGradeRange[0]])
+        high = len(worksheet[worksheet[self.kGrade] > self.kGradeRange[-1]])
         if low != 0 or high != 0:
             msg = '[' + str(self.kGrade) + ']列には' \
                   + str(self.kGradeRange[0]) + 'から' \
@@ -388,112 +951,45 @@ class KanjiWorkSheet:
         return fmt_err_msg
 
     # ルビの有無をチェック
-    def __check_kanji_ruby(self, fmt_err_msg):
-        kanji_flg = False
-        i = 0
-        for statement in self.worksheet[self.kProblem]:
-            for word in statement:
-                if self.is_kanji(word):
-                    kanji_flg = True
-                elif kanji_flg:
-                    if word != '<':
-                        msg = str(i + 1) + '行目の問題文にルビがありません.'
-                        fmt_err_msg.append(self.print_error(msg))
-                    kanji_flg = False
-                else:
-                    kanji_flg = False
-
-            i += 1
+    @DebugPrint.trace('check_kanji_ruby', rows=lambda self, worksheet, *args: len(worksheet))
+    def __check_kanji_ruby(self, worksheet, fmt_err_msg):
+        # 変更された行だけを検査する場合もあるため、行番号は行ラベルから求める.
+        for i, statement in zip(worksheet.index, worksheet[self.kProblem]):
+            # ルビがない漢字の数だけエラーにする.
+            for _ in range(tokenize_problem_statement(statement).ruby_missing):
+                msg = str(i + 1) + '行目の問題文にルビがありません.'
+                fmt_err_msg.append(self.print_error(msg))
 
         return fmt_err_msg
 
     # 問題文の構文をチェックする.
-    def __check_kanji_syntax(self, fmt_err_msg):
-        n = len(self.worksheet[self.kProblem])
-        for sentence, ans, num in zip(self.worksheet[self.kProblem], self.worksheet[self.kAnswer], range(n)):
-            r_inflag = False  # ルビの True:開始記号<を通過したとき, False:ルビの終了記号>を通過したとき
-            r_nest_err = False  # ルビの指定文字が True:入れ子になっているとき, False:入れ子になっていないとき
-            r_cnt_err = False  # ルビの文字数が True:0のとき, False:1以上のとき
-            r_err = False  # ルビの True:何れかが大文字, False:すべてルビが小文字
-
-            r_word_cnt = 0  # ルビの文字数
-
-            p_inflag = False  # 問題の True:開始記号[を通過したとき, False:問題枠の終了記号]を通過したとき
-            p_nest_err = False  # 問題枠の True:指定文字が入れ子になっているとき, False:問題枠の指定文字が入れ子になっていないとき
-            p_cnt_err = False  # 問題の True:文字数が0のとき, False:問題の文字数が1以上のとき
-
-            p_word_cnt = 0  # 問題枠の文字数
-            p_frame_cnt = 0  # 問題枠の数
-
-            for word in list(sentence):
-                ##########################################################
-                # 問題文のルビ<>が入れ子になっていないか、文字が入っているか確認する.
-                ##########################################################
-                # 問題文のルビ<>が全角であることを確認する.
-                if self.is_ruby_full_width_prefix(word) or self.is_ruby_full_width_suffix(word):
-                    r_err = True
-                if self.is_ruby_prefix(word):
-                    # 入れ子判定: '<'の後に、'>'ではなく、'<'が来たとき
-                    if r_inflag:
-                        r_nest_err = True
-                    r_inflag = True
-                if self.is_ruby_suffix(word):
-                    # 入れ子判定: '<'の前に、'>'が来たとき
-                    if not r_inflag:
-                        r_nest_err = True
-                    else:
-                        # 文字数違反
-                        if r_word_cnt == 0:
-                            r_cnt_err = True
-                    r_inflag = False
-                    r_word_cnt = 0
-                if r_inflag and (not self.is_ruby_prefix(word)):
-                    r_word_cnt += 1
-                ##########################################################
-                # 問題文の問題枠が入れ子になっていないか、文字が入っていないか確認する.
-                ##########################################################
-                if self.is_problem_prefix(word):
-                    # 入れ子判定: '['の後に、']'ではなく、'['が来たとき
-                    if p_inflag:
-                        p_nest_err = True
-                    p_inflag = True
-                if self.is_problem_suffix(word):
-                    # 入れ子判定: '['の前に、']'が来たとき
-                    if not p_inflag:
-                        p_nest_err = True
-                    else:
-                        # 文字数違反
-                        if p_word_cnt == 0:
-                            p_cnt_err = True
-                        else:
-                            p_cnt_err = False
-                        p_frame_cnt += 1
-                    p_inflag = False
-                    p_word_cnt = 0
-                if p_inflag and (not self.is_problem_prefix(word)):
-                    p_word_cnt += 1
-
-            if r_cnt_err:
+    @DebugPrint.trace('check_kanji_syntax', rows=lambda self, worksheet, *args: len(worksheet))
+    def __check_kanji_syntax(self, worksheet, fmt_err_msg):
+        for sentence, ans, num in zip(worksheet[self.kProblem], worksheet[self.kAnswer], worksheet.index):
+            # 問題文を分解したときの検査結果を使う.
+            stmt = tokenize_problem_statement(sentence)
+
+            if stmt.ruby_empty:
                 msg = str(num + 1) + '行目の問題文のルビが空欄です.'
                 fmt_err_msg.append(self.print_error(msg))
 
-            if r_err:
+            if stmt.ruby_full_width:
                 msg = str(num + 1) + '行目の問題文のルビの記号が全角です.'
                 fmt_err_msg.append(self.print_error(msg))
 
-            if r_nest_err and not r_err:
+            if stmt.ruby_nest and not stmt.ruby_full_width:
                 msg = str(num + 1) + '行目の問題文のルビの指定が入れ子になっています.'
                 fmt_err_msg.append(self.print_error(msg))
 
-            if p_nest_err:
+            if stmt.frame_nest:
                 msg = str(num + 1) + '行目の問題文の問題枠の指定が入れ子になっています.'
                 fmt_err_msg.append(self.print_error(msg))
 
-            if p_cnt_err:
+            if stmt.frame_empty:
                 msg = str(num + 1) + '行目の問題文の問題枠が空欄です.'
                 fmt_err_msg.append(self.print_error(msg))
 
-            if len(ans) != p_frame_cnt and not p_nest_err and not p_cnt_err:
+            if len(ans) != stmt.frame_num and not stmt.frame_nest and not stmt.frame_empty:
                 msg = str(num + 1) + '行目の問題文の問題枠と答えの文字数が一致しません.'
                 fmt_err_msg.append(self.print_error(msg))
 
@@ -512,8 +1008,16 @@ class KanjiWorkSheet:
             self.worksheet.loc[pd_idx, self.kResult] = self.kNotMk
             self.save_worksheet()
 
+    # 最終更新日を日時に変換する.
     def __replace_err_last_update(self):
-        print(type(self.worksheet[self.kLastUpdate]))
+        """最終更新日を日時に変換する."""
+        # 出題のたびに文字列から変換しないように、読み込み時に一度だけ変換しておく.
+        self.worksheet[self.kLastUpdateTime] = self.to_last_update_time(self.worksheet[self.kLastUpdate])
+
+        # 記入があるのに日時として解釈できないものは、未出題と同じ扱いになるため通知する.
+        err = self.worksheet[self.worksheet[self.kLastUpdate].notna() & self.worksheet[self.kLastUpdateTime].isna()]
+        for idx in err.index.values[0:5]:
+            self.print_error(str(idx + 1) + '行目の最終更新日を日時として解釈できません.')
 
     # 履歴がNanの場合は、''に置き換える。
     def __replace_nan_char_with_space(self):
@@ -553,23 +1057,147 @@ class KanjiWorkSheet:
                 # 学年毎に習う漢字数を表示する.
                 self.print_info('小学' + str(grade) + '年生: 全 ' + str(len(self.kanji_by_grade_list[grade])) + ' 文字')
 
-    def is_ruby_prefix(self, word):
-        return word == u'<'
-
-    def is_ruby_full_width_prefix(self, word):
-        return word == u'＜'
-
-    def is_ruby_full_width_suffix(self, word):
-        return word == u'＞'
-
-    def is_ruby_suffix(self, word):
-        return word == u'>'
-
-    def is_problem_prefix(self, word):
-        return word == u'['
-
-    def is_problem_suffix(self, word):
-        return word == u']'
+    # 学年と結果ごとの問題数を数える。
+    # Count the number of problems by grade and result.
+    def __count_report(self):
+        grade_num = self.kGradeRange[1] - self.kGradeRange[0] + 1
+        key_num = len(self.report_key_list)
+        if self.kGrade not in self.worksheet.columns or self.kResult not in self.worksheet.columns:
+            return np.zeros((grade_num, key_num), dtype=int)
+
+        # 学年と結果を番号にして、1回で数える。
+        # Convert grades and results into numbers and count them at once.
+        grade = pd.to_numeric(self.worksheet[self.kGrade], errors='coerce').to_numpy() - self.kGradeRange[0]
+        result = pd.Categorical(self.worksheet[self.kResult], categories=self.report_key_list).codes
+        valid = (grade >= 0) & (grade < grade_num) & (result >= 0)
+        code = grade[valid].astype(int) * key_num + result[valid]
+        return np.bincount(code, minlength=grade_num * key_num).reshape(grade_num, key_num)
+
+    # 学年と結果ごとの問題数を作成する。
+    # Create the number of problems by grade and result.
+    def __create_report_count(self):
+        self.report_count = self.__count_report()
+        self.clear_report_count_diff()
+
+    # 学年と結果ごとの問題数から、指定した学年と結果の問題数を取り出す。
+    # Extract the number of problems for the specified grades and result.
+    def __get_report_count(self, count, grade, status):
+        rows = [g - self.kGradeRange[0] for g in grade]
+        if status is None:
+            return int(count[rows].sum())
+        return int(count[rows, self.report_key_list.index(status)].sum())
+
+    # 再出題する問題の優先度索引を作成する.
+    def __create_due_index(self):
+        self.due_index = {}
+        self.due_index_row = {}
+        if self.kNextDue not in self.worksheet.columns:
+            return
+
+        table = self.worksheet[self.worksheet[self.kNextDue].notna()]
+        for result in self.interval_table.keys():
+            rows = table[table[self.kResult] == result]
+            due_arr = rows[self.kNextDue].values.astype('datetime64[ns]').astype(np.int64)
+            idx_arr = rows.index.values
+            # 次に出題する日時が同じ場合は、問題集の順にする。
+            order = np.lexsort((idx_arr, due_arr))
+            self.due_index[result] = (due_arr[order], idx_arr[order])
+            self.due_index_row.update(zip(idx_arr.tolist(), [(result, due) for due in due_arr.tolist()]))
+
+    # 再出題する問題の優先度索引を、変更した問題だけ更新する.
+    def __update_due_index(self, idx_list):
+        """
+        変更した問題を結果ごとにまとめて、1回の削除と1回の挿入で索引を更新する.
+        1問ずつ配列を作り直すと、変更した問題数 × 問題集の大きさに比例した時間がかかるため.
+        """
+        idx_list = list(dict.fromkeys(idx_list))
+
+        # 変更前の登録の位置を、結果ごとに集める.
+        delete_dict = {}
+        for idx in idx_list:
+            entry = self.due_index_row.pop(idx, None)
+            if entry is None:
+                continue
+            (result, due) = entry
+            (due_arr, idx_arr) = self.due_index[result]
+            low = np.searchsorted(due_arr, due, side='left')
+            high = np.searchsorted(due_arr, due, side='right')
+            delete_dict.setdefault(result, []).append(low + np.flatnonzero(idx_arr[low:high] == idx)[0])
+
+        # 変更後の結果と次に出題する日時を、結果ごとに(次に出題する日時, インデックス)の順に並べる.
+        rows = self.worksheet.loc[idx_list, [self.kResult, self.kNextDue]]
+        rows = rows[rows[self.kNextDue].notna() & rows[self.kResult].isin(list(self.due_index.keys()))]
+        due_list = rows[self.kNextDue].values.astype('datetime64[ns]').astype(np.int64)
+        insert_dict = {}
+        for result in set(rows[self.kResult]):
+            flg = (rows[self.kResult] == result).values
+            (new_due, new_idx) = (due_list[flg], rows.index.values[flg])
+            order = np.lexsort((new_idx, new_due))
+            insert_dict[result] = (new_due[order], new_idx[order])
+            self.due_index_row.update(zip(new_idx.tolist(), [(result, due) for due in new_due.tolist()]))
+
+        for result in set(delete_dict) | set(insert_dict):
+            (due_arr, idx_arr) = self.due_index[result]
+            # 変更前の登録をまとめて削除する.
+            if result in delete_dict:
+                pos = delete_dict[result]
+                (due_arr, idx_arr) = (np.delete(due_arr, pos), np.delete(idx_arr, pos))
+            # 変更後の登録を、(次に出題する日時, インデックス)の順を保つ位置にまとめて挿入する.
+            if result in insert_dict:
+                (new_due, new_idx) = insert_dict[result]
+                pos = np.searchsorted(due_arr, new_due, side='left')
+                high = np.searchsorted(due_arr, new_due, side='right')
+                # 次に出題する日時が同じ問題がある場合は、インデックスの順にする.
+                for i in np.flatnonzero(high > pos):
+                    pos[i] += np.searchsorted(idx_arr[pos[i]:high[i]], new_idx[i])
+                (due_arr, idx_arr) = (np.insert(due_arr, pos, new_due), np.insert(idx_arr, pos, new_idx))
+            self.due_index[result] = (due_arr, idx_arr)
+
+    # 答えの漢字の索引を作成する.
+    def __create_answer_index(self):
+        """答えの漢字の索引を作成する."""
+        self.answer_index = [{} for _ in range(self.kGradeRange[1] + 1)]
+        self.answer_index_row = {}
+        self.update_answer_index(self.worksheet.index)
+
+    # 習熟度表のキャッシュのキーとして、問題集の学年/答え/結果のハッシュ値を求める.
+    def __get_mastery_hash(self):
+        """習熟度表のキャッシュのキーとして、問題集の学年/答え/結果のハッシュ値を求める."""
+        if len(self.worksheet) == 0:
+            return None
+        columns = self.worksheet[[self.kGrade, self.kAnswer, self.kResult]]
+        row_hash = pd.util.hash_pandas_object(columns, index=True).values
+        return hashlib.blake2b(row_hash.tobytes(), digest_size=16).hexdigest()
+
+    # 全学年の漢字の習熟度表を作成する.
+    def __create_mastery_table(self):
+        """全学年の漢字の習熟度表を作成する."""
+        # 答えを1文字ずつに分解し、(漢字, 学年, 結果)の列にする.
+        table = pd.DataFrame({
+            'kanji': [list(ans) if isinstance(ans, str) else [] for ans in self.worksheet[self.kAnswer]],
+            self.kGrade: self.worksheet[self.kGrade].values,
+            self.kResult: self.worksheet[self.kResult].values,
+        }).explode('kanji')
+        table = table[table['kanji'].notna()]
+
+        # 漢字はその漢字が最初に出てくる学年で習うものとし、その学年の問題だけで判断する.
+        grade = table.groupby('kanji')[self.kGrade].transform('min')
+        table = table[table[self.kGrade] == grade]
+
+        # 1つでも正解していれば正解と判断する.
+        # その漢字ではなく、熟語が分からず間違っている可能性があるため.
+        table = table.assign(
+            correct=table[self.kResult] == self.kCrctMk,
+            asked=table[self.kResult] != self.kNotMk
+        )
+        group = table.groupby('kanji', sort=False)
+        mastery = group.agg(grade=(self.kGrade, 'min'), correct=('correct', 'any'), asked=('asked', 'any'))
+
+        status = np.where(mastery['correct'], self.kCrctMk, np.where(mastery['asked'], self.kIncrctMk, self.kNotMk))
+        return pd.DataFrame(
+            {self.kGrade: mastery['grade'].values, self.kResult: status},
+            index=pd.Index(mastery.index, name=self.kAnswer)
+        )
 
     # 受け取った文字が漢字か否かを確認し、その結果を返す。
     # Check if the received character is a kanji or not, and return the result.
@@ -0,0 +1,151 @@
+# KanjiWorkSheetLoader.py
+# Copyright (c) 2023 Masaya Yamamoto
+# Released under the MIT license.
+# see https://opensource.org/licenses/MIT (英語)
+# see https://licenses.opensource.jp/MIT/MIT.html (日本語)
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from Subject import Subject
+from DebugPrint import DebugPrint
+
+
+class LazyKanjiWorkSheet:
+    def __init__(self, factory):
+        """
+        :param factory: 問題集を作成する関数 / Function that creates the problem set
+        :type factory: function
+
+        問題集を最初に使うときに作成する。
+        問題集はpandasとNumPyをimportするため、起動時に作成するとウィンドウが表示されるまで時間がかかる。
+        最初に生徒を選択して問題集を読み込むまで作成を遅らせ、以降は作成した問題集に属性の参照を委ねる。
+        Create the problem set when it is first used.
+        The problem set imports pandas and NumPy, so creating it at startup delays showing the window.
+        Delay creating it until a student is first selected and the problem set is loaded,
+        and from then on delegate attribute lookups to the created problem set.
+        """
+        self.__factory = factory
+        self.__instance = None
+        self.__lock = threading.Lock()
+
+    # 問題集を取得する(初回は作成する)。
+    # Get the problem set (created on the first call).
+    def get_instance(self):
+        with self.__lock:
+            if self.__instance is None:
+                self.__instance = self.__factory()
+        return self.__instance
+
+    # 作成済みか否かを取得する。
+    # Get whether the problem set has been created.
+    def is_created(self):
+        return self.__instance is not None
+
+    def __getattr__(self, name):
+        return getattr(self.get_instance(), name)
+
+    # 代入も作成した問題集に委ねる(この代理クラス自身の属性を除く)。
+    # Delegate assignments to the created problem set too (except the attributes of this proxy itself).
+    def __setattr__(self, name, value):
+        if name.startswith('_LazyKanjiWorkSheet__'):
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self.get_instance(), name, value)
+
+
+class KanjiWorkSheetLoader(Subject):
+    def __init__(self, root, kanji_worksheet, interval=50):
+        Subject.__init__(self)
+        self.DebugPrint = DebugPrint()  # デバッグ表示クラス / Debug display class
+
+        # 結果を受け取るウィジェット / Widget that receives the results
+        self.root = root
+        # 読み込み先の問題集 / Problem set to load into
+        self.KanjiWorkSheet = kanji_worksheet
+        # 結果を確認する間隔[ms] / Interval for checking the results [ms]
+        self.kInterval = interval
+
+        # 同じ問題集に同時に読み込まないように、1つのスレッドで順番に読み込む。
+        # Load one at a time on a single thread so that the same problem set is never loaded concurrently.
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        # 最後に要求した読み込み / The most recently requested load
+        self.future = None
+        self.on_done = None
+
+        # 最後に読み込んだ結果 / Result of the last load
+        # (opn_err, opn_err_msg, fmt_err, fmt_err_msg)
+        self.load_result = None
+
+    # 問題集をバックグラウンドで読み込む。
+    # Load a problem set in the background.
+    def load(self, path, on_done=None):
+        """
+        :param path: 問題集のパス / Path of the problem set
+        :type path: string
+        :param on_done: 読み込みが終わったときに結果を受け取る関数 / Function that receives the result when loading ends
+        :type on_done: function
+
+        問題集をバックグラウンドで読み込み、読み込みのFutureを返す。
+        新しく読み込む場合は、まだ始まっていない前の読み込みを取り消し、実行中の読み込みの結果は捨てる。
+        読み込みを開始したとき(kNotify_load_start)と、最後に要求した読み込みが終わったとき
+        (KNotify_load_successful または kNotify_load_failed)にオブザーバーに通知する。
+        on_done(opn_err, opn_err_msg, fmt_err, fmt_err_msg)は通知の後にTkのスレッドで呼び出す。
+        Load a problem set in the background and return the Future of the load.
+        A new load cancels the previous load if it has not started yet, and discards the result of a running one.
+        Observers are notified when a load starts (kNotify_load_start) and when the most recently requested
+        load ends (KNotify_load_successful or kNotify_load_failed).
+        on_done(opn_err, opn_err_msg, fmt_err, fmt_err_msg) is called on the Tk thread after the notification.
+        """
+        self.DebugPrint.print_info('Call: KanjiWorkSheetLoader.load(' + path + ')')
+        if self.future is not None:
+            self.future.cancel()
+
+        # 最初の読み込みでは問題集の作成(pandasとNumPyのimport)に時間がかかるため、
+        # 属性の参照も含めて読み込み用のスレッドで行い、Tkのスレッドを止めない。
+        # The first load takes time to create the problem set (importing pandas and NumPy),
+        # so do everything including the attribute lookup on the loading thread and never block the Tk thread.
+        self.future = self.executor.submit(self.__load_worksheet, path)
+        self.on_done = on_done
+        self.notify(self.kNotify_load_start)
+        self.root.after(self.kInterval, self.__poll, self.future)
+
+        return self.future
+
+    # 問題集を読み込む(読み込み用のスレッドで実行する)。
+    # Load the problem set (runs on the loading thread).
+    def __load_worksheet(self, path):
+        kanji_worksheet = self.KanjiWorkSheet
+        if isinstance(kanji_worksheet, LazyKanjiWorkSheet):
+            kanji_worksheet = kanji_worksheet.get_instance()
+        return kanji_worksheet.load_worksheet(path)
+
+    # 読み込み中か否かを取得する。
+    # Get whether a load is in progress.
+    def is_loading(self):
+        return self.future is not None and not self.future.done()
+
+    def __poll(self, future):
+        # 新しい読み込みを要求された場合は、古い読み込みの結果を通知しない。
+        # If a new load was requested, do not notify the result of the old one.
+        if future is not self.future:
+            return
+        if not future.done():
+            self.root.after(self.kInterval, self.__poll, future)
+            return
+
+        try:
+            self.load_result = future.result()
+        except Exception as e:
+            msg = self.DebugPrint.print_error('問題集を読み込めませんでした. ' + type(e).__name__ + ': ' + str(e))
+            # 失敗するまでの経過を調べられるように、直近のログを書き出す。
+            # Write out the recent log so that the steps leading to the failure can be investigated.
+            self.DebugPrint.dump_log()
+            self.load_result = (True, [msg], False, [])
+
+        (opn_err, opn_err_msg, fmt_err, fmt_err_msg) = self.load_result
+        if not opn_err and not fmt_err:
+            self.notify(self.KNotify_load_successful)
+        else:
+            self.notify(self.kNotify_load_failed)
+
+        if self.on_done is not None:
+            self.on_done(opn_err, opn_err_msg, fmt_err, fmt_err_msg)
@@ -0,0 +1,313 @@
+# KanjiWorkSheet_batch.py
+# Copyright (c) 2023 Masaya Yamamoto
+# Released under the MIT license.
+# see https://opensource.org/licenses/MIT (英語)
+# see https://licenses.opensource.jp/MIT/MIT.html (日本語)
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from DebugPrint import DebugPrint
+from KanjiWorkSheet_prob import KanjiWorkSheet_prob
+from KanjiWorkSheet_draw import create_canvas
+from UserSettings import UserSettings
+from CreateFilePath import create_path_of_kanji_worksheet, create_path_of_log
+
+
+# ワーカープロセスを初期化する。
+# Initialize a worker process.
+def init_worker():
+    # fork で起動したワーカーは親プロセスの乱数の状態を引き継ぐため、
+    # 全員が同じ順番で出題されないように乱数を初期化し直す。
+    # Workers started by fork inherit the random state of the parent process,
+    # so reseed it to prevent every student from getting the same order.
+    np.random.seed()
+
+
+# 設定ファイルの全生徒の出題設定を、問題集のパスごとにまとめる。
+# Group the question settings of all students in the setting file by problem set path.
+def create_student_job_dict(user_settings):
+    """
+    :param user_settings: ユーザ設定クラス / User settings class
+    :type user_settings: UserSettings
+
+    設定ファイルの全生徒の出題設定を、問題集のパスごとにまとめる。
+    Group the question settings of all students in the setting file by problem set path.
+    """
+    job_dict = {}
+    for order, name in enumerate(user_settings.get_student_name_list()):
+        mode = int(user_settings.get_mode(name))
+        job = {
+            'order': order,
+            'name': name,
+            'grade': user_settings.get_grade_list(name),
+            'mode': mode,
+            'number': int(user_settings.get_number_of_problem(name)),
+            'pdf_path': create_path_of_kanji_worksheet(name, user_settings.kModeKeyList[mode]),
+            'log_path': create_path_of_log(name, mode),
+        }
+        path = user_settings.get_path_of_problem(name)
+        if path in job_dict:
+            job_dict[path].append(job)
+        else:
+            job_dict[path] = [job]
+
+    return job_dict
+
+
+# 1つの問題集を1度だけ読み込み、その問題集を使う生徒全員の漢字プリントを作成する。
+# Load one problem set only once and create kanji worksheets for every student who uses it.
+def create_kanji_worksheet_batch(path, job_list, force=False, debug=False, strategy=None, page=None):
+    """
+    :param path: 問題集のパス / Path to the problem set
+    :type path: string
+    :param job_list: 生徒の出題設定 / Question settings of the students
+    :type job_list: list
+    :param force: 採点が残っていても作成する / Create even if scoring is not finished
+    :type force: bool
+    :param debug: デバッグ情報を表示する / Display debug information
+    :type debug: bool
+    :param strategy: 問題の選び方 / How to select problems
+    :type strategy: int
+    :param page: 冊子のキャンバス(Noneの場合は生徒ごとにPDFを保存する)
+                 Canvas of the booklet (saves a PDF for each student if None)
+    :type page: reportlab.pdfgen.canvas.Canvas
+
+    1つの問題集を1度だけ読み込み、その問題集を使う生徒全員の漢字プリントを作成する。
+    Load one problem set only once and create kanji worksheets for every student who uses it.
+    """
+    summary = []
+
+    start = time.perf_counter()
+    prob = KanjiWorkSheet_prob(debug=debug)
+    if strategy is not None:
+        prob.set_selection_strategy(strategy)
+    (opn_err, opn_err_msg, fmt_err, fmt_err_msg) = prob.load_worksheet(path)
+    load_time = time.perf_counter() - start
+
+    # 問題集を読み込めなかった場合は、その問題集を使う生徒全員をエラーにする。
+    # If the problem set could not be loaded, mark every student who uses it as an error.
+    if opn_err or fmt_err:
+        msg = (opn_err_msg + fmt_err_msg)[0]
+        for job in job_list:
+            summary.append(create_summary(job, path, load_time, msg=msg))
+        return summary
+
+    # 漢字プリントの作成で問題文が書き換わるため、読み込んだ直後の問題集を保持しておく。
+    # Creating a worksheet rewrites problem statements, so keep the problem set as loaded.
+    worksheet = prob.worksheet.copy()
+
+    for job in job_list:
+        timing = {'select': 0.0, 'log': 0.0, 'pdf': 0.0}
+
+        # 学年を選択していないとき
+        # When no grade is selected.
+        if len(job['grade']) == 0:
+            summary.append(create_summary(job, path, load_time, timing, '学年を選択していません.'))
+            continue
+        # 採点が残っているとき
+        # When scoring is not finished.
+        if os.path.exists(job['log_path']) and not force:
+            summary.append(create_summary(job, path, load_time, timing, '採点が終わっていません.'))
+            continue
+
+        # 生徒ごとに問題集を読み込んだ直後の状態に戻す。
+        # Restore the problem set to its loaded state for each student.
+        prob.worksheet = worksheet.copy()
+        prob.update_next_due()
+        prob.kanji_worksheet_idx = []
+        prob.set_student_name(job['name'])
+        prob.set_number_of_problem(job['number'])
+        prob.set_grade(job['grade'])
+        prob.set_mode(job['mode'])
+
+        # 1人の失敗で、同じ問題集を使う他の生徒の作成を止めないようにする。
+        # Do not let one failure stop the other students who use the same problem set.
+        log_created = False
+        try:
+            start = time.perf_counter()
+            (err, err_msg) = prob.create_kanji_worksheet()
+            timing['select'] = time.perf_counter() - start
+            if err:
+                summary.append(create_summary(job, path, load_time, timing, err_msg[0]))
+                continue
+
+            start = time.perf_counter()
+            if os.path.exists(job['log_path']):
+                prob.delete_kanji_worksheet_logfile(job['log_path'])
+            log_created = True
+            prob.create_kanji_worksheet_logfile(job['log_path'])
+            timing['log'] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            prob.create_pdf_kanji_worksheet(job['pdf_path'], page)
+            timing['pdf'] = time.perf_counter() - start
+        except Exception as e:
+            # 漢字プリントを作成できなかった場合は、採点待ちにならないように出題記録を削除する。
+            # If the worksheet could not be created, delete the log so that it is not left waiting for scoring.
+            if log_created:
+                prob.delete_kanji_worksheet_logfile(job['log_path'])
+            summary.append(create_summary(job, path, load_time, timing, type(e).__name__ + ': ' + str(e)))
+            # 失敗するまでの経過を調べられるように、直近のログを書き出す。
+            # Write out the recent log so that the steps leading to the failure can be investigated.
+            DebugPrint.dump_log(title='(' + job['name'] + ')')
+            continue
+
+        summary.append(create_summary(job, path, load_time, timing, num=prob.get_number_of_problem()))
+
+    return summary
+
+
+# ワーカープロセスで漢字プリントを作成し、記録した区間も返す。
+# Create kanji worksheets in a worker process and also return the recorded spans.
+def create_kanji_worksheet_batch_with_trace(*args):
+    # ワーカープロセスは使い回されるため、前の問題集の区間を消しておく。
+    # Worker processes are reused, so clear the spans of the previous problem set.
+    DebugPrint.clear_span()
+    summary = create_kanji_worksheet_batch(*args)
+    return summary, DebugPrint.get_span_list()
+
+
+# 全生徒の漢字プリントを1つのPDFの冊子にする。
+# Create one PDF booklet with the kanji worksheets of all students.
+def create_kanji_worksheet_booklet(path, job_dict, force=False, debug=False, strategy=None):
+    """
+    :param path: 冊子の保存先 / Destination for the booklet
+    :type path: string
+    :param job_dict: 問題集のパスごとの生徒の出題設定 / Question settings of the students by problem set path
+    :type job_dict: dict
+    :param force: 採点が残っていても作成する / Create even if scoring is not finished
+    :type force: bool
+    :param debug: デバッグ情報を表示する / Display debug information
+    :type debug: bool
+    :param strategy: 問題の選び方 / How to select problems
+    :type strategy: int
+
+    全生徒の漢字プリントを1つのPDFの冊子にする。
+    1つのキャンバスに生徒ごとにページを追加するため、フォントは冊子全体で1度だけ埋め込まれる。
+    Create one PDF booklet with the kanji worksheets of all students.
+    A page is added to one canvas for each student, so the font is embedded only once for the whole booklet.
+
+    ページは描き終わるたびに閉じて圧縮し、問題集は1つずつ読み込んで捨てるため、
+    生徒数が増えてもメモリは圧縮したページの分しか増えない。
+    ページの順番は、問題集ごとに設定ファイルの生徒の順になる。
+    Each page is closed and compressed as soon as it is drawn,
+    and the problem sets are loaded and discarded one at a time,
+    so memory only grows by the compressed pages however many students there are.
+    The pages are in the order of the students in the setting file, grouped by problem set.
+    """
+    page = create_canvas(path)
+
+    # 問題集を最初に使う生徒の順に処理する。
+    # Process the problem sets in the order of the first student who uses them.
+    summary = []
+    for problem_path, job_list in sorted(job_dict.items(), key=lambda item: item[1][0]['order']):
+        summary += create_kanji_worksheet_batch(problem_path, job_list, force, debug, strategy, page)
+
+    # 1ページもない冊子は保存しない。
+    # Do not save a booklet without pages.
+    if any(row['ok'] for row in summary):
+        page.save()
+
+    return summary
+
+
+# 生徒1人分の作成結果をまとめる。
+# Summarize the result for one student.
+def create_summary(job, path, load_time, timing=None, msg='', num=0):
+    if timing is None:
+        timing = {'select': 0.0, 'log': 0.0, 'pdf': 0.0}
+    return {
+        'order': job['order'],
+        'name': job['name'],
+        'path': path,
+        'ok': len(msg) == 0,
+        'number': num,
+        'load': load_time,
+        'select': timing['select'],
+        'log': timing['log'],
+        'pdf': timing['pdf'],
+        'msg': msg,
+    }
+
+
+# 生徒ごとの処理時間の一覧を表示する。
+# Display the per-student timing summary.
+def print_summary(summary, elapsed):
+    print('{:<20} {:>4} {:>4} {:>8} {:>8} {:>8} {:>8}  {}'.format(
+        'Name', 'Stat', 'Num', 'Load[s]', 'Sel[s]', 'Log[s]', 'PDF[s]', 'Message'))
+    for row in sorted(summary, key=lambda x: x['order']):
+        print('{:<20} {:>4} {:>4} {:>8.3f} {:>8.3f} {:>8.3f} {:>8.3f}  {}'.format(
+            row['name'], 'OK' if row['ok'] else 'NG', row['number'],
+            row['load'], row['select'], row['log'], row['pdf'], row['msg']))
+
+    ok_num = len([row for row in summary if row['ok']])
+    print('Total: ' + str(ok_num) + '/' + str(len(summary)) + ' students, ' + '{:.3f}'.format(elapsed) + ' s')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='設定ファイルの全生徒の漢字プリントを作成する.')
+    parser.add_argument('--setting', default=UserSettings().path_of_setting_file, help='設定ファイルのパス')
+    parser.add_argument('--workers', type=int, default=None, help='ワーカープロセス数(既定: CPU数)')
+    parser.add_argument('--force', action='store_true', help='採点が残っていても作成する')
+    parser.add_argument('--debug', action='store_true', help='デバッグ情報を表示する')
+    parser.add_argument('--conflict-graph', action='store_true',
+                        help='答えの漢字の種類が多くなるように問題を選ぶ')
+    parser.add_argument('--booklet', default=None, help='全生徒の漢字プリントを1つのPDFにまとめる(保存先のパス)')
+    parser.add_argument('--trace', default=None, help='処理の時系列をChromeのトレース形式で保存する(保存先のパス)')
+    args = parser.parse_args(argv)
+
+    # 設定ファイルを読み込む。
+    # Load the setting file.
+    user_settings = UserSettings()
+    if not os.path.exists(args.setting):
+        print('設定ファイル(' + args.setting + ')が存在しません.', file=sys.stderr)
+        return 1
+    user_settings.path_of_setting_file = args.setting
+    user_settings.load_setting_file()
+
+    job_dict = create_student_job_dict(user_settings)
+    strategy = KanjiWorkSheet_prob(debug=False).kSelectConflictGraph if args.conflict_graph else None
+
+    # 問題集ごとにワーカープロセスへ割り当てる。
+    # Assign each problem set to a worker process.
+    summary = []
+    start = time.perf_counter()
+    # 冊子は1つのキャンバスに描くため、1つのプロセスで作成する。
+    # A booklet is drawn on one canvas, so create it in a single process.
+    if args.booklet is not None:
+        summary = create_kanji_worksheet_booklet(args.booklet, job_dict, args.force, args.debug, strategy)
+        print_summary(summary, time.perf_counter() - start)
+        if args.trace is not None:
+            DebugPrint.export_trace(args.trace)
+        return 0 if all(row['ok'] for row in summary) else 1
+
+    # 区間はワーカープロセスごとに記録されるため、作成結果と一緒に受け取ってまとめる。
+    # Spans are recorded in each worker process, so receive them with the results and merge them.
+    span_list = []
+    batch = create_kanji_worksheet_batch if args.trace is None else create_kanji_worksheet_batch_with_trace
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker) as executor:
+        futures = [
+            executor.submit(batch, path, job_list, args.force, args.debug, strategy)
+            for path, job_list in job_dict.items()
+        ]
+        for future in as_completed(futures):
+            if args.trace is None:
+                summary += future.result()
+            else:
+                (result, spans) = future.result()
+                summary += result
+                span_list += spans
+    elapsed = time.perf_counter() - start
+
+    print_summary(summary, elapsed)
+    if args.trace is not None:
+        DebugPrint.export_trace(args.trace, span_list)
+
+    return 0 if all(row['ok'] for row in summary) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,21 +4,255 @@
 # see https://opensource.org/licenses/MIT (英語)
 # see https://licenses.opensource.jp/MIT/MIT.html (日本語)
 import math
+from functools import lru_cache
 
 from reportlab.pdfgen import canvas
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.lib.pagesizes import A4, landscape
+from KanjiWorkSheet_font import FontRegistry
+from KanjiWorkSheet_token import kTokenKanji, kTokenRuby, kTokenFrame, tokenize_problem_statement
+
+
+# 表示リストの命令
+# 位置は問題文の印字を開始する位置からの相対位置とし、描くときに印字位置を足す.
+kOpGlyph = 0   # 文字 (kOpGlyph, フォントサイズ, x, y, 文字)
+kOpVGlyph = 1  # 用紙を-90度回転して印字する文字 (kOpVGlyph, フォントサイズ, x, y, 文字)
+kOpStroke = 2  # 線の設定 (kOpStroke, 色, 幅, 破線)
+kOpLine = 3    # 線 (kOpLine, x1, y1, x2, y2)
+kOpRect = 4    # 枠 (kOpRect, x, y, 幅, 高さ)
+
+# 文字の種類
+kPunctuation = u'。、'  # 句読点
+kContractedSound = u'ゃゅょっャュョッ'  # 拗音
+kFrameContractedSound = u'ゃゅょっ'  # 問題枠の拗音
+kSpace = u' 　'  # スペース
+kRotate = u'ー「」'  # 用紙を回転して印字する文字(長音符、かぎ括弧)
+
+# 直前の漢字の文字数ごとの、ルビの開始位置(問題文のフォントサイズに対する倍率)
+kRubyKanjiPos = {1: 1.0, 2: 1.5, 3: 2.0}
+kRubyKanjiPosOther = 2.5
+# ルビの文字数ごとの、(ルビの描写開始オフセット, ルビの間隔)(問題文のフォントサイズに対する倍率)
+kRubyOffset = {1: (1 / 4, 1 / 4), 2: (1 / 2, 1 / 2), 3: (3 / 6, 1 / 3)}
+kRubyOffsetOther = (3 / 4, 1 / 3)
+# 直前の漢字の文字数ごとの、ルビのオフセットの倍率
+kRubyKanjiScale = {1: 1.0, 2: 1.3, 3: 1.6}
+kRubyKanjiScaleOther = 1.0
+
+# 問題枠のフリガナの文字数ごとの、(間隔の倍率, 開始位置の倍率)
+kFrameBias = {1: (1, 2), 2: (2, 1), 3: (1.5, 0.5), 4: (1, 0.5)}
+kFrameBiasOther = (1, 0.1)
+# 空欄の問題枠が続いたときの、フリガナの文字数ごとの開始位置の倍率
+kFrameShift = {1: 0.5, 2: 0.75, 3: 0.75, 4: 0.75, 5: 0.90}
+kFrameShiftOther = 1.0
+
+
+# 文の表示リストを作成する.
+def layout_string(display_list, x_pos, y_pos, font_size, str_arr):
+    """文の表示リストを作成する."""
+    for word in str_arr:
+        # 句読点の場合
+        if word in kPunctuation:
+            display_list.append((kOpGlyph, font_size, x_pos + (font_size / 3) * 2, y_pos + font_size / 1.5, word))
+            y_pos = y_pos - font_size
+        # 拗音の場合
+        elif word in kContractedSound:
+            # 拗音のサイズを指定する.
+            display_list.append((kOpGlyph, font_size * 0.8, x_pos + (font_size / 3), y_pos + font_size / 3, word))
+            y_pos = y_pos - font_size * 0.8
+        # スペースの場合は、印字せずに位置だけ進める.
+        elif word in kSpace:
+            y_pos = y_pos - font_size / 3
+        # 長音符の場合
+        elif word in kRotate:
+            display_list.append((kOpVGlyph, font_size, x_pos, y_pos, word))
+            y_pos = y_pos - font_size
+        else:
+            display_list.append((kOpGlyph, font_size, x_pos, y_pos, word))
+            y_pos = y_pos - font_size
+
+    return y_pos
+
+
+# ルビの表示リストを作成する.
+def layout_ruby(display_list, x_pos, y_pos, kanji, string, prob_font_size):
+    """漢字プリントの出題の漢字にルビを振る表示リストを作成する."""
+    # 直前の漢字の右隣にルビを振るため, 1文字分だけ移動する.
+    x_pos = x_pos + prob_font_size
+    # 直前の漢字にルビを振るため, 文字分だけ移動する.
+    y_pos = y_pos + prob_font_size * kRubyKanjiPos.get(len(kanji), kRubyKanjiPosOther)
+
+    # ルビの文字サイズを問題文の 1/3 にする.
+    font_size = prob_font_size / 3
+
+    # ルビの文字数と漢字の文字数によって, 縦軸の描写位置を変更する.
+    (y_start_offset, y_pos_offset) = kRubyOffset.get(len(string), kRubyOffsetOther)
+    scale = kRubyKanjiScale.get(len(kanji), kRubyKanjiScaleOther)
+    y_start_offset = prob_font_size * y_start_offset * scale
+    y_pos_offset = prob_font_size * y_pos_offset * scale
+
+    # ルビを記述する.
+    for word in string:
+        layout_string(display_list, x_pos, y_pos + y_start_offset, font_size, word)
+        y_pos -= y_pos_offset
 
 
-# 文字が漢字であるか否かを評価する.
-def is_kanji(char):
-    return '\u4e00' <= char <= '\u9faf'
+# 問題枠の表示リストを作成する.
+def layout_frame(display_list, x_pos, y_pos, size, frame_num, string, prob_font_size, frame_font_size):
+    """漢字プリントの問題文の枠の表示リストを作成する."""
+    rect_width = size
+    rect_height = size
+
+    y_pos -= (size + prob_font_size) / 1.8
+
+    # 枠内を点線で十字の線を記述する.
+    display_list.append((kOpStroke, 'silver', 0.8, (2,)))
+    display_list.append((kOpLine, x_pos + (rect_width / 2), y_pos, x_pos + (rect_width / 2), y_pos + rect_height))  # 縦
+    display_list.append((kOpLine, x_pos, y_pos + (rect_height / 2), x_pos + rect_width, y_pos + (rect_height / 2)))  # 横
+
+    # 枠
+    display_list.append((kOpStroke, 'gray', 1, ()))
+    display_list.append((kOpRect, x_pos, y_pos, rect_width, rect_height))
+
+    # フリガナの文字数によって、間隔を空ける.
+    (y_bias, start_pos_bias) = kFrameBias.get(len(string), kFrameBiasOther)
+    y_bias = y_bias * (frame_num + 1)
+
+    # 空欄の問題枠が続いた場合は、その分だけ開始位置をずらす.
+    if frame_num > 0:
+        if len(string) in kFrameShift:
+            y_pos = y_pos + (rect_height * frame_num) * kFrameShift[len(string)]
+        else:
+            y_pos = y_pos + rect_height * kFrameShiftOther
+
+    x_space = 2  # 枠にピッタリ付かないように少し間を空ける.
+    next_print_pos = 0
+    for word in string:
+        if word in kFrameContractedSound:
+            # 拗音(contracted sound)のオフセット
+            cs_x_offset = frame_font_size / 10 * 3
+            cs_y_offset = 5
+            font_size = frame_font_size / 10 * 8
+        else:
+            cs_x_offset = 0
+            cs_y_offset = 0
+            font_size = frame_font_size
+
+        # 問題枠の右端に位置を調整する.
+        std_x_pos = x_pos + rect_width
+        std_y_pos = y_pos + rect_height * (1 + 0.05) - frame_font_size
+
+        y_start_offset = font_size * start_pos_bias
+
+        display_list.append((
+            kOpGlyph, font_size,
+            std_x_pos + cs_x_offset + x_space,
+            std_y_pos - next_print_pos - y_start_offset,
+            word
+        ))
+        next_print_pos += font_size * y_bias + cs_y_offset
+
+
+# 問題文の表示リストを作成する.
+@lru_cache(maxsize=1 << 14)
+def layout_problem_statement(problem, prob_font_size, frame_font_size, rect_size):
+    """
+    問題文の表示リストを作成する.
+
+    問題文を文字と枠の命令に分解し、印字を開始する位置からの相対位置を決める.
+    同じ問題文とフォントサイズの組み合わせは、2回目以降キャッシュした結果を返す.
+    表示リストと、問題文の印字に使った縦の長さを返す.
+    """
+    kFrameSttInit  = 0
+    kFrameSttEnd   = 2  # 問題枠の終了
+    frame_stt = kFrameSttInit
+
+    display_list = []
+    fflg = 0
+    kanji = ""
+    y_pos = 0
+    frame_num = 0
+
+    # 読み込み時に分解したトークンを使う.
+    for kind, text in tokenize_problem_statement(problem).token:
+        # 問題枠を印字する。
+        if kind == kTokenFrame:
+            # 問題枠を印字した直後の場合は位置を調整する。
+            if frame_stt == kFrameSttEnd:
+                y_pos = y_pos - rect_size
+            # 問題枠が初回の場合
+            if fflg == 0:
+                y_pos = y_pos - rect_size / 10 * 0.5
+                fflg = 1
+            if len(text) <= 0:
+                layout_frame(display_list, -rect_size / 3, y_pos, rect_size, 0, text,
+                             prob_font_size, frame_font_size)
+                frame_num += 1
+            else:
+                layout_frame(display_list, -rect_size / 3, y_pos, rect_size, frame_num, text,
+                             prob_font_size, frame_font_size)
+                frame_num = 0
+            frame_stt = kFrameSttEnd
+        # ルビを印字する。
+        elif kind == kTokenRuby:
+            layout_ruby(display_list, 0, y_pos, kanji, text, prob_font_size)
+            kanji = ""
+        # 問題文を印字する。
+        else:
+            # 問題枠を印字した直後の場合は位置を調整する。
+            if frame_stt == kFrameSttEnd:
+                y_pos = y_pos - prob_font_size - rect_size / 10 * 8
+                frame_stt = kFrameSttInit
+            y_pos = layout_string(display_list, 0, y_pos, prob_font_size, text)
+
+            # ルビを振る漢字を覚えておく.
+            if kind == kTokenKanji:
+                kanji = kanji + text
+            else:
+                kanji = ""
+
+    return tuple(display_list), -y_pos
+
+
+# 表示リストをキャンバスに描く.
+def emit_display_list(page, font, display_list, x_pos, y_pos):
+    """表示リストを指定した位置を基準にキャンバスに描く."""
+    font_size = None
+    for op in display_list:
+        kind = op[0]
+        if kind == kOpGlyph or kind == kOpVGlyph:
+            # フォントサイズが変わるときだけ設定し直す.
+            if op[1] != font_size:
+                font_size = op[1]
+                page.setFont(font, font_size)
+            if kind == kOpGlyph:
+                page.drawString(x_pos + op[2], y_pos + op[3], op[4])
+            else:
+                # 用紙を-90度回転し、長音符を印字する.
+                page.rotate(-90)
+                page.drawString(-1 * (y_pos + op[3]) - font_size + font_size / 8, x_pos + op[2] + font_size / 8, op[4])
+                # 用紙を90度回転し、基に戻す.
+                page.rotate(90)
+        elif kind == kOpStroke:
+            page.setStrokeColor(op[1])
+            page.setLineWidth(op[2])
+            page.setDash(list(op[3]))
+        elif kind == kOpLine:
+            page.line(x_pos + op[1], y_pos + op[2], x_pos + op[3], y_pos + op[4])
+        elif kind == kOpRect:
+            page.rect(x_pos + op[1], y_pos + op[2], op[3], op[4], fill=False)
+
+
+# 漢字プリントのキャンバスを作成する.
+def create_canvas(path):
+    """漢字プリントのキャンバスを作成する."""
+    # 冊子では全ページをメモリに保持するため、ページごとに圧縮する.
+    return canvas.Canvas(path, pagesize=landscape(A4), pageCompression=1)  # PDF設定
 
 
 class KanjiWorkSheet_draw:
-    def __init__(self, path, name, grade, date, num, problem, problem_idx):
-        self.page = canvas.Canvas(path, pagesize=landscape(A4))  # PDF設定
+    def __init__(self, path, name, grade, date, num, problem, problem_idx, page=None):
+        # 冊子を作成する場合は、渡されたキャンバスにページを追加する.
+        self.booklet = page is not None
+        self.page = page if self.booklet else create_canvas(path)
 
         self.student_name = name  # 生徒名
         self.grade = grade  # 学年
@@ -27,10 +261,8 @@ class KanjiWorkSheet_draw:
         self.kanji_problem = problem  # 問題文
         self.kanji_problem_idx = problem_idx  # 問題文の要素番号
 
-        # フォント選択
-        self.kFontPath = r'C:\Windows\Fonts\msmincho.ttc'
-        self.kFont = 'msmincho'
-        pdfmetrics.registerFont(TTFont(self.kFont, self.kFontPath))  # フォント選択
+        # フォント選択(プロセスで初回だけフォントを探して登録する)
+        self.kFont = FontRegistry().get_font()
 
         # PDF設定値
         self.kProbFontSize  = 17  # 問題文のフォントサイズ
@@ -61,6 +293,20 @@ class KanjiWorkSheet_draw:
 
     def create_pdf_kanji_worksheet(self):
         """漢字プリントを作成する."""
+        if self.booklet:
+            # 冊子の場合は、途中で失敗しても次の生徒が同じページに重ねて描かれないように、必ずページを閉じる.
+            try:
+                self.draw_page()
+            finally:
+                self.page.showPage()
+        else:
+            self.draw_page()
+            # PDFを保存する.
+            self.page.save()
+
+    # 1人分のページを描く.
+    def draw_page(self):
+        """1人分のページを描く."""
         # 出題数を上下に分割し、出題する。
         # 分割した時、10未満であれば、記載の間隔を10にする。
         # 問題数が10以下の場合、10問にした方が見栄えが良いため.
@@ -101,19 +347,33 @@ class KanjiWorkSheet_draw:
                 , i - self.kProbTopNum
             )
 
-        # 漢字プリントのタイトルを記述する.
-        self.draw_problem_statement_title(775, 525, 30)
+        # 生徒によらず同じ内容は、レイアウトごとに1度だけフォームに記述して参照する.
+        self.draw_static_form()
+        # 日付を記述する.
+        self.draw_date(770, 300, 15)
         # 名前を記述する.
-        self.draw_name(770, 300, 15)
         self.draw_student_name(777.5, 240, 25)
-        # 問を記述する.
-        self.draw_problem(720, 550, 12)
-        # 漢字プリントの出題番号を記述する.
-        self.draw_problem_number()
-        # 漢字プリントの中央に線を記述する.
-        self.draw_center_line()
-        # PDFを保存する.
-        self.page.save()
+
+    # 生徒によらず同じ内容を記述したフォームを描く.
+    def draw_static_form(self):
+        """生徒によらず同じ内容を記述したフォームを描く."""
+        # 出題番号の数と位置は上下の問題数で決まるため、上下の問題数ごとにフォームを作る.
+        # フォームはPDFに1度だけ記録され、冊子では同じレイアウトのページから参照される.
+        name = 'KanjiWorkSheet_' + str(self.kProbTopNum) + '_' + str(self.kProbBtmNum)
+        if not self.page.hasForm(name):
+            self.page.beginForm(name)
+            # 漢字プリントのタイトルを記述する.
+            self.draw_problem_statement_title(775, 525, 30)
+            # 名前欄を記述する.
+            self.draw_name(770, 300, 15)
+            # 問を記述する.
+            self.draw_problem(720, 550, 12)
+            # 漢字プリントの出題番号を記述する.
+            self.draw_problem_number()
+            # 漢字プリントの中央に線を記述する.
+            self.draw_center_line()
+            self.page.endForm()
+        self.page.doForm(name)
 
     # 漢字プリントのタイトルを記述する.
     def draw_problem_statement_title(self, x_pos, y_pos, font_size):
@@ -146,6 +406,14 @@ class KanjiWorkSheet_draw:
         self.page.setDash([])
         self.page.rect(x_pos - 10, y_pos - 245, 60, 40, fill=False)
 
+        self.page.drawString(x_pos + 15, y_pos - 240, u'/')
+
+    # 日付を記述する.
+    def draw_date(self, x_pos, y_pos, font_size):
+        """日付を記述する."""
+        self.page.setFont(self.kFont, font_size)
+        self.page.setFillColorRGB(0, 0, 0)
+
         # 日付：月
         x_pos_tmp = x_pos + 4
         for month in str(self.create_date.month)[::-1]:
@@ -158,8 +426,6 @@ class KanjiWorkSheet_draw:
             self.page.drawString(x_pos_tmp, y_pos - 240, day)  # 日
             x_pos_tmp -= 7
 
-        self.page.drawString(x_pos + 15, y_pos - 240, u'/')
-
     # 生徒の名前を記述する.
     def draw_student_name(self, x_pos, y_pos, font_size):
         """生徒の名前を記述する."""
@@ -195,247 +461,19 @@ class KanjiWorkSheet_draw:
         self.page.line(50, 300, 700, 300)
 
     # 問題文を記述する.
-    def draw_problem_statement(self, y_pos_const, problem, idx, chk=False):
+    def draw_problem_statement(self, y_pos_const, problem, idx):
         """問題文を記述する."""
-        kFrameSttInit  = 0
-        kFrameSttStart = 1  # 問題枠の開始
-        kFrameSttEnd   = 2  # 問題枠の終了
-        frame_stt = kFrameSttInit
-
-        kRubySttEnd   = 0
-        kRubySttStart = 1
-        ruby_stt = kRubySttEnd
-
-        fflg = 0
-        arr = []
-        kanji = ""
-        y_pos = y_pos_const
-        frame_num = 0
-
-        count = 0
-        for word in problem:
-            # 問題枠を印字する。
-            if frame_stt == kFrameSttStart:
-                # []の内容を格納し終えた。
-                if word == u']':
-                    # 問題枠が初回の場合
-                    if fflg == 0:
-                        y_pos = y_pos - self.rect_size / 10 * 0.5
-                        fflg = 1
-                    if not chk:
-                        if len(arr) <= 0:
-                            self.draw_frame(self.problem_text_frame[idx] - self.rect_size / 3, y_pos, self.rect_size, 0, arr)
-                            frame_num += 1
-                        else:
-                            self.draw_frame(self.problem_text_frame[idx] - self.rect_size / 3, y_pos, self.rect_size, frame_num,
-                                            arr)
-                            frame_num = 0
-                    frame_stt = kFrameSttEnd
-                    arr = []
-                else:
-                    arr.append(word)  # 問題の文字列をarrに格納する。
-            # ルビを印字する。
-            elif ruby_stt == kRubySttStart:
-                # <>の内容を格納し終えた。
-                if word == u'>':
-                    if not chk:
-                        self.draw_ruby(self.problem_text_frame[idx], y_pos, kanji, arr)
-                    ruby_stt = kRubySttEnd
-                    arr = []
-                    kanji = ""
-                else:
-                    arr.append(word)  # ルビの文字列をarrに格納する。
-            # 問題枠の開始
-            elif word == u'[':
-                # 問題枠を印字した直後の場合は位置を調整する。
-                if frame_stt == kFrameSttEnd:
-                    y_pos = y_pos - self.rect_size
-                frame_stt = kFrameSttStart  # 問題枠の開始
-            # ルビの開始
-            elif word == u'<':
-                ruby_stt = kRubySttStart  # ルビの開始
-            # 問題文を印字する。
-            else:
-                # 問題枠、ルビの開始、終了でない場合
-                font_size = self.kProbFontSize
-                # 問題枠を印字した直後の場合は位置を調整する。
-                if frame_stt == kFrameSttEnd:
-                    y_pos = y_pos - font_size - self.rect_size / 10 * 8
-                    frame_stt = kFrameSttInit
-                if not chk:
-                    y_pos = self.draw_string(self.problem_text_frame[idx], y_pos, font_size, word)
-
-                if is_kanji(word):
-                    kanji = kanji + word
-                else:
-                    kanji = ""
+        # 同じ問題文は2回目以降、配置済みの表示リストを使う.
+        (display_list, height) = layout_problem_statement(
+            problem, self.kProbFontSize, self.kProbFrameSize, self.rect_size)
+        emit_display_list(self.page, self.kFont, display_list, self.problem_text_frame[idx], y_pos_const)
 
-            count += 1
-
-        return y_pos_const - y_pos
+        return height
 
     def draw_string(self, x_pos, y_pos, font_size, str_arr):
         """文を書く"""
-        self.page.setFont(self.kFont, font_size)
-        for word in str_arr:
-            # 句読点の場合
-            if word == u'。' or word == u'、':
-                self.page.drawString(x_pos + (font_size / 3) * 2, y_pos + font_size / 1.5, word)
-                y_pos = y_pos - font_size
-            # 拗音の場合
-            elif word == u'ゃ' or word == u'ゅ' or word == u'ょ' or word == u'っ' \
-              or word == u'ャ' or word == u'ュ' or word == u'ョ' or word == u'ッ':
-                # 拗音のサイズを指定する.
-                #self.page.setFont(self.kFont, font_size / 10 * 8)
-                self.page.setFont(self.kFont, font_size * 0.8)
-                self.page.drawString(x_pos + (font_size / 3), y_pos + font_size / 3, word)
-                # 文字のサイズを元に戻す.
-                self.page.setFont(self.kFont, font_size)
-                #y_pos = y_pos - font_size / 10 * 8
-                y_pos = y_pos - font_size * 0.8
-            # スペースの場合
-            elif word == u' ' or word == u'　':
-                self.page.drawString(x_pos, y_pos, word)
-                y_pos = y_pos - font_size / 3
-            # 長音符の場合
-            elif word == u'ー' or word == u'「' or word == u'」':
-                # 用紙を-90度回転し、長音符を印字する.
-                self.page.rotate(-90)
-                self.page.drawString(-1 * y_pos - font_size + font_size / 8, x_pos + font_size / 8, word)
-                # 用紙を90度回転し、基に戻す.
-                self.page.rotate(90)
-                y_pos = y_pos - font_size
-            else:
-                self.page.drawString(x_pos, y_pos, word)
-                y_pos = y_pos - font_size
-
-        return y_pos
-
-    def draw_ruby(self, x_pos, y_pos, kanji, string=u''):
-        """漢字プリントの出題の漢字にルビを書く."""
-        # 直前の漢字の右隣にルビを振るため, 1文字分だけ移動する.
-        x_pos = x_pos + self.kProbFontSize
-
-        # 直前の漢字にルビを振るため, 文字分だけ移動する.
-        if len(kanji) == 1:
-            y_pos = y_pos + self.kProbFontSize
-        elif len(kanji) == 2:
-            y_pos = y_pos + self.kProbFontSize * 1.5
-        elif len(kanji) == 3:
-            y_pos = y_pos + self.kProbFontSize * 2.0
-        else:
-            y_pos = y_pos + self.kProbFontSize * 2.5
+        display_list = []
+        y_pos_end = layout_string(display_list, 0, 0, font_size, str_arr)
+        emit_display_list(self.page, self.kFont, display_list, x_pos, y_pos)
 
-        # ルビの文字サイズを問題文の 1/3 にする.
-        font_size = self.kProbFontSize / 3
-        self.page.setFont(self.kFont, font_size)
-
-        # ルビの文字数によって, 縦軸の描写位置を変更する.
-        if len(string) == 1:
-            y_start_offset = self.kProbFontSize / 4  # ルビ描写開始オフセット(文字数によって開始位置をずらす)
-            y_pos_offset = self.kProbFontSize / 4  # ルビが 1文字 のとき
-        elif len(string) == 2:
-            y_start_offset = self.kProbFontSize / 2  # ルビ描写開始オフセット(文字数によって開始位置をずらす)
-            y_pos_offset = self.kProbFontSize / 2  # ルビが 2文字 のとき
-        elif len(string) == 3:
-            y_start_offset = self.kProbFontSize / 6 * 3  # ルビ描写開始オフセット(文字数によって開始位置をずらす)
-            y_pos_offset = self.kProbFontSize / 3  # ルビが 3文字 のとき
-        else:
-            y_start_offset = self.kProbFontSize / 4 * 3  # ルビ描写開始オフセット(文字数によって開始位置をずらす)
-            y_pos_offset = self.kProbFontSize / 3  # ルビが 4文字 以外のとき
-
-        if len(kanji) == 1:
-            y_start_offset = y_start_offset
-            y_pos_offset = y_pos_offset
-        elif len(kanji) == 2:
-            y_start_offset = y_start_offset * 1.3
-            y_pos_offset = y_pos_offset * 1.3
-        elif len(kanji) == 3:
-            y_start_offset = y_start_offset * 1.6
-            y_pos_offset = y_pos_offset * 1.6
-
-        # ルビを記述する.
-        for word in string:
-            self.draw_string(x_pos, y_pos + y_start_offset, font_size, word)
-            y_pos -= y_pos_offset
-
-    # 漢字プリントの問題文の枠を書く.
-    def draw_frame(self, x_pos, y_pos, size, frame_num=0, string=u''):
-        """漢字プリントの問題文の枠を書く."""
-        rect_width = size
-        rect_height = size
-
-        y_pos -= (size + self.kProbFontSize) / 1.8
-
-        # 枠内を点線で十字の線を記述する.
-        self.page.setLineWidth(0.8)
-        self.page.setStrokeColor('silver')
-        self.page.setDash([2])
-        self.page.line(x_pos + (rect_width / 2), y_pos, x_pos + (rect_width / 2), y_pos + rect_height)  # 縦
-        self.page.line(x_pos, y_pos + (rect_height / 2), x_pos + rect_width, y_pos + (rect_height / 2))  # 横
-
-        # 枠
-        self.page.setStrokeColor('gray')
-        #self.page.setStrokeColor('black')
-        self.page.setLineWidth(1)
-        self.page.setDash([])
-        self.page.rect(x_pos, y_pos, rect_width, rect_height, fill=False)
-
-        # フリガナの文字数によって、間隔を空ける.
-        if len(string) == 1:  # 文字数が1の場合
-            y_bias = 1 * (frame_num + 1)
-            start_pos_bias = 2
-        elif len(string) == 2:  # 文字数が2の場合
-            y_bias = 2 * (frame_num + 1)
-            start_pos_bias = 1
-        elif len(string) == 3:  # 文字数が3の場合
-            y_bias = 1.5 * (frame_num + 1)
-            start_pos_bias = 0.5
-        elif len(string) == 4:  # 文字数が4の場合
-            y_bias = 1 * (frame_num + 1)
-            start_pos_bias = 0.5
-        else:
-            y_bias = 1 * (frame_num + 1)
-            start_pos_bias = 0.1
-
-        if frame_num > 0:
-            if len(string) == 1:  # 文字数が1の場合
-                y_pos = y_pos + (rect_height * frame_num) * 0.5
-            elif len(string) == 2:  # 文字数が2の場合
-                y_pos = y_pos + (rect_height * frame_num) * 0.75
-            elif len(string) == 3:  # 文字数が3の場合
-                y_pos = y_pos + (rect_height * frame_num) * 0.75
-            elif len(string) == 4:  # 文字数が4の場合
-                y_pos = y_pos + (rect_height * frame_num) * 0.75
-            elif len(string) == 5:  # 文字数が4の場合
-                y_pos = y_pos + (rect_height * frame_num) * 0.90
-            else:
-                y_pos = y_pos + rect_height
-
-        x_space = 2  # 枠にピッタリ付かないように少し間を空ける.
-        next_print_pos = 0
-        for word in string:
-            if word == u'ゃ' or word == u'ゅ' or word == u'ょ' or word == u'っ':
-                # 拗音(contracted sound)のオフセット
-                cs_x_offset = self.kProbFrameSize / 10 * 3
-                cs_y_offset = 5
-                font_size = self.kProbFrameSize / 10 * 8
-                self.page.setFont(self.kFont, font_size)
-            else:
-                cs_x_offset = 0
-                cs_y_offset = 0
-                font_size = self.kProbFrameSize
-                self.page.setFont(self.kFont, font_size)
-
-            # 問題枠の右端に位置を調整する.
-            std_x_pos = x_pos + rect_width
-            std_y_pos = y_pos + rect_height * (1 + 0.05) - self.kProbFrameSize
-
-            y_start_offset = font_size * start_pos_bias
-
-            self.page.drawString(
-                std_x_pos + cs_x_offset + x_space
-                , std_y_pos - next_print_pos - y_start_offset
-                , word
-            )
-            next_print_pos += font_size * y_bias + cs_y_offset
+        return y_pos + y_pos_end
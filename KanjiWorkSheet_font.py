@@ -0,0 +1,242 @@
+# KanjiWorkSheet_font.py
+# Copyright (c) 2023 Masaya Yamamoto
+# Released under the MIT license.
+# see https://opensource.org/licenses/MIT (英語)
+# see https://licenses.opensource.jp/MIT/MIT.html (日本語)
+import os
+import sys
+import json
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont, TTFError
+
+
+class FontRegistry:
+    _instance = None
+    _initialized = False
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super(FontRegistry, cls).__new__(cls, *args, **kwargs)
+        return cls._instance
+
+    def __init__(self):
+        # 2回目以降は初期化しない。
+        # Don't initialize after the second time.
+        if FontRegistry._initialized:
+            return
+        FontRegistry._initialized = True
+
+        # フォントのパスを指定する環境変数 / Environment variable that specifies the font path
+        self.kFontEnv = 'KANJIWORKSHEET_FONT'
+        # フォントの検索結果を保存するファイルのパス / Path of the file that stores the font lookup result
+        self.path_of_font_cache_file = r'./.font'
+        # キャッシュの形式の版数 / Version of the cache format
+        self.kFontCacheVersion = 1
+
+        # 候補のフォント(先頭ほど優先する) / Candidate fonts (earlier ones have priority)
+        # (フォント名, ファイル名) / (Font name, file name)
+        self.kFontCandidateList = [
+            ('msmincho', 'msmincho.ttc'),                # Windows
+            ('IPAexMincho', 'ipaexm.ttf'),               # Linux (fonts-ipaexfont-mincho)
+            ('IPAMincho', 'ipam.ttf'),                   # Linux (fonts-ipafont-mincho)
+            ('NotoSerifJP', 'NotoSerifJP-Regular.ttf'),  # Noto (TrueType)
+            ('IPAexGothic', 'ipaexg.ttf'),               # Linux (fonts-ipaexfont-gothic)
+            ('IPAGothic', 'ipag.ttf'),                   # Linux (fonts-ipafont-gothic)
+            ('NotoSansJP', 'NotoSansJP-Regular.ttf'),    # Noto (TrueType)
+        ]
+
+        # 設定したフォントのパス / Path of the configured font
+        self.font_path = os.environ.get(self.kFontEnv, '')
+        # 登録したフォント名 / Registered font name
+        self.font_name = None
+
+    # フォントを探すディレクトリのリストを取得する。
+    # Get the list of directories to search for fonts.
+    def get_font_dir_list(self):
+        """
+        フォントを探すディレクトリのリストを取得する。
+        Get the list of directories to search for fonts.
+        """
+        home = os.path.expanduser('~')
+        if sys.platform.startswith('win'):
+            return [
+                os.path.join(os.environ.get('WINDIR', r'C:\Windows'), 'Fonts'),
+                os.path.join(os.environ.get('LOCALAPPDATA', home), 'Microsoft', 'Windows', 'Fonts'),
+            ]
+        elif sys.platform == 'darwin':
+            return [
+                os.path.join(home, 'Library', 'Fonts'),
+                '/Library/Fonts',
+                '/System/Library/Fonts',
+            ]
+        else:
+            return [
+                os.path.join(home, '.local', 'share', 'fonts'),
+                os.path.join(home, '.fonts'),
+                '/usr/local/share/fonts',
+                '/usr/share/fonts',
+            ]
+
+    # フォントのパスを設定する。
+    # Set the font path.
+    def set_font_path(self, path):
+        """
+        :param path: フォントファイルのパス / Path of the font file
+        :type path: string
+
+        フォントのパスを設定する。
+        設定したフォントは、見つかった候補のフォントより優先する。
+        Set the font path.
+        The configured font has priority over the candidate fonts that are found.
+        """
+        self.font_path = path
+
+    # 問題集で使うフォント名を取得する。
+    # Get the font name used for the kanji worksheet.
+    def get_font(self):
+        """
+        問題集で使うフォント名を取得する。
+        初回の呼び出しでフォントを探して登録し、2回目以降は登録済みのフォント名を返す。
+        Get the font name used for the kanji worksheet.
+        The font is looked up and registered on the first call,
+        and the registered font name is returned from the second call on.
+        """
+        if self.font_name is not None:
+            return self.font_name
+
+        # 前回の検索結果が使える場合は、ディレクトリを探さない。
+        # If the previous lookup result is usable, do not search the directories.
+        cache = self.load_font_cache_file()
+        if cache is not None and self.register_font(cache['name'], cache['path']):
+            return self.font_name
+
+        for name, path in self.find_font():
+            if self.register_font(name, path):
+                self.save_font_cache_file(name, path)
+                return self.font_name
+
+        raise FileNotFoundError(
+            '日本語のフォントが見つかりませんでした. 環境変数 ' + self.kFontEnv + ' にフォントのパスを設定してください.')
+
+    # フォントを登録する。
+    # Register a font.
+    def register_font(self, name, path):
+        """
+        :param name: フォント名 / Font name
+        :type name: string
+        :param path: フォントファイルのパス / Path of the font file
+        :type path: string
+
+        フォントを登録する。登録できた場合はTrueを返す。
+        TrueTypeのアウトラインを持たないフォントは読み込めないため、Falseを返して次の候補を試す。
+        Register a font. Returns True if it was registered.
+        Fonts without TrueType outlines cannot be loaded, so return False to try the next candidate.
+        """
+        try:
+            pdfmetrics.registerFont(TTFont(name, path))
+        except (TTFError, OSError):
+            return False
+        self.font_name = name
+        return True
+
+    # 設定したフォントと、候補のフォントのうち存在するものを優先順に取得する。
+    # Get the configured font and the candidate fonts that exist, in order of priority.
+    def find_font(self):
+        """
+        設定したフォントと、候補のフォントのうち存在するものを優先順に取得する。
+        Get the configured font and the candidate fonts that exist, in order of priority.
+
+        (フォント名, パス)のリストを返す。
+        Returns a list of (font name, path).
+        """
+        font_list = []
+        if len(self.font_path) > 0 and os.path.isfile(self.font_path):
+            font_list.append((self.get_font_name(self.font_path), self.font_path))
+
+        # 候補のファイル名を1度のディレクトリの走査で探す。
+        # Search for the candidate file names with a single walk of the directories.
+        candidate_dict = {file.lower(): name for name, file in self.kFontCandidateList}
+        found_dict = {}
+        for font_dir in self.get_font_dir_list():
+            for root, _, files in os.walk(font_dir):
+                for file in files:
+                    key = file.lower()
+                    if key in candidate_dict and key not in found_dict:
+                        found_dict[key] = os.path.join(root, file)
+
+        for name, file in self.kFontCandidateList:
+            if file.lower() in found_dict:
+                font_list.append((name, found_dict[file.lower()]))
+
+        return font_list
+
+    # フォントのパスからフォント名を作成する。
+    # Create the font name from the font path.
+    def get_font_name(self, path):
+        """
+        :param path: フォントファイルのパス / Path of the font file
+        :type path: string
+
+        フォントのパスからフォント名を作成する。
+        Create the font name from the font path.
+        """
+        return os.path.splitext(os.path.basename(path))[0]
+
+    # フォントの検索結果を読み込む。
+    # Load the font lookup result.
+    def load_font_cache_file(self):
+        """
+        フォントの検索結果を読み込む。
+        フォントのファイルが変わった場合や、設定したフォントと違う場合は使わない。
+        Load the font lookup result.
+        It is not used if the font file has changed or differs from the configured font.
+        """
+        try:
+            with open(self.path_of_font_cache_file, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if not isinstance(cache, dict) or cache.get('version') != self.kFontCacheVersion:
+            return None
+        # 手で編集したり途中で切れたりしたファイルは、無いものとして扱う。
+        # Treat a hand-edited or truncated file as missing.
+        if not all(isinstance(cache.get(key), str) and len(cache[key]) > 0 for key in ['name', 'path']):
+            return None
+        if len(self.font_path) > 0 and cache.get('path') != self.font_path:
+            return None
+        try:
+            if os.stat(cache['path']).st_mtime_ns != cache.get('mtime_ns'):
+                return None
+        except (OSError, ValueError):
+            return None
+
+        return cache
+
+    # フォントの検索結果を保存する。
+    # Save the font lookup result.
+    def save_font_cache_file(self, name, path):
+        """
+        :param name: フォント名 / Font name
+        :type name: string
+        :param path: フォントファイルのパス / Path of the font file
+        :type path: string
+
+        フォントの検索結果を保存する。
+        保存できない場合でも、次回フォントを探し直すだけのため無視する。
+        Save the font lookup result.
+        Even if it cannot be saved, the font is just looked up again next time, so ignore it.
+        """
+        cache = {
+            'version': self.kFontCacheVersion,
+            'name': name,
+            'path': path,
+            'mtime_ns': os.stat(path).st_mtime_ns,
+        }
+        tmp_path = self.path_of_font_cache_file + '.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(cache, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path_of_font_cache_file)
+        except OSError:
+            pass
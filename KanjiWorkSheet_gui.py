@@ -5,7 +5,6 @@
 # see https://licenses.opensource.jp/MIT/MIT.html (日本語)
 
 import tkinter as tk
-from KanjiWorkSheet_prob import KanjiWorkSheet_prob
 from DebugPrint import DebugPrint
 from UserSettings import UserSettings
 from WidgetRegisterStudent import WidgetRegisterStudent
@@ -18,12 +17,20 @@ from WidgetSelectMode import WidgetSelectMode
 from WidgetScoring import WidgetScoring
 from WidgetReport import WidgetReport
 from CreateFilePath import CreateFilePath
+from KanjiWorkSheetLoader import KanjiWorkSheetLoader, LazyKanjiWorkSheet
+
+
+# 問題集を作成する.
+def create_kanji_worksheet():
+    from KanjiWorkSheet_prob import KanjiWorkSheet_prob
+    return KanjiWorkSheet_prob()
 
 
 class KanjiWorkSheet_gui:
     def __init__(self):
-        self.KanjiWorkSheet = KanjiWorkSheet_prob()
-        self.DebugPrint = DebugPrint(True)
+        # pandasのimportで起動が遅くならないように、問題集は最初に使うときに作成する。
+        self.KanjiWorkSheet = LazyKanjiWorkSheet(create_kanji_worksheet)
+        self.DebugPrint = DebugPrint()
         self.UserSettings = UserSettings()
         self.Root = tk.Tk()
         self.Root.title(u'漢字プリント作成ツール')
@@ -90,10 +97,17 @@ class KanjiWorkSheet_gui:
             self.wg_select_mode
         )
 
+        # 問題集の読み込みサービス
+        self.KanjiWorkSheetLoader = KanjiWorkSheetLoader(self.Root, self.KanjiWorkSheet)
+        self.KanjiWorkSheetLoader.attach(self.wg_create_worksheet)
+        self.KanjiWorkSheetLoader.attach(self.wg_scoring)
+        self.KanjiWorkSheetLoader.attach(self.wg_report)
+
         # 生徒選択用のウィジェット作成
         self.wg_select_student.set_class(
             self.KanjiWorkSheet,
             self.CreateFilePath,
+            self.KanjiWorkSheetLoader
         )
         self.wg_select_student.attach(self.wg_select_work_sheet_path)
         self.wg_select_student.attach(self.wg_create_worksheet)
@@ -106,7 +120,8 @@ class KanjiWorkSheet_gui:
         # 問題集選択用のウィジェット作成
         self.wg_select_work_sheet_path.set_class(
             self.KanjiWorkSheet,
-            self.wg_select_student
+            self.wg_select_student,
+            self.KanjiWorkSheetLoader
         )
         self.wg_select_work_sheet_path.attach(self.wg_create_worksheet)
 
@@ -118,6 +133,8 @@ class KanjiWorkSheet_gui:
             self.wg_select_work_sheet_path
         )
         self.wg_create_worksheet.attach(self.wg_scoring)
+        self.wg_create_worksheet.attach(self.wg_select_student)
+        self.wg_create_worksheet.attach(self.wg_select_work_sheet_path)
 
         # 出題範囲選択用のウィジェット作成
         self.wg_problem_region.set_class(
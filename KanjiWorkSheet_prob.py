@@ -7,96 +7,89 @@ import os
 import datetime as datetime
 import pandas as pd
 import numpy as np
+from DebugPrint import DebugPrint
 from KanjiWorkSheet import KanjiWorkSheet
-from KanjiWorkSheet_draw import KanjiWorkSheet_draw
-
-
-# 答えが重複している漢字のインデックスを除去する。
-# Remove the index of Kanji with duplicate answers.
-def remove_duplicates_index(list_value, exclusion_list):
-    return [value for value in list_value if value not in exclusion_list]
-
-
-# 答えの漢字が重複しているインデックスを作成する。
-# Create an index where the answer Kanji is duplicated.
-def create_duplicate_kanji_index_dict(ans_list):
-    index_map = {}
-    result_dict = {}
-
-    # この要素数はself.kanji_worksheetのインデックスとは違う。
-    # The number of elements is different from the index of self.kanji_worksheet.
-    # 答えのリストと、その要素数を格納する。
-    # Store the list of answers and its number of elements.
-    for i, phrase in enumerate(ans_list):
-        # 答えの熟語を分解する。 / Decompose the compound word of the answer.
-        for char in phrase:
-            if char in index_map:
-                # キーが存在するとき。 / When the key exists.
-                index_map[char].append(i)
-            else:
-                # キーが存在しないとき。 / When the key does not exist.
-                index_map[char] = [i]
-
-    for char, index in index_map.items():
-        # インデックスが複数あるもののみ対象とする。
-        # Only those with multiple indices are targeted.
-        # 複数ない場合は重複していないため。
-        # If there are no multiple, it is not duplicated.
-        if len(index) > 1:
-            result_dict[char] = index
-
-    return result_dict
-
-
-# 答えが重複している漢字の問題を除去する。
-# Remove Kanji problems that have duplicate answers.
-def remove_duplicates_kanji_problem_index(kanji_worksheet_idx, duplicate_dict):
-    # 例 / Example)
-    # 雨 [0, 2, 5, 8]
-    # 右 [1, 3]
-    # 一 [4, 6]
-    # 円 [6, 7]
-
-    # [0]: 0を選んだため、2, 5, 8 は除外 / Selected 0, so exclude 2, 5, 8
-    # [1]: 1を選んだため、3は除外 / Selected 1, so exclude 3
-    # [4]: 4を選んだため、6は除外 / Selected 4, so exclude 6
-    # [7]: 6を除外したため、7を選択 / Excluded 6, so select 7
-
-    # 答えに同じ漢字が内容に重複しているものを取り除く。
-    # Remove those that have the same Kanji in the answer.
-    first_idx = []  # 重複を取り除いた結果 / Result of removeing duplicates
-    exclusion_list = []  # 除外リスト / Exclusion list
-    for list_value in duplicate_dict.values():
-        list_value = set(list_value)
-        list_value = remove_duplicates_index(list_value, exclusion_list)
-
-        # 問題の答えが重複している場合は先頭のインデックスだけ取り除く。
-        if len(list_value) > 0:
-            first_idx.append(list_value[0])
-
-        # 除外リストを更新
-        exclusion_list = exclusion_list + [value for value in list_value]
-
-    # 重複しているリストを一次元にする。
+from KanjiWorkSheet_token import kTokenKanji, kTokenRuby, kTokenText, tokenize_problem_statement, join_problem_statement
+
+
+# 答えの漢字を共有する問題同士を衝突とみなし、衝突しない問題の組(独立集合)を選ぶ。
+# Treat problems that share an answer kanji as conflicting and select a set of non-conflicting problems
+# (an independent set).
+def select_independent_kanji_problem_index(kanji_worksheet_idx, ans_list, num):
+    # 衝突グラフは漢字と問題の対応で表し、使用済みの漢字をビット配列で管理する。
+    # The conflict graph is represented by the kanji-problem incidence,
+    # and the kanji already used are managed with a bit array.
+    kanji_worksheet_idx = np.asarray(kanji_worksheet_idx)
+    ans_list = list(ans_list)
+    num_of_row = len(ans_list)
+
+    # 答えの漢字に番号を振る。 / Number the answer kanji.
+    length = np.array([len(ans) for ans in ans_list], dtype=int)
+    start = np.concatenate([[0], np.cumsum(length)[:-1]]).astype(int)
+    (_, kanji_id) = np.unique(np.array([char for ans in ans_list for char in ans], dtype=str), return_inverse=True)
+    kanji_id = kanji_id.ravel()
+    num_of_kanji = int(kanji_id.max()) + 1 if len(kanji_id) > 0 else 0
+
+    # 指定した順番で、使用済みの漢字と衝突しない問題を選ぶ。
+    # Select problems that do not conflict with the used kanji in the specified order.
+    def select_greedy(order):
+        used_kanji = np.zeros(num_of_kanji, dtype=bool)
+        selected = []
+        for pos in order:
+            if len(selected) >= num:
+                break
+            ids = kanji_id[start[pos]:start[pos] + length[pos]]
+            if not used_kanji[ids].any():
+                used_kanji[ids] = True
+                selected.append(pos)
+        return selected
+
+    # まずは候補の順番(優先順位)のまま選ぶ。
+    # First, select in the order of the candidates (priority).
+    selected = select_greedy(range(num_of_row))
+
+    # 問題数が不足した場合は、他の問題との衝突が少ない問題から選び直す。
+    # If there are not enough problems, select again starting with problems that have fewer conflicts.
+    if len(selected) < min(num, num_of_row):
+        # 衝突の数(次数) = 同じ漢字を答えに持つ他の問題の数
+        # Number of conflicts (degree) = number of other problems that share an answer kanji
+        frequency = np.bincount(kanji_id)
+        degree = np.bincount(np.repeat(np.arange(num_of_row), length),
+                             weights=frequency[kanji_id] - 1, minlength=num_of_row)
+        # 次数が同じ場合は候補の順番を優先する。 / For the same degree, keep the order of the candidates.
+        selected_by_degree = select_greedy(np.argsort(degree, kind='stable'))
+        if len(selected_by_degree) > len(selected):
+            selected = selected_by_degree
+
+    # 選ばなかった問題は、問題数が不足したときの予備として候補の順番のまま返す。
+    # Return the problems not selected in the order of the candidates as a fallback for a shortage.
+    selected_flg = np.zeros(num_of_row, dtype=bool)
+    selected_flg[selected] = True
+    return list(kanji_worksheet_idx[selected]), kanji_worksheet_idx[~selected_flg]
+
+
+# 答えの漢字を共有しない問題から順に、候補の順番でインデックスを1つずつ返す。
+# Yield the indices one by one in candidate order, starting with problems that do not share answer kanji.
+def iter_independent_kanji_problem_index(kanji_worksheet_idx, ans_list):
+    # 候補の順番で、使用済みの漢字と衝突しない問題を選ぶ。
+    # Select problems that do not conflict with the used kanji in the order of the candidates.
+    used_kanji = set()
     duplicate = []
-    for list_value in duplicate_dict.values():
-        for value in list_value:
-            duplicate.append(value)
-
-    # 除外したいものだけ残す。
-    duplicate = remove_duplicates_index(duplicate, first_idx)
-    duplicate = sorted(set(duplicate))
-    duplicate = kanji_worksheet_idx[duplicate]  # 除外したい問題のインデックスを得る。
-
-    # 漢字の問題が被っていない問題のインデックスを取得する。
-    not_duplicate = remove_duplicates_index(kanji_worksheet_idx, duplicate)
+    for idx, ans in zip(kanji_worksheet_idx, ans_list):
+        if used_kanji.isdisjoint(ans):
+            used_kanji.update(ans)
+            yield idx
+        else:
+            duplicate.append(idx)
 
-    return not_duplicate, duplicate
+    # 候補を使い切っても足りない場合は、重複しても良いので候補の順番で返す。
+    # If the candidates run out, yield the duplicates in candidate order.
+    yield from duplicate
 
 
 class KanjiWorkSheet_prob(KanjiWorkSheet):
-    def __init__(self):
-        super(KanjiWorkSheet_prob, self).__init__(debug=True)
+    def __init__(self, debug=None):
+        super(KanjiWorkSheet_prob, self).__init__(debug=debug)
 
         # 漢字プリントの問題を代入するためのデータフレーム
         # DataFrame to assign the problems for the Kanji worksheet
@@ -144,6 +137,11 @@ class KanjiWorkSheet_prob(KanjiWorkSheet):
         # Number of questions (default: 20)
         self.number_of_problem = 20
 
+        self.kSelectDuplicate = 0      # 重複した漢字の問題を除去する / Remove duplicate kanji problems
+        self.kSelectConflictGraph = 1  # 衝突グラフから選ぶ / Select from the conflict graph
+        # 問題の選び方 / How to select problems
+        self.selection_strategy = self.kSelectDuplicate
+
     # 生徒の名前を設定する。
     # Set the student's name.
     def set_student_name(self, name):
@@ -266,8 +264,34 @@ class KanjiWorkSheet_prob(KanjiWorkSheet):
         """
         return self.number_of_problem
 
+    # 問題の選び方を設定する。
+    # Set how to select problems.
+    def set_selection_strategy(self, strategy):
+        """
+        :param strategy: 問題の選び方 / How to select problems
+        :type strategy: int
+
+        問題の選び方を設定する。
+        Set how to select problems.
+
+        self.kSelectDuplicate    : 答えの漢字が重複している問題を除去する / Remove problems with duplicate answer kanji
+        self.kSelectConflictGraph: 答えの漢字の種類が多くなるように選ぶ / Select to maximize distinct answer kanji
+        """
+        self.selection_strategy = strategy
+        self.print_info('問題の選び方を ' + str(self.selection_strategy) + ' に設定しました。')
+
+    # 問題の選び方を取得する。
+    # Get how to select problems.
+    def get_selection_strategy(self):
+        """
+        問題の選び方を取得する。
+        Get how to select problems.
+        """
+        return self.selection_strategy
+
     # 漢字プリントの出題記録を作成する。
     # Create a log file for the Kanji worksheet questions.
+    @DebugPrint.trace('write_log', rows=lambda self, path: len(self.kanji_worksheet))
     def create_kanji_worksheet_logfile(self, path):
         """
         :param path: 出題記録のパス / Path of the question log
@@ -280,7 +304,7 @@ class KanjiWorkSheet_prob(KanjiWorkSheet):
         if len(self.kanji_worksheet) > 0:
             # インデックスは問題集とマージするときに必要になるため、削除しない。
             # Do not delete the index as it is needed when merging with the question set.
-            self.kanji_worksheet.to_csv(path, encoding='shift-jis')
+            self.get_worksheet_to_save(self.kanji_worksheet).to_csv(path, encoding='shift-jis')
             self.print_info('ログファイル(' + path + ')を作成しました。')
             return True
         else:
@@ -289,6 +313,7 @@ class KanjiWorkSheet_prob(KanjiWorkSheet):
 
     # 漢字プリントの出題記録に採点結果を反映する。
     # Reflect the grading results in the Kanji worksheet question record.
+    @DebugPrint.trace('record_log', rows=lambda self, path, result_list: len(result_list))
     def record_kanji_worksheet_logfile(self, path, result_list):
         """
         :param path: 出題記録のパス / Path of the question record
@@ -372,85 +397,71 @@ class KanjiWorkSheet_prob(KanjiWorkSheet):
         return target_kanji_problem_list
 
     # 漢字を読み仮名に置き換える。
+    @DebugPrint.trace('replace_kanji_with_ruby', rows=lambda self: len(self.kanji_worksheet_idx))
     def replace_kanji_with_ruby(self):
         self.print_info('問題文中に答えが存在するため、ひらがなに置き換えました。')
-        kanji_cnt = 0  # 読み仮名に置き換えた直近の漢字の数
-        flg = False    # 読み仮名に置き換える必要がある漢字を見つけた時に立てるフラグ。置き換え後にフラグを落とす。
 
         # 答えを格納
-        answer_kanji_keyword = self.get_answer_kanji_keyword()
+        answer_kanji_keyword = set(self.get_answer_kanji_keyword())
 
         # リストを問題数分だけ初期化する。
         problem_statement_list = ['' for _ in range(self.get_number_of_problem())]
         for i, statement in enumerate(self.worksheet.loc[self.kanji_worksheet_idx, self.kProblem]):
-            for word in statement:
-                # 語が漢字である場合
-                if self.is_kanji(word):
-                    # 問題文の漢字が答えで使っている場合
-                    if word in answer_kanji_keyword:
-                        flg = True
-                    problem_statement_list[i] = problem_statement_list[i] + word
-                    kanji_cnt += 1
-                # ルビの始まり
-                elif self.is_ruby_prefix(word):
-                    if flg:
-                        problem_statement_list[i] = problem_statement_list[i][:-1 * kanji_cnt]
-                    else:
-                        problem_statement_list[i] = problem_statement_list[i] + word
-                    kanji_cnt = 0
-                # ルビの終わり
-                elif self.is_ruby_suffix(word):
-                    if flg:
-                        # 漢字をルビに置き換えた場合はルビのサフィックスは削除する。
-                        flg = False
-                    else:
-                        problem_statement_list[i] = problem_statement_list[i] + word
+            flg = False  # 読み仮名に置き換える必要がある漢字を見つけた時に立てるフラグ。置き換え後にフラグを落とす。
+            token = []
+            for kind, text in tokenize_problem_statement(statement).token:
+                # 問題文の漢字が答えで使っている場合
+                if kind == kTokenKanji and not answer_kanji_keyword.isdisjoint(text):
+                    flg = True
+                # 漢字をルビに置き換える。
+                if kind == kTokenRuby and flg:
+                    if len(token) > 0 and token[-1][0] == kTokenKanji:
+                        token.pop()
+                    token.append((kTokenText, text))
+                    flg = False
                 else:
-                    problem_statement_list[i] = problem_statement_list[i] + word
+                    token.append((kind, text))
+            problem_statement_list[i] = join_problem_statement(token)
 
             # 漢字を平仮名で置き換えた場合は問題文を更新する。
             if statement != problem_statement_list[i]:
-                self.print_info('Before: ' + statement)
-                self.print_info('After : ' + problem_statement_list[i])
+                self.DebugPrint.print_debug('Before: %s', statement)
+                self.DebugPrint.print_debug('After : %s', problem_statement_list[i])
                 idx = self.kanji_worksheet_idx[i]
                 self.worksheet.loc[idx, self.kProblem] = problem_statement_list[i]
 
     # 不要なルビを問題文から削除する.
+    @DebugPrint.trace('remove_unnecessary_ruby', rows=lambda self: len(self.kanji_worksheet_idx))
     def remove_unnecessary_ruby(self):
-        del_flg = False
-        ruby_flg = False
         self.print_info('問題文中に不要なルビがあるため、削除しました.')
+
+        # 選択した学年の最高位は除く。
+        lower_grade_kanji = set()
+        for grade in range(1, max(self.get_grade())):
+            lower_grade_kanji.update(self.get_kanji_by_grade_list(grade))
+
         problem_statement_list = ['' for _ in range(self.get_number_of_problem())]
         for statement, idx, i in zip(self.worksheet.loc[self.kanji_worksheet_idx, self.kProblem],
                                      self.kanji_worksheet_idx,
                                      range(self.get_number_of_problem())):
-            for word in statement:
-                if self.is_kanji(word):
-                    # 選択した学年の最高位は除く。
+            del_flg = False
+            token = []
+            for kind, text in tokenize_problem_statement(statement).token:
+                # ルビを振る漢字の最後の1文字で判定する。
+                if kind == kTokenKanji:
+                    del_flg = text[-1] in lower_grade_kanji
+                    token.append((kind, text))
+                # ルビの文字数分の空白に置き換える。
+                elif kind == kTokenRuby:
+                    token.append((kind, ' ' * len(text) if del_flg else text))
                     del_flg = False
-                    for grade in range(1, max(self.get_grade())):
-                        if word in self.get_kanji_by_grade_list(grade):
-                            del_flg = True
-                    problem_statement_list[i] = problem_statement_list[i] + word
                 else:
-                    if word == '<':
-                        ruby_flg = True
-                        problem_statement_list[i] = problem_statement_list[i] + word
-                    elif word == '>':
-                        ruby_flg = False
-                        del_flg = False
-                        problem_statement_list[i] = problem_statement_list[i] + word
-                    elif ruby_flg:
-                        if not del_flg:
-                            problem_statement_list[i] = problem_statement_list[i] + word
-                        else:
-                            problem_statement_list[i] = problem_statement_list[i] + ' '
-                    else:
-                        problem_statement_list[i] = problem_statement_list[i] + word
+                    token.append((kind, text))
+            problem_statement_list[i] = join_problem_statement(token)
 
             if statement != problem_statement_list[i]:
-                self.print_info('Before: ' + statement)
-                self.print_info('After : ' + problem_statement_list[i])
+                self.DebugPrint.print_debug('Before: %s', statement)
+                self.DebugPrint.print_debug('After : %s', problem_statement_list[i])
                 self.worksheet.loc[idx, self.kProblem] = problem_statement_list[i]
 
     # 条件に該当する問題のインデックスを返す.
@@ -466,114 +477,139 @@ class KanjiWorkSheet_prob(KanjiWorkSheet):
 
         # 最終更新日の昇順で更新する指定がある場合は、ソートを行う.
         if sort:
-            tmp_list = tmp_list.sort_values(self.kLastUpdate, ascending=True)
+            tmp_list = tmp_list.sort_values(self.kLastUpdateTime, ascending=True)
 
         # 期間の指定がある場合は、その期間に該当する問題文のみ抽出する.
+        # 最終更新日は読み込み時に日時に変換済みのため、一括で比較する.
         if days != -1:
-            date_str = tmp_list[self.kLastUpdate]
-            delta = datetime.timedelta(days=days) < (now_time - date_str.apply(pd.to_datetime))
+            delta = datetime.timedelta(days=days) < (now_time - tmp_list[self.kLastUpdateTime])
             tmp_list = tmp_list[delta]
 
         return tmp_list.index.values
 
+    # 出題する日時を過ぎた問題のインデックスを、結果の優先順に返す.
+    # Return the indices of the problems past their due date, in priority order of the results.
+    def get_due_kanji_worksheet_index(self, result_list, num=None):
+        """
+        :param result_list: 対象の結果(先頭ほど優先する) / Target results (earlier ones have priority)
+        :type result_list: list
+        :param num: 取得する数(Noneの場合はすべて) / Number to get (all if None)
+        :type num: int
+
+        出題する日時を過ぎた問題のインデックスを、結果の優先順に返す。
+        同じ結果の中では、次に出題する日時が早い順になる。
+        Return the indices of the problems past their due date, in priority order of the results.
+        Within the same result, the earliest due date comes first.
+        """
+        return self.get_due_index(result_list, self.create_date, num)
+
     # 答えの漢字が重複している最終更新日を作成する。
+    # Create a dictionary of kanji that have not been asked for a long time.
     def create_long_time_no_question_dict(self, ans_list, date_list, days=30):
+        """
+        :param ans_list: 答えのリスト / List of answers
+        :type ans_list: list
+        :param date_list: 最終更新日のリスト / List of last update dates
+        :type date_list: list
+        :param days: 経過日数 / Elapsed days
+        :type days: int
+
+        最後に出題してから指定した日数より長く経過した漢字を辞書にする。
+        Create a dictionary of kanji whose last question is older than the specified number of days.
+
+        辞書のキーは漢字で、値はその漢字を最後に出題した問題の要素番号。
+        The keys are kanji and the values are the positions of the problems where they were last asked.
+        """
         # この要素数はself.kanji_worksheetのインデックスとは違う。
-        # 答えのリストと、その最終更新日を格納する。
-        date_map = {}
-        for i, phrase in enumerate(ans_list):
-            # 答えの熟語を分解する。
-            for char in phrase:
-                # Nanでない場合
-                if isinstance(date_list[i], str) or ~np.isnan(date_list[i]):
-                    idx_date_list = [i, date_list[i]]
-                    if char in date_map:
-                        # キーが存在するとき。
-                        date_map[char].append(idx_date_list)
-                    else:
-                        # キーが存在しないとき。
-                        date_map[char] = [idx_date_list]
-
-        # 各問題の最終更新日の中で、直近のものを選んで辞書に登録する。
-        newest_dates_dict = {}
-        old_kanji_dict = {}
-        for key, idx_date_list in date_map.items():
-            for idx_date_str in idx_date_list:
-                date_str = idx_date_str[1]
-                date_str = date_str.replace('"', '')
-                date_str = date_str.replace("'", '')
-                date_obj = datetime.datetime.strptime(date_str, "%Y-%m-%d %H:%M:%S.%f")
-                if key not in newest_dates_dict or date_obj > newest_dates_dict[key][1]:
-                    newest_dates_dict[key] = [idx_date_str[0], date_obj]
-
-            # 前回出題してから経過した日数から候補を選択
-            for grade in self.grade:
-                if key in self.get_kanji_by_grade_list(grade):
-                    if self.create_date - newest_dates_dict[key][1] > datetime.timedelta(days=days):
-                        old_kanji_dict[key] = newest_dates_dict[key][0]
-                        self.print_info('(' + str(key) + ') ' + '経過時間: '
-                                        + str(self.create_date - newest_dates_dict[key][1]))
+        # The number of elements is different from the index of self.kanji_worksheet.
+        date_list = pd.Series(list(date_list), dtype=object)
+        if len(date_list) > 0 and not isinstance(date_list.iloc[0], (pd.Timestamp, datetime.datetime)):
+            # 文字列の場合は日時に変換する。 / Convert strings into datetime.
+            date_list = self.to_last_update_time(date_list)
+
+        # 答えを1文字ずつに分解し、(漢字, 要素番号, 最終更新日)の列にする。
+        # Explode the answers into columns of (kanji, position, last update date).
+        table = pd.DataFrame({
+            'kanji': [list(phrase) for phrase in ans_list],
+            'row': np.arange(len(date_list)),
+            'time': pd.to_datetime(date_list.values, errors='coerce'),
+        }).explode('kanji')
+        # 出題したことがない問題は対象外とする。 / Exclude problems that have never been asked.
+        table = table[table['kanji'].notna() & table['time'].notna()].reset_index(drop=True)
+
+        # 漢字毎に最終更新日が直近の問題を選ぶ(同じ日時の場合は先の問題を優先する)。
+        # Select the problem with the newest last update date for each kanji (the earlier one wins on ties).
+        newest = table.loc[table.groupby('kanji', sort=False)['time'].idxmax().values]
+
+        # 選択中の学年の漢字で、前回出題してから経過した日数が長いものを候補にする。
+        # Select kanji of the selected grades whose elapsed days since the last question are long.
+        grade_kanji = set()
+        for grade in self.grade:
+            grade_kanji.update(self.get_kanji_by_grade_list(grade))
+        elapsed = self.create_date - newest['time']
+        newest = newest[newest['kanji'].isin(grade_kanji) & (elapsed > datetime.timedelta(days=days))]
+
+        old_kanji_dict = dict(zip(newest['kanji'].tolist(), newest['row'].tolist()))
+        for key, time in zip(newest['kanji'], elapsed[newest.index]):
+            self.DebugPrint.print_debug('(%s) 経過時間: %s', key, time)
 
         self.print_info(('合計：' + str(len(old_kanji_dict))))
 
         return old_kanji_dict
 
-    # 重複した漢字の問題を削除する。
-    # Remove duplicate Kanji problems.
-    def remove_duplicates_kanji_problem(self, num, result, sort=False):
-        # 最終更新日の古い順にソートしたもの候補にする。
-        # Make the ones sorted in order of the oldest last update date a candidate.
-        # 答えが重複している問題を除去することから、指定した問題数を確保するため、全て候補にする。
-        # Since we remove problems that have duplicate answers,
-        # we make all of them candidates to secure the specified number of problems.
+    # 答えの漢字が重複しないように、条件に該当する問題のインデックスを1つずつ返す。
+    # Yield the indices of the problems that match the condition one by one, avoiding duplicate answer kanji.
+    def iter_kanji_problem_without_duplicates(self, num, result, sort=False):
+        """
+        :param num: 必要な問題数 / Number of problems needed
+        :type num: int
+        :param result: 結果 / Result
+        :type result: string
+        :param sort: 最終更新日の古い順にする / Order by the oldest last update date
+        :type sort: bool
+
+        答えの漢字が重複しないように、条件に該当する問題のインデックスを1つずつ返す。
+        答えの漢字を共有しない問題を先に、足りない場合は重複する問題を候補の順番で返す。
+        Yield the indices of the problems that match the condition one by one, avoiding duplicate answer kanji.
+        Problems that do not share answer kanji come first, followed by the duplicates in candidate order.
+        """
         kanji_worksheet_idx = self.get_kanji_worksheet_index(result, sort=sort)
 
-        # 答えに重複がある問題についてはなるべく選択しないようにする。
-        # For problems with duplicate answers, try not to select them as much as possible.
         # 問題集から答えの列を抽出する。
         # Extract the column of answers from the problem set.
-        ans_list = self.kanji_worksheet.loc[kanji_worksheet_idx, self.kAnswer]
-        # 答えの漢字が重複しているインデックスを作成する。
-        # Create an index where the answer Kanji is duplicated.
-        # (漢字をキーにして、値をインデックスにした辞書を作成する。)
-        # (Create a dictionary with Kanji as the key and the index as the value.)
-        duplicate_dict = create_duplicate_kanji_index_dict(ans_list)
-        # 重複した問題のインデックスを削除する。
-        # Remove the index of duplicate problems.
-        (list_not_duplicate, list_duplicate) = remove_duplicates_kanji_problem_index(
-            kanji_worksheet_idx, duplicate_dict)
-
-        # 重複を削除した問題のインデックスを問題集だけ選出し、シャッフルする。
-        # Select only the problem set from the index of the problem with duplicates removed, and shuffle it.
-        kanji_worksheet_idx = list_not_duplicate[0:num]
-        np.random.shuffle(kanji_worksheet_idx)
-
-        # 重複箇所を削ることによって、問題数が減ってしまうので、不足してしまった場合は、重複しても良いので選出する。
-        # If the number of problems decreases due to pruning duplicates,
-        # select even if it is duplicated if it is insufficient.
-        for value in list_duplicate:
-            kanji_worksheet_idx.append(value)
-        # 指定数だけ問題を得られない場合もあるため、それを考慮して出題数を再設定する。
-        # Since there may be cases where the specified number of problems cannot be obtained.
-        # reconsider the number of questions considering that.
-        kanji_worksheet_idx = kanji_worksheet_idx[0:num]
-
-        return kanji_worksheet_idx, len(kanji_worksheet_idx)
+        ans_list = self.kanji_worksheet.loc[kanji_worksheet_idx, self.kAnswer].values
+        if self.selection_strategy == self.kSelectConflictGraph:
+            # 答えの漢字を共有しない問題の組を選ぶ。
+            # Select a set of problems that do not share answer kanji.
+            (list_not_duplicate, list_duplicate) = select_independent_kanji_problem_index(
+                kanji_worksheet_idx, ans_list, num)
+            yield from list_not_duplicate
+            yield from list_duplicate
+        else:
+            # 必要な数が集まった時点で呼び出し元が止めるため、残りの候補は調べない。
+            # The caller stops once enough are collected, so the rest of the candidates are not examined.
+            yield from iter_independent_kanji_problem_index(kanji_worksheet_idx, ans_list)
 
     # 選出した問題の最終更新日を更新する。
     # Update the last update date of the selected problem.
     def set_last_update_kanji_worksheet(self):
         # Excelで読み込んだ時に妙な解釈をされ、形式が壊れてしまうため、シングルクォートで囲っておく.
         # Enclose with single quotes to prevent strange interpretation and breaking of the format when reading in Excel.
-        now = "'" + str(pd.to_datetime(datetime.datetime.today())) + "'"
+        now_time = pd.to_datetime(datetime.datetime.today())
+        now = "'" + str(now_time) + "'"
         # 選出した問題の最終日を更新する。
         # Update the last day of the selected problem.
         self.worksheet.loc[self.kanji_worksheet_idx, self.kLastUpdate] = now
+        self.worksheet.loc[self.kanji_worksheet_idx, self.kLastUpdateTime] = now_time
+        # 最終更新日が変わったため、次に出題する日時を計算し直す。
+        # Since the last update date changed, recalculate the next due date and time.
+        self.update_next_due(self.kanji_worksheet_idx)
 
         return self.kanji_worksheet
 
     # 漢字プリントを作成する。
     # Create a Kanji worksheet
+    @DebugPrint.trace('create_kanji_worksheet', rows=lambda self: len(self.kanji_worksheet))
     def create_kanji_worksheet(self):
         """
         漢字プリントを作成する。
@@ -686,35 +722,74 @@ class KanjiWorkSheet_prob(KanjiWorkSheet):
         # 間違えた問題のインデックスを取得する。
         # Extract the problem with the specified answer,
         # shuffle it, and get the index at the top.
-        self.list_x_idx = self.get_kanji_worksheet_index(self.kIncrctMk, days=0)
-        np.random.shuffle(self.list_x_idx)
-
-        # インデックスをマージする。
-        # Merge the indices.
-        self.kanji_worksheet_idx = self.list_x_idx[0:self.get_number_of_problem()]
+        with self.DebugPrint.span('select_' + self.kIncrctMk) as span:
+            self.list_x_idx = self.get_due_kanji_worksheet_index([self.kIncrctMk])
+            np.random.shuffle(self.list_x_idx)
+
+            # インデックスをマージする。
+            # Merge the indices.
+            self.kanji_worksheet_idx = self.list_x_idx[0:self.get_number_of_problem()]
+            span.rows = len(self.kanji_worksheet_idx)
         self.set_number_of_problem(len(self.list_x_idx))
 
-    # 出題してからしばらく再出題していない漢字の問題のインデックスを取得する。
-    # Get the index of the Kanji question
-    # that has not been re-questioned for a while after questioning.
-    def get_kanji_worksheet_a_index(self):
+    # 出題してからしばらく再出題していない漢字の問題のインデックスを1つずつ返す。
+    # Yield the indices of the Kanji questions
+    # that have not been re-questioned for a while after questioning one by one.
+    def iter_kanji_worksheet_a_index(self):
         # 最後の出題から30日以上経過した漢字の辞書を作成。
         # Create a dictionary of Kanji that has passed more than 30 days since the last question.
         kanji_dict = self.create_long_time_no_question_dict(
             self.kanji_worksheet[self.kAnswer].tolist(),
-            self.kanji_worksheet[self.kLastUpdate].tolist(),
+            self.kanji_worksheet[self.kLastUpdateTime].tolist(),
             days=30
         )
 
-        # 指定した答えの問題を抽出し、シャッフルしてその先頭のインデックスを得る。
-        # Extract the problem with the specified answer, shuffle it, and get the index at the top.
-        idx_list = []
+        # 指定した答えの問題を抽出し、その中から1問を無作為に選ぶ。
+        # Extract the problems with the specified answer and select one of them at random.
         for key in kanji_dict.keys():
-            tmp_df_idx = self.get_problem_with_answer(key, self.grade).index.values
-            np.random.shuffle(tmp_df_idx)
-            idx_list.append(tmp_df_idx[0])
+            tmp_df_idx = self.get_problem_index_with_answer(key, self.grade)
+            yield tmp_df_idx[np.random.randint(len(tmp_df_idx))]
+
+    # 優先順位の高い候補から順に、出題数に達するまで問題のインデックスを集める。
+    # Collect the problem indices from the highest priority candidates until the number of questions is reached.
+    def merge_kanji_worksheet_index(self, source_list, num):
+        """
+        :param source_list: (名前, 候補を返す関数)のリスト(先頭ほど優先する)
+                            List of (name, function returning candidates) (earlier ones have priority)
+        :type source_list: list
+        :param num: 出題数 / Number of questions
+        :type num: int
 
-        return idx_list
+        優先順位の高い候補から順に、出題数に達するまで問題のインデックスを集める。
+        候補を返す関数には残りの問題数を渡し、その候補が必要になるまで呼び出さない。
+        既に選んだ問題は飛ばす。
+        Collect the problem indices from the highest priority candidates until the number of questions is reached.
+        Each function is given the number of remaining problems and is not called until its candidates are needed.
+        Problems already selected are skipped.
+
+        集めたインデックスと、候補の名前ごとに選んだインデックスの辞書を返す。
+        Returns the collected indices and a dictionary of the indices selected for each candidate name.
+        """
+        idx_list = []
+        idx_set = set()
+        bucket_dict = {name: [] for name, _ in source_list}
+        for name, source in source_list:
+            if len(idx_list) >= num:
+                break
+            # 候補ごとに、候補の作成と選択にかかった時間を記録する。
+            # Record the time taken to create and select the candidates for each candidate.
+            with self.DebugPrint.span('select_' + name) as span:
+                for idx in source(num - len(idx_list)):
+                    if idx in idx_set:
+                        continue
+                    idx_list.append(idx)
+                    idx_set.add(idx)
+                    bucket_dict[name].append(idx)
+                    if len(idx_list) >= num:
+                        break
+                span.rows = len(bucket_dict[name])
+
+        return np.array(idx_list, dtype=np.int64), bucket_dict
 
     # 訓練モードの漢字プリントを作成する。
     # Create a Kanji worksheet in training mode.
@@ -726,52 +801,47 @@ class KanjiWorkSheet_prob(KanjiWorkSheet):
         self.print_info("Selected training mode.")
 
         # テスト問題を選定する。/ Select the test questions.
-        # 出題してからしばらく再出題していない漢字の問題のインデックスを取得する。
-        # Get the index of the Kanji question that has not been re-questioned for a while after questioning.
-        self.list_a_idx = self.get_kanji_worksheet_a_index()
-        # 三日前に間違えた問題のインデックスを取得する。
-        # Get the index of the question that was wrong three days ago.
-        self.list_d_idx = self.get_kanji_worksheet_index(self.kDayMk, days=3)
-        # 一週間前に間違えた問題のインデックスを取得する。
-        # Get the index of the question that was wrong a week ago.
-        self.list_w_idx = self.get_kanji_worksheet_index(self.kWeekMk, days=7 - 1)
-        # 一ヶ月前に間違えた問題のインデックスを取得する。
-        # Get the index of the question that was wrong a month ago.
-        self.list_m_idx = self.get_kanji_worksheet_index(self.kMonthMk, days=7 * 4 - 7)
-
-        # 4つの問題を連結する。/ Concatenate the four questions.
         # 優先順位: 30日以上出題していない問題 ＞ 3日後に出題 ＞ 1週間後に出題 ＞ 1ヶ月後に出題 ＞ 未出題 ＞ 正解
         # Priority: more than 30 days > after three days > after a week > after a month > unasked > Correct
-        self.kanji_worksheet_idx = np.concatenate([self.list_a_idx, self.list_d_idx, self.list_w_idx, self.list_m_idx])
-
-        num = self.get_number_of_problem() - len(self.kanji_worksheet_idx)
-        if num <= 0:
-            # 間違えた問題で満足した場合 / If satisfied with the wrong questions
-            # 1~20番目の問題のインデックスを作成する。 / Create an index of the 1st to 20th questions.
-            self.kanji_worksheet_idx = self.kanji_worksheet_idx[0: self.get_number_of_problem()]
-        else:
-            # 間違えた問題だけでは不足している場合 / If there are not enough wrong questions
-            # まだ出題していない問題を抽出する。 / Extract the questions that have not yet been asked.
-            (self.list_n_idx, n_num) = self.remove_duplicates_kanji_problem(num, self.kNotMk, sort=False)
-            self.kanji_worksheet_idx = np.concatenate([self.kanji_worksheet_idx, self.list_n_idx[0:n_num]])
-
-            # 未出題だけでは確保できなかった。 / It could not be secured only by unasked.
-            num = num - len(self.list_n_idx[0:n_num])
-            if num > 0:
-                # 既に出題し、正解している問題を候補に挙げる。
-                # Already asked and correct questions are candidates.
-                (self.list_o_idx, _) = self.remove_duplicates_kanji_problem(num, self.kCrctMk, sort=True)
-                self.list_o_idx = list(set(self.list_o_idx) - set(self.list_a_idx))
-                o_num = len(self.list_o_idx)
-
-                self.kanji_worksheet_idx = np.concatenate([self.kanji_worksheet_idx, self.list_o_idx[0:o_num]])
-
-                # それでも足りない場合は、一日後や一週間後、一ヶ月後に出題する予定の未出題の問題を選択することもできるが、
-                # If it is still not enough,
-                # you can select the unasked questions that are scheduled to be asked one day later,
-                # But for rare case, cope by reducing the number of questions.
-                # レアケースのため、出題数を削ることで対応する。
-                self.set_number_of_problem(len(self.kanji_worksheet_idx))
+        # 出題する日時を過ぎた問題は間隔表の順に並べる(3日後 ＞ 1週間後 ＞ 1ヶ月後)。
+        # The problems past their due date are in the order of the interval table
+        # (after 3 days > after a week > after a month).
+        # 出題する日時を過ぎた問題は、必要な数だけ優先度索引の先頭から取り出す。
+        # 先に選んだ問題と重なる分(最大で出題数 - 残りの問題数 num)も足りるように、出題数まで取り出す。
+        # Take only as many problems past their due date as needed from the head of the priority index.
+        # Take up to the number of questions so that the overlap with the problems selected earlier
+        # (at most the number of questions - the remaining number num) is also covered.
+        total = self.get_number_of_problem()
+        source_list = [('a', lambda num: self.iter_kanji_worksheet_a_index())]
+        for result in self.interval_table.keys():
+            if result != self.kIncrctMk:
+                source_list.append(
+                    (result, lambda num, result=result: self.get_due_kanji_worksheet_index([result], total)))
+        source_list.append(
+            (self.kNotMk, lambda num: self.iter_kanji_problem_without_duplicates(num, self.kNotMk, sort=False)))
+        source_list.append(
+            (self.kCrctMk, lambda num: self.iter_kanji_problem_without_duplicates(num, self.kCrctMk, sort=True)))
+
+        # 出題数に達した時点で止めるため、優先順位の低い候補は必要になるまで作成しない。
+        # Stop once the number of questions is reached, so lower priority candidates are not created until needed.
+        (self.kanji_worksheet_idx, bucket_dict) = self.merge_kanji_worksheet_index(
+            source_list, self.get_number_of_problem())
+        # 出題スケジュールで間隔が空欄の結果は候補にならないため、候補がない場合は空にする。
+        # Results with an empty interval in the schedule are not candidates, so use an empty list for them.
+        self.list_a_idx = bucket_dict.get('a', [])
+        self.list_d_idx = bucket_dict.get(self.kDayMk, [])
+        self.list_w_idx = bucket_dict.get(self.kWeekMk, [])
+        self.list_m_idx = bucket_dict.get(self.kMonthMk, [])
+        self.list_n_idx = bucket_dict.get(self.kNotMk, [])
+        self.list_o_idx = bucket_dict.get(self.kCrctMk, [])
+
+        # それでも足りない場合は、一日後や一週間後、一ヶ月後に出題する予定の未出題の問題を選択することもできるが、
+        # If it is still not enough,
+        # you can select the unasked questions that are scheduled to be asked one day later,
+        # But for rare case, cope by reducing the number of questions.
+        # レアケースのため、出題数を削ることで対応する。
+        if len(self.kanji_worksheet_idx) < self.get_number_of_problem():
+            self.set_number_of_problem(len(self.kanji_worksheet_idx))
 
     # 漢字プリントの出題問題の概要を表示する。
     # Display the overview of the Kanji worksheet problem.
@@ -799,6 +869,7 @@ class KanjiWorkSheet_prob(KanjiWorkSheet):
 
     # 漢字プリントの出題記録を問題集に反映する。
     # Reflect the question record of Kanji work sheet on the problem set.
+    @DebugPrint.trace('update_kanji_worksheet')
     def update_kanji_worksheet(self, path):
         """
         :param path: 出題記録のパス / Path of the question record
@@ -825,6 +896,13 @@ class KanjiWorkSheet_prob(KanjiWorkSheet):
         # 前回のテスト結果を基に、問題集を更新する。
         # レポート用の辞書を初期化
         result_dict = {key: 0 for key in self.report_key_list}
+        # 今回反映する結果の増減を数え直す。
+        # Start counting the change in results applied this time.
+        self.clear_report_count_diff()
+
+        # 最終更新日を更新した問題のインデックス
+        # Indices of the problems whose last update date was updated
+        update_idx = []
 
         # ログファイルから問題集に対応するインデックスを取得する.
         for idx in logs.index:
@@ -856,24 +934,16 @@ class KanjiWorkSheet_prob(KanjiWorkSheet):
                     #   m: self.kMonthMk : 1ヶ月後に実施(前回wで今回oの時)
                     #                      Implement after 1 month (when last time was w and this time is o)
 
-                    # 今回、正解した場合 / If the answer is correct this time.
-                    if new == self.kCrctMk:
-                        if old == self.kIncrctMk:  # x -> d
-                            key = self.kDayMk
-                        elif old == self.kDayMk:  # d -> w
-                            key = self.kWeekMk
-                        elif old == self.kWeekMk:  # w -> m
-                            key = self.kMonthMk
-                        else:  # m -> o or - -> o
-                            key = self.kCrctMk
-                    # 今回、不正解の場合 / If the answer is incorrect this time.
-                    else:  # x
-                        key = self.kIncrctMk
+                    # 遷移表から次の結果を求める。 / Get the next result from the transition table.
+                    # 今回の結果が正解以外の場合は、不正解として扱う。
+                    # Results other than correct this time are treated as incorrect.
+                    key = self.get_next_result(old, new == self.kCrctMk)
 
                     # 最終更新日を更新 / Update the last update date
                     self.worksheet.loc[idx, self.kLastUpdate] = logs.loc[idx, self.kLastUpdate]
-                    # 結果を反映 / Reflect the result
-                    self.worksheet.loc[idx, self.kResult] = key
+                    update_idx.append(idx)
+                    # 結果を反映し、学年と結果ごとの問題数を更新 / Reflect the result and update the counts
+                    self.update_result(idx, key)
                     # 履歴を更新 / Update the history
                     self.worksheet.loc[idx, self.kHistory] = self.worksheet.loc[idx, self.kHistory] + new
                     # 各結果の回数をカウント / Count the occurrences of each result
@@ -881,6 +951,20 @@ class KanjiWorkSheet_prob(KanjiWorkSheet):
                 else:
                     fmt_err_msg.append(self.print_error('ログファイルと問題集のインデックスが不一致です.'))
 
+        # 更新した最終更新日をまとめて日時に変換する。
+        # Convert the updated last update dates into datetime all at once.
+        if len(update_idx) > 0:
+            self.worksheet.loc[update_idx, self.kLastUpdateTime] = \
+                self.to_last_update_time(self.worksheet.loc[update_idx, self.kLastUpdate])
+            # 結果と最終更新日が変わったため、次に出題する日時を計算し直す。
+            # Since the results and last update dates changed, recalculate the next due date and time.
+            self.update_next_due(update_idx)
+
+        # デバッグ時は、差分で更新した問題数を数え直した結果と比較する。
+        # In debug mode, compare the counts updated by differences with a full recount.
+        if self.DebugPrint.kDebug:
+            self.verify_report_count()
+
         # ログに反映した数を算出する。
         # Calculate the number reflected in the log.
         total = sum(result_dict[key] for key in self.report_key_list)
@@ -908,13 +992,24 @@ class KanjiWorkSheet_prob(KanjiWorkSheet):
         return len(opn_err_msg) != 0, opn_err_msg, len(fmt_err_msg) != 0, fmt_err_msg
 
     # 漢字プリントを作成する。 / Creates a kanji worksheet.
-    def create_pdf_kanji_worksheet(self, path):
+    @DebugPrint.trace('render_pdf', rows=lambda self, path, page=None: self.get_number_of_problem())
+    def create_pdf_kanji_worksheet(self, path, page=None):
         """
         :param path: 漢字プリントの保存先 / Destination for the kanji worksheet
         :type path: string
+        :param page: 冊子のキャンバス(Noneの場合は1人分のPDFを保存する)
+                     Canvas of the booklet (saves a PDF for one student if None)
+        :type page: reportlab.pdfgen.canvas.Canvas
 
         漢字プリントを作成する。 / Creates a kanji worksheet.
+
+        冊子のキャンバスを渡した場合は、そのキャンバスに1ページ追加するだけで保存しない。
+        If a booklet canvas is given, only add one page to it without saving.
         """
+        # reportlabの読み込みは時間がかかるため、最初にPDFを作成するときにimportする。
+        # Importing reportlab takes time, so import it when the first PDF is created.
+        from KanjiWorkSheet_draw import KanjiWorkSheet_draw
+
         # 漢字プリントを作成する。 / Create a kanji worksheet.
         draw = KanjiWorkSheet_draw(
             path,
@@ -923,7 +1018,8 @@ class KanjiWorkSheet_prob(KanjiWorkSheet):
             self.get_create_date(),
             self.get_number_of_problem(),
             self.worksheet[self.kProblem],
-            self.kanji_worksheet_idx)
+            self.kanji_worksheet_idx,
+            page)
 
         # PDFを作成する。 / Create the PDF.
         draw.create_pdf_kanji_worksheet()
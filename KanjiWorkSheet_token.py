@@ -0,0 +1,213 @@
+# KanjiWorkSheet_token.py
+# Copyright (c) 2023 Masaya Yamamoto
+# Released under the MIT license.
+# see https://opensource.org/licenses/MIT (英語)
+# see https://licenses.opensource.jp/MIT/MIT.html (日本語)
+from collections import namedtuple
+from functools import lru_cache
+
+# トークンの種類 / Kinds of tokens
+kTokenText = 0   # 問題文 / Plain text run
+kTokenKanji = 1  # 漢字 / Kanji run
+kTokenRuby = 2   # ルビ <...> / Ruby
+kTokenFrame = 3  # 問題枠 [...] / Answer frame
+
+# 問題文の記号 / Markup symbols in problem statements
+kRubyPrefix = u'<'
+kRubySuffix = u'>'
+kRubyFullWidthPrefix = u'＜'
+kRubyFullWidthSuffix = u'＞'
+kFramePrefix = u'['
+kFrameSuffix = u']'
+
+# 問題文を分解した結果 / Result of tokenizing a problem statement
+# token          : (種類, 文字列)のタプル / Tuple of (kind, string)
+# ruby_missing   : ルビがない漢字の数 / Number of kanji runs without ruby
+# ruby_empty     : ルビが空欄 / Ruby is empty
+# ruby_full_width: ルビの記号が全角 / Ruby symbols are full-width
+# ruby_nest      : ルビの指定が入れ子 / Ruby is nested
+# frame_nest     : 問題枠の指定が入れ子 / Answer frame is nested
+# frame_empty    : 問題枠が空欄 / Answer frame is empty
+# frame_num      : 問題枠の数 / Number of answer frames
+ProblemStatement = namedtuple('ProblemStatement', [
+    'token',
+    'ruby_missing',
+    'ruby_empty',
+    'ruby_full_width',
+    'ruby_nest',
+    'frame_nest',
+    'frame_empty',
+    'frame_num'
+])
+
+
+# 文字が漢字であるか否かを評価する.
+def is_kanji(char):
+    return '一' <= char <= '龯'
+
+
+# 問題文をトークンに分解する。
+# Tokenize a problem statement.
+@lru_cache(maxsize=1 << 17)
+def tokenize_problem_statement(statement):
+    """
+    :param statement: 問題文 / Problem statement
+    :type statement: string
+
+    問題文をトークンに分解する。
+    Tokenize a problem statement.
+
+    検証、ルビの置き換え、PDFの描画で同じ結果を使うため、1度の走査でトークンと構文の検査結果を作成する。
+    同じ問題文は2回目以降キャッシュした結果を返す。
+    Create the tokens and the syntax check results in one scan so that validation,
+    ruby rewriting and PDF rendering share the result.
+    The same problem statement returns the cached result from the second time on.
+    """
+    token = []
+    buf = ''
+    kind = kTokenText
+    in_frame = False
+    in_ruby = False
+
+    # ルビの有無の検査 / Check for ruby
+    kanji_flg = False
+    ruby_missing = 0
+
+    # 構文の検査 / Syntax check
+    r_inflag = False  # ルビの True:開始記号<を通過したとき, False:ルビの終了記号>を通過したとき
+    r_nest_err = False  # ルビの指定文字が True:入れ子になっているとき, False:入れ子になっていないとき
+    r_cnt_err = False  # ルビの文字数が True:0のとき, False:1以上のとき
+    r_err = False  # ルビの True:何れかが全角, False:すべてルビが半角
+    r_word_cnt = 0  # ルビの文字数
+    p_inflag = False  # 問題の True:開始記号[を通過したとき, False:問題枠の終了記号]を通過したとき
+    p_nest_err = False  # 問題枠の True:指定文字が入れ子になっているとき, False:問題枠の指定文字が入れ子になっていないとき
+    p_cnt_err = False  # 問題の True:文字数が0のとき, False:問題の文字数が1以上のとき
+    p_word_cnt = 0  # 問題枠の文字数
+    p_frame_cnt = 0  # 問題枠の数
+
+    for word in statement:
+        ##########################################################
+        # 漢字の直後にルビがあるか確認する.
+        ##########################################################
+        if is_kanji(word):
+            kanji_flg = True
+        elif kanji_flg:
+            if word != kRubyPrefix:
+                ruby_missing += 1
+            kanji_flg = False
+
+        ##########################################################
+        # 問題文のルビ<>が入れ子になっていないか、文字が入っているか確認する.
+        ##########################################################
+        if word == kRubyFullWidthPrefix or word == kRubyFullWidthSuffix:
+            r_err = True
+        if word == kRubyPrefix:
+            if r_inflag:
+                r_nest_err = True
+            r_inflag = True
+        if word == kRubySuffix:
+            if not r_inflag:
+                r_nest_err = True
+            elif r_word_cnt == 0:
+                r_cnt_err = True
+            r_inflag = False
+            r_word_cnt = 0
+        if r_inflag and word != kRubyPrefix:
+            r_word_cnt += 1
+
+        ##########################################################
+        # 問題文の問題枠が入れ子になっていないか、文字が入っていないか確認する.
+        ##########################################################
+        if word == kFramePrefix:
+            if p_inflag:
+                p_nest_err = True
+            p_inflag = True
+        if word == kFrameSuffix:
+            if not p_inflag:
+                p_nest_err = True
+            else:
+                p_cnt_err = p_word_cnt == 0
+                p_frame_cnt += 1
+            p_inflag = False
+            p_word_cnt = 0
+        if p_inflag and word != kFramePrefix:
+            p_word_cnt += 1
+
+        ##########################################################
+        # トークンに分解する.
+        ##########################################################
+        # 問題枠の中
+        if in_frame:
+            if word == kFrameSuffix:
+                token.append((kTokenFrame, buf))
+                buf = ''
+                in_frame = False
+            else:
+                buf += word
+        # ルビの中
+        elif in_ruby:
+            if word == kRubySuffix:
+                token.append((kTokenRuby, buf))
+                buf = ''
+                in_ruby = False
+            else:
+                buf += word
+        # 問題枠、ルビの開始
+        elif word == kFramePrefix or word == kRubyPrefix:
+            if len(buf) > 0:
+                token.append((kind, buf))
+            buf = ''
+            in_frame = word == kFramePrefix
+            in_ruby = word == kRubyPrefix
+        # 漢字、問題文
+        else:
+            word_kind = kTokenKanji if is_kanji(word) else kTokenText
+            if len(buf) > 0 and word_kind != kind:
+                token.append((kind, buf))
+                buf = ''
+            kind = word_kind
+            buf += word
+
+    # 問題文の最後の漢字にルビがない場合
+    if kanji_flg:
+        ruby_missing += 1
+
+    # 閉じていない問題枠、ルビはそのまま文字として残す.
+    if in_frame:
+        token.append((kTokenText, kFramePrefix + buf))
+    elif in_ruby:
+        token.append((kTokenText, kRubyPrefix + buf))
+    elif len(buf) > 0:
+        token.append((kind, buf))
+
+    return ProblemStatement(
+        tuple(token),
+        ruby_missing,
+        r_cnt_err,
+        r_err,
+        r_nest_err,
+        p_nest_err,
+        p_cnt_err,
+        p_frame_cnt
+    )
+
+
+# トークンを問題文に戻す。
+# Convert tokens back into a problem statement.
+def join_problem_statement(token):
+    """
+    :param token: トークン / Tokens
+    :type token: tuple
+
+    トークンを問題文に戻す。
+    Convert tokens back into a problem statement.
+    """
+    statement = ''
+    for kind, text in token:
+        if kind == kTokenRuby:
+            statement += kRubyPrefix + text + kRubySuffix
+        elif kind == kTokenFrame:
+            statement += kFramePrefix + text + kFrameSuffix
+        else:
+            statement += text
+    return statement
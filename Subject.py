@@ -14,6 +14,9 @@ class Subject:
         self.kNotify_load_failed = 3
         self.kNotify_valid_file_path = 4
         self.kNotify_create_worksheet = 5
+        self.kNotify_create_worksheet_start = 6
+        self.kNotify_create_worksheet_stop = 7
+        self.kNotify_load_start = 8
         self.notify_status = self.kNotify_delete_student
 
     def attach(self, observer):
@@ -3,7 +3,8 @@
 # Released under the MIT license.
 # see https://opensource.org/licenses/MIT (英語)
 # see https://licenses.opensource.jp/MIT/MIT.html (日本語)
-import pandas as pd
+import os
+import csv
 
 
 class UserSettings:
@@ -43,11 +44,18 @@ class UserSettings:
             self.kReview_Mode,
             self.kTraining_Mode
         ]
+        # 出題形式の名称 / Names of the question formats
+        self.kModeKeyList = [
+            u'復習',  # 復習モード / Review mode
+            u'練習'   # 練習モード / Training mode
+        ]
 
         # 設定ファイルのパス / Path of the setting file
         self.path_of_setting_file = r'./.setting'
-        # 設定ファイルのデータフレーム / DataFrame of the setting file
-        self.setting_data = pd.DataFrame()
+        # 設定ファイルのデータ(生徒ごとの辞書のリスト) / Data of the setting file (a list of dicts, one per student)
+        # 起動を速くするため、pandasを使わずに読み書きする。pandasは問題集を読み込むときに初めてimportする。
+        # To start up quickly, read and write it without pandas. pandas is first imported when a problem set is loaded.
+        self.setting_data = []
 
         # 設定ファイルの項目 / Items of the setting file
         self.setting_columns = [
@@ -69,17 +77,14 @@ class UserSettings:
         try:
             # .setting ファイルを開く。
             # Open the .setting file.
-            self.setting_data = pd.read_csv(
-                self.path_of_setting_file,
-                sep=',',
-                encoding=self.encoding
-            )
+            with open(self.path_of_setting_file, 'r', newline='', encoding=self.encoding) as f:
+                self.setting_data = [self.__parse_setting_row(row) for row in csv.DictReader(f, delimiter=',')]
         # .setting ファイルがない場合は新規作成する。
         # If the .setting file does not exist, create a new one.
         except FileNotFoundError:
             # 空の .setting ファイルを新規作成する。
             # Create a new empty .setting file.
-            self.setting_data = pd.DataFrame(columns=self.setting_columns)
+            self.setting_data = []
             # 空の .setting ファイルを設定ファイルを保存する。
             # Save the empty .setting file.
             self.save_setting_file()
@@ -92,12 +97,11 @@ class UserSettings:
         # 設定ファイルを書き込む。
         # Write to the setting file.
         try:
-            self.setting_data.to_csv(
-                self.path_of_setting_file,
-                sep=',',
-                index=False,
-                encoding=self.encoding
-            )
+            with open(self.path_of_setting_file, 'w', newline='', encoding=self.encoding) as f:
+                writer = csv.writer(f, delimiter=',', lineterminator=os.linesep)
+                writer.writerow(self.setting_columns)
+                for row in self.setting_data:
+                    writer.writerow([row[column] for column in self.setting_columns])
         # 設定ファイルを開くなど、書き込みができない。
         # Unable to write, such as opening the setting file.
         except PermissionError:
@@ -109,14 +113,11 @@ class UserSettings:
     # 生徒を設定ファイルに登録する。
     # Register a student in the setting file.
     def register_student(self, name):
-        # 設定ファイルにデータを結合し、インデックスを更新する。
-        # Merge the data into the setting file and update the index.
-        new_student_data = pd.DataFrame([[
+        # 設定ファイルにデータを追加する。
+        # Append the data to the setting file.
+        self.setting_data.append(dict(zip(self.setting_columns, [
             name, '', self.kMaxNumber, False, False, False, False, False, False, self.kTraining_Mode
-        ]], columns=self.setting_columns)
-
-        self.setting_data = pd.concat([self.setting_data, new_student_data], axis=0)
-        self.setting_data = self.setting_data.reset_index(drop=True)
+        ])))
         # 設定ファイルに保存する。
         # Save to the setting file.
         self.save_setting_file()
@@ -124,19 +125,17 @@ class UserSettings:
     def delete_student(self, name):
         # 設定ファイルの該当データを削除する。
         # Delete the corresponding data from the setting file.
-        i = self.setting_data[self.setting_data[self.kStudentName] == name].index[0]
-        self.setting_data = self.setting_data.drop(i)
-        self.setting_data = self.setting_data.reset_index(drop=True)
+        del self.setting_data[self.__get_index(name)]
 
     # 生徒の一覧を取得する。
     # Get a list of students.
     def get_student_name_list(self):
-        return self.setting_data[self.kStudentName].values.tolist()
+        return [row[self.kStudentName] for row in self.setting_data]
 
     # 生徒が登録済みか否かを確認する。
     # Check whether the student is registered.
     def chk_registered_student(self, name):
-        if name in self.setting_data[self.kStudentName].values:
+        if name in self.get_student_name_list():
             return True
         else:
             return False
@@ -149,38 +148,32 @@ class UserSettings:
     # 問題集のパスを設定する。
     # Set the path of the problem set.
     def set_path_of_problem(self, name, path):
-        self.setting_data.at[self.__get_index(name), self.kProblemPath] = path
+        self.setting_data[self.__get_index(name)][self.kProblemPath] = path
 
     # 問題集のパスを取得する。
     # Get the path of the problem set.
     def get_path_of_problem(self, name):
-        path = self.setting_data.at[self.__get_index(name), self.kProblemPath]
-        # Nanの場合は空欄にする。
-        # If it is Nan, make it blank.
-        if pd.isna(path):
-            return ''
-        else:
-            return str(path)
+        return self.setting_data[self.__get_index(name)][self.kProblemPath]
 
     # 出題数を設定する。
     # Set the number of problems.
     def set_number_of_problem(self, name, num):
-        self.setting_data.at[self.__get_index(name), self.kNumber] = num
+        self.setting_data[self.__get_index(name)][self.kNumber] = num
 
     # 出題数を取得する。
     # Get the number of problems.
     def get_number_of_problem(self, name):
-        return self.setting_data.at[self.__get_index(name), self.kNumber]
+        return self.setting_data[self.__get_index(name)][self.kNumber]
 
     # 学年の設定値を設定する.
     # Set the grade value.
     def set_grade_value(self, name, grade_key, value):
-        self.setting_data.at[self.__get_index(name), grade_key] = value
+        self.setting_data[self.__get_index(name)][grade_key] = value
 
     # 指定した学年の設定値を取得する。
     # Get the grade value.
     def get_grade_value(self, name, grade_key):
-        return self.setting_data.at[self.__get_index(name), grade_key]
+        return self.setting_data[self.__get_index(name)][grade_key]
 
     # 学年の列からTrueになっているものをリストに格納する。
     # Store the items that are True in the grade column in a list.
@@ -192,7 +185,7 @@ class UserSettings:
 
         grade_list = []
         for grade, key in enumerate(self.kGradeKeyList, start=1):
-            if self.setting_data.at[self.__get_index(name), key]:
+            if self.setting_data[self.__get_index(name)][key]:
                 grade_list.append(grade)
 
         return grade_list
@@ -200,14 +193,45 @@ class UserSettings:
     # 出題形式を設定する。
     # Set the question format.
     def set_mode(self, name, mode):
-        self.setting_data.at[self.__get_index(name), self.kMode] = mode
+        self.setting_data[self.__get_index(name)][self.kMode] = mode
 
     # 出題形式を取得する。
     # Get the question format.
     def get_mode(self, name):
-        return self.setting_data.at[self.__get_index(name), self.kMode]
+        return self.setting_data[self.__get_index(name)][self.kMode]
 
     # UserSettingsの該当データのインデックスを取得する。
     # Get the index of the corresponding data in UserSettings.
     def __get_index(self, name):
-        return self.setting_data[self.setting_data[self.kStudentName] == name].index[0]
+        return self.get_student_name_list().index(name)
+
+    # 設定ファイルの1行を、各項目の型に変換する。
+    # Convert one row of the setting file to the type of each item.
+    def __parse_setting_row(self, row):
+        """
+        :param row: 設定ファイルの1行 / One row of the setting file
+        :type row: dict
+
+        設定ファイルの1行を、各項目の型に変換する。
+        空欄や読めない値は、生徒を登録したときの値にする。
+        Convert one row of the setting file to the type of each item.
+        Blank or unreadable values are set to the values used when a student is registered.
+        """
+        data = {
+            self.kStudentName: row.get(self.kStudentName) or '',
+            self.kProblemPath: row.get(self.kProblemPath) or '',
+            self.kNumber: self.__parse_int(row.get(self.kNumber), self.kMaxNumber),
+            self.kMode: self.__parse_int(row.get(self.kMode), self.kTraining_Mode),
+        }
+        for key in self.kGradeKeyList:
+            data[key] = str(row.get(key)).strip().lower() in ('true', '1')
+
+        return data
+
+    # 整数に変換する。変換できない場合は既定値を返す。
+    # Convert to an integer. Returns the default value if it cannot be converted.
+    def __parse_int(self, value, default):
+        try:
+            return int(float(value))
+        except (TypeError, ValueError):
+            return default
@@ -10,6 +10,7 @@ from tkinter import messagebox
 from Subject import Subject
 from DebugPrint import DebugPrint
 from UserSettings import UserSettings
+from BackgroundWorker import BackgroundWorker
 
 
 class WidgetCreateWorkSheet(Subject):
@@ -19,7 +20,7 @@ class WidgetCreateWorkSheet(Subject):
         self.KanjiWorkSheet = None
         self.WidgetSelectStudent = None
         self.WidgetSelectWorkSheetPath = None
-        self.DebugPrint = DebugPrint(debug=True)  # デバッグ表示クラス
+        self.DebugPrint = DebugPrint()  # デバッグ表示クラス
         self.UserSettings = UserSettings()  # ユーザ設定クラス
 
         # 作成フレーム
@@ -48,6 +49,19 @@ class WidgetCreateWorkSheet(Subject):
         )
         self.Print_Button.pack(side=tk.LEFT, padx=5)
 
+        # 進捗ラベル
+        self.Progress_Value = tk.StringVar()
+        self.Progress_Label = tk.Label(
+            self.CreateWorkSheetFrame,
+            textvariable=self.Progress_Value,
+            width=20,
+            anchor=tk.W
+        )
+        self.Progress_Label.pack(side=tk.LEFT)
+
+        # 漢字プリントを作成するバックグラウンド処理
+        self.BackgroundWorker = BackgroundWorker(self.CreateWorkSheetFrame)
+
     def set_class(self, create_file_path, kanji_worksheet, wg_select_student, wg_select_work_sheet_path):
         self.CreateFilePath = create_file_path
         self.KanjiWorkSheet = kanji_worksheet
@@ -90,36 +104,95 @@ class WidgetCreateWorkSheet(Subject):
 
             # 漢字プリントを作成する.
             if yes:
-                # ログファイルを削除する.
-                self.KanjiWorkSheet.delete_kanji_worksheet_logfile(log_path)
-                # 漢字プリントを作成する.
-                self.KanjiWorkSheet.create_kanji_worksheet()
-                # 漢字プリントの概要を表示する.
-                self.KanjiWorkSheet.report_kanji_worksheet()
-                # 漢字プリントの出題記録を作成する.
+                path = self.CreateFilePath.get_path_of_kanji_worksheet()
+                # 作成中は画面が固まらないように、バックグラウンドで作成する.
+                self.BackgroundWorker.start(
+                    lambda worker: self.create_kanji_worksheet(worker, log_path, path),
+                    self.Event_ProgressKanjiWorkSheet,
+                    lambda status, result, error: self.Event_EndCreateKanjiWorkSheet(status, error, path)
+                )
+                # 作成中は「プリント作成」ボタンを「中止」ボタンにし、他のボタンを無効にする.
+                self.set_cancel_button()
+                self.disable_print_button()
+                self.notify(self.kNotify_create_worksheet_start)
+            else:
+                # 中止メッセージを表示する.
+                tk.messagebox.showinfo('Info', '中止しました.')
 
-                result = self.KanjiWorkSheet.create_kanji_worksheet_logfile(log_path)
+    # 漢字プリントを作成する(バックグラウンドで実行する).
+    def create_kanji_worksheet(self, worker, log_path, path):
+        # 中止した場合に元に戻せるように、問題集を保持する.
+        worksheet = self.KanjiWorkSheet.worksheet.copy()
 
-                # 漢字プリントをPFDで作成する.
-                path = self.CreateFilePath.get_path_of_kanji_worksheet()
-                self.KanjiWorkSheet.create_pdf_kanji_worksheet(path)
+        try:
+            # 漢字プリントを作成する.
+            worker.report(('問題を選んでいます.', True))
+            (err, err_msg) = self.KanjiWorkSheet.create_kanji_worksheet()
+            if err:
+                raise ValueError(err_msg[0])
+            # 漢字プリントの概要を表示する.
+            self.KanjiWorkSheet.report_kanji_worksheet()
+            worker.check_cancel()
+        except BaseException:
+            # 出題記録を作成する前は、問題集を元に戻して中止できる.
+            self.KanjiWorkSheet.worksheet = worksheet
+            self.KanjiWorkSheet.update_next_due()
+            raise
 
-                # 採点を更新する.
-                #self.WidgetScoring.update_scoring()
-                #if result:
-                #    # 「採点完了」ボタンを有効にする.
-                #    self.WidgetScoring.enable_scoring_button()
-                #else:
-                #    # 「採点完了」ボタンを無効にする.
-                #    self.WidgetScoring.disable_scoring_button()
+        # 出題記録を作成した後は、問題集と出題記録が食い違わないように最後まで作成する.
+        # ここからは中止できないため、「中止」ボタンを無効にする.
+        # ログファイルを削除する.
+        worker.report(('出題記録を作成しています(中止できません).', False))
+        self.KanjiWorkSheet.delete_kanji_worksheet_logfile(log_path)
+        # 漢字プリントの出題記録を作成する.
+        self.KanjiWorkSheet.create_kanji_worksheet_logfile(log_path)
 
-                self.notify(self.kNotify_create_worksheet)
+        # 漢字プリントをPFDで作成する.
+        worker.report(('PDFを作成しています(中止できません).', False))
+        self.KanjiWorkSheet.create_pdf_kanji_worksheet(path)
 
-                # 終了メッセージを表示する.
-                tk.messagebox.showinfo('Info', os.path.basename(path) + ' を作成しました.')
-            else:
-                # 中止メッセージを表示する.
-                tk.messagebox.showinfo('Info', '中止しました.')
+    # イベント発生条件:漢字プリントの作成の途中経過を受け取ったとき
+    # 処理概要:進捗を表示し、中止できなくなった場合は「中止」ボタンを無効にする.
+    def Event_ProgressKanjiWorkSheet(self, progress):
+        (msg, cancellable) = progress
+        self.set_progress(msg)
+        if not cancellable:
+            self.disable_create_button()
+
+    # イベント発生条件:漢字プリントの作成が終わったとき
+    # 処理概要:作成結果を表示する.
+    def Event_EndCreateKanjiWorkSheet(self, status, error, path):
+        self.DebugPrint.print_info('Call: Event_EndCreateKanjiWorkSheet')
+        self.set_create_button()
+        self.enable_print_button()
+        self.set_progress('')
+
+        if status == self.BackgroundWorker.kStatusDone:
+            self.notify(self.kNotify_create_worksheet)
+            # 終了メッセージを表示する.
+            msg = os.path.basename(path) + ' を作成しました.'
+            # 中止できなくなる直前に「中止」ボタンを押した場合は、中止しなかったことを伝える.
+            if self.BackgroundWorker.is_cancelled():
+                msg = '出題記録を作成した後のため, 中止できませんでした. ' + msg
+            tk.messagebox.showinfo('Info', msg)
+        elif status == self.BackgroundWorker.kStatusCancelled:
+            self.notify(self.kNotify_create_worksheet_stop)
+            # 中止メッセージを表示する.
+            tk.messagebox.showinfo('Info', '中止しました.')
+        else:
+            self.notify(self.kNotify_create_worksheet_stop)
+            msg = self.DebugPrint.print_error(str(error))
+            # 失敗するまでの経過を調べられるように、直近のログを書き出す。
+            self.DebugPrint.dump_log()
+            tk.messagebox.showerror('Error', msg)
+
+    # イベント発生条件:「中止」ボタンを押したとき
+    # 処理概要:漢字プリントの作成を中止する.
+    def Event_CancelKanjiWorkSheet(self):
+        self.DebugPrint.print_info('Call: Event_CancelKanjiWorkSheet')
+        self.BackgroundWorker.cancel()
+        self.set_progress('中止しています.')
+        self.disable_create_button()
 
     # イベント発生条件:「印刷」ボタンを押したとき
     # 処理概要:PDFを開く.
@@ -139,6 +212,22 @@ class WidgetCreateWorkSheet(Subject):
     def disable_create_button(self):
         self.Create_Button['state'] = tk.DISABLED
 
+    # 「プリント作成」ボタンにする.
+    def set_create_button(self):
+        self.Create_Button['text'] = 'プリント作成'
+        self.Create_Button['command'] = self.Event_CreateKanjiWorkSheet
+        self.enable_create_button()
+
+    # 「中止」ボタンにする.
+    def set_cancel_button(self):
+        self.Create_Button['text'] = '中止'
+        self.Create_Button['command'] = self.Event_CancelKanjiWorkSheet
+        self.enable_create_button()
+
+    # 進捗を表示する.
+    def set_progress(self, msg):
+        self.Progress_Value.set(msg)
+
     # 「印刷」ボタンを有効にする.
     def enable_print_button(self):
         self.Print_Button['state'] = tk.NORMAL
@@ -158,7 +247,9 @@ class WidgetCreateWorkSheet(Subject):
             self.enable_create_button()
             # 「印刷」ボタンを有効にする。
             self.enable_print_button()
-        elif subject.notify_status == subject.kNotify_load_failed:
+        elif subject.notify_status == subject.kNotify_load_failed \
+                or subject.notify_status == subject.kNotify_load_start:
+            # 問題集を読み込めなかった場合と、読み込み中は、
             # 「プリント作成」ボタンを無効にする。
             self.disable_create_button()
             # 「印刷」ボタンを無効にする。
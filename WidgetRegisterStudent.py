@@ -12,7 +12,7 @@ from UserSettings import UserSettings
 class WidgetRegisterStudent:
     # 生徒登録用のウィジェット作成
     def __init__(self, root, row, column):
-        self.DebugPrint = DebugPrint(debug=True)  # デバッグ表示クラス
+        self.DebugPrint = DebugPrint()  # デバッグ表示クラス
         self.UserSettings = UserSettings()  # ユーザ設定クラス
 
         # 生徒登録ラベルフレーム
@@ -253,13 +253,11 @@ class WidgetReport:
 
         grade_list = [[1], [2], [3], [4], [5], [6], [1, 2, 3, 4, 5, 6]]
 
-        # 問題集をロードする.
-        path = self.WidgetSelectWorkSheetPath.get_selected_worksheet_path()
-        (err_num, _, _, _) = self.KanjiWorkSheet.load_worksheet(path)
-
-        if err_num != 0:
+        # 問題集を読み込んでいない場合は更新しない.
+        if not self.KanjiWorkSheet.has_report_count():
             return
 
+        kw = self.KanjiWorkSheet
         for key, grade in zip(self.kGradeReportList, grade_list):
             self.enable_report_tolnum_entry(key)
             self.enable_report_outnum_entry(key)
@@ -269,13 +267,6 @@ class WidgetReport:
             self.enable_report_wknum_entry(key)
             self.enable_report_mtnum_entry(key)
 
-            outnum_old = self.get_report_outnum_entry(key)
-            crctnum_old = self.get_report_crctnum_entry(key)
-            inctnum_old = self.get_report_inctnum_entry(key)
-            daynum_old = self.get_report_daynum_entry(key)
-            wknum_old = self.get_report_wknum_entry(key)
-            mtnum_old = self.get_report_mtnum_entry(key)
-
             self.delete_report_tolnum_entry(key)
             self.delete_report_outnum_entry(key)
             self.delete_report_crctnum_entry(key)
@@ -284,32 +275,37 @@ class WidgetReport:
             self.delete_report_wknum_entry(key)
             self.delete_report_mtnum_entry(key)
 
-            tolnum = len(self.KanjiWorkSheet.get_problem_with_grade(grade))
+            # 問題数と、直近に結果を反映したときの増減は、問題集が保持している値を読み出す.
+            tolnum = kw.get_report_count(grade)
             self.insert_report_tolnum_entry(key, str(tolnum))
 
-            outnum = len(self.KanjiWorkSheet.get_problem_with_grade(grade)) \
-                     - len(self.KanjiWorkSheet.get_problem_with_status(grade, self.KanjiWorkSheet.kNotMk))
-
+            outnum = tolnum - kw.get_report_count(grade, kw.kNotMk)
+            outnum_old = outnum + kw.get_report_count_diff(grade, kw.kNotMk)
             msg = insert_fluctuation_msg(diff, outnum_old, outnum)
             self.insert_report_outnum_entry(key, msg)
 
-            crctnum = len(self.KanjiWorkSheet.get_problem_with_status(grade, self.KanjiWorkSheet.kCrctMk))
+            crctnum = kw.get_report_count(grade, kw.kCrctMk)
+            crctnum_old = crctnum - kw.get_report_count_diff(grade, kw.kCrctMk)
             msg = insert_fluctuation_msg(diff, crctnum_old, crctnum)
             self.insert_report_crctnum_entry(key, msg)
 
-            inctnum = len(self.KanjiWorkSheet.get_problem_with_status(grade, self.KanjiWorkSheet.kIncrctMk))
+            inctnum = kw.get_report_count(grade, kw.kIncrctMk)
+            inctnum_old = inctnum - kw.get_report_count_diff(grade, kw.kIncrctMk)
             msg = insert_fluctuation_msg(diff, inctnum_old, inctnum)
             self.insert_report_inctnum_entry(key, msg)
 
-            daynum = len(self.KanjiWorkSheet.get_problem_with_status(grade, self.KanjiWorkSheet.kDayMk))
+            daynum = kw.get_report_count(grade, kw.kDayMk)
+            daynum_old = daynum - kw.get_report_count_diff(grade, kw.kDayMk)
             msg = insert_fluctuation_msg(diff, daynum_old, daynum)
             self.insert_report_daynum_entry(key, msg)
 
-            wknum = len(self.KanjiWorkSheet.get_problem_with_status(grade, self.KanjiWorkSheet.kWeekMk))
+            wknum = kw.get_report_count(grade, kw.kWeekMk)
+            wknum_old = wknum - kw.get_report_count_diff(grade, kw.kWeekMk)
             msg = insert_fluctuation_msg(diff, wknum_old, wknum)
             self.insert_report_wknum_entry(key, msg)
 
-            mtnum = len(self.KanjiWorkSheet.get_problem_with_status(grade, self.KanjiWorkSheet.kMonthMk))
+            mtnum = kw.get_report_count(grade, kw.kMonthMk)
+            mtnum_old = mtnum - kw.get_report_count_diff(grade, kw.kMonthMk)
             msg = insert_fluctuation_msg(diff, mtnum_old, mtnum)
             self.insert_report_mtnum_entry(key, msg)
 
@@ -482,5 +478,7 @@ class WidgetReport:
             return 0
 
     def update(self, subject):
-        # レポートを更新する。
-        self.update_report()
+        # 問題集を読み込めたときに、レポートを更新する。
+        # 読み込む前に通知された場合は、前の問題集の内容になるため更新しない。
+        if subject.notify_status == subject.KNotify_load_successful:
+            self.update_report()
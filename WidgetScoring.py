@@ -185,11 +185,8 @@ class WidgetScoring:
     def Event_PushBtnTrain(self):
         pass
 
-    def update_scoring(self):
-        """採点を更新する."""
-        self.DebugPrint.print_info('Call: update_scoring')
-
-        # 採点の内容を削除
+    def clear_scoring(self):
+        """採点の内容を削除する."""
         for key in self.keys:
             # 答えを表示するフレームを初期化
             self.enable_scoring_answer_text(key)
@@ -202,6 +199,13 @@ class WidgetScoring:
             # 採点をするためのボタンの表示内容
             self.set_scoring_answer_button_display_value(key, None)
 
+    def update_scoring(self):
+        """採点を更新する."""
+        self.DebugPrint.print_info('Call: update_scoring')
+
+        # 採点の内容を削除
+        self.clear_scoring()
+
         # ログファイルから情報を取得し, 反映する.
         (err_num, _, ans_list) = self.KanjiWorkSheet.get_column_kanji_worksheet_log(self.get_path_of_log(),
                                                                                     self.KanjiWorkSheet.kAnswer)
@@ -295,14 +299,11 @@ class WidgetScoring:
 
     def update(self, subject):
         if subject.notify_status == subject.kNotify_select_student:
-            # 採点を更新する。
-            err_num = self.update_scoring()
-            if err_num == 0:
-                # 「採点完了」ボタンを有効にする。
-                self.enable_scoring_button()
-            else:
-                # 「採点完了」ボタンを無効にする。
-                self.disable_scoring_button()
+            # 前の生徒の採点を消す。採点は問題集を読み込めたとき(KNotify_load_successful)に更新する。
+            # 問題集はここでは参照しない(初回は問題集の作成に時間がかかり、画面が固まるため)。
+            self.clear_scoring()
+            # 「採点完了」ボタンを無効にする。
+            self.disable_scoring_button()
         elif subject.notify_status == subject.kNotify_delete_student:
             # 「採点完了」ボタンを無効にする。
             self.disable_scoring_button()
@@ -313,3 +314,22 @@ class WidgetScoring:
             self.update_scoring()
             # 「採点完了」ボタンを有効にする。
             self.enable_scoring_button()
+        elif subject.notify_status == subject.kNotify_create_worksheet_start:
+            # 漢字プリントの作成中は、問題集を更新しないように「採点完了」ボタンを無効にする。
+            self.disable_scoring_button()
+        elif subject.notify_status == subject.kNotify_create_worksheet_stop:
+            # 作成を中止した場合は、元の採点の状態に戻す。
+            err_num = self.update_scoring()
+            if err_num == 0:
+                # 「採点完了」ボタンを有効にする。
+                self.enable_scoring_button()
+        elif subject.notify_status == subject.kNotify_load_start \
+                or subject.notify_status == subject.kNotify_load_failed:
+            # 問題集の読み込み中と、読み込めなかった場合は、問題集を更新しないように「採点完了」ボタンを無効にする。
+            self.disable_scoring_button()
+        elif subject.notify_status == subject.KNotify_load_successful:
+            # 問題集を読み込めたら、採点できるようにする。
+            err_num = self.update_scoring()
+            if err_num == 0:
+                # 「採点完了」ボタンを有効にする。
+                self.enable_scoring_button()
@@ -11,7 +11,7 @@ from UserSettings import UserSettings
 
 class WidgetSelectNumberOfProblem:
     def __init__(self, root, row, column):
-        self.DebugPrint = DebugPrint(debug=True)  # デバッグ表示クラス
+        self.DebugPrint = DebugPrint()  # デバッグ表示クラス
         self.UserSettings = UserSettings()  # ユーザ設定クラス
 
         # 出題数ラベルフレーム
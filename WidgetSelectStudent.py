@@ -17,12 +17,13 @@ class WidgetSelectStudent(Subject):
     def __init__(self, root, row, column):
         Subject.__init__(self)
         # デバッグ表示クラス / Debug display class
-        self.DebugPrint = DebugPrint(debug=True)
+        self.DebugPrint = DebugPrint()
         # ユーザ設定クラス / User settings class
         self.UserSettings = UserSettings()
 
         self.KanjiWorkSheet = None
         self.CreateFilePath = None
+        self.KanjiWorkSheetLoader = None
 
         # 生徒選択ラベルフレーム / 'Select Student' label frame
         self.SelectStudentFrame = tk.LabelFrame(root, padx=2, pady=2, text='生徒選択')
@@ -64,10 +65,12 @@ class WidgetSelectStudent(Subject):
     def set_class(
             self,
             kanji_worksheet,
-            create_file_path
+            create_file_path,
+            kanji_worksheet_loader
     ):
         self.KanjiWorkSheet = kanji_worksheet
         self.CreateFilePath = create_file_path
+        self.KanjiWorkSheetLoader = kanji_worksheet_loader
 
     # イベント発生条件:「生徒選択」コンボボックスを押したとき
     # Event trigger condition: When the 'Select Student' combo box is pressed.
@@ -107,28 +110,26 @@ class WidgetSelectStudent(Subject):
             self.notify(self.kNotify_select_student)
 
             ################################################################################
-            # 登録した問題集のパスを取得し、問題集を読み込む。
-            # Get the path of the registered workbook and load the workbook.
+            # 登録した問題集のパスを取得し、問題集をバックグラウンドで読み込む。
+            # Get the path of the registered workbook and load the workbook in the background.
+            # 読み込みの結果は、読み込みサービスがオブザーバーに通知する。
+            # The loading service notifies the observers of the result of the load.
             path = self.UserSettings.get_path_of_problem(name)
-            (opn_err_num, _, fmt_err_num, fmt_err_msg) = self.KanjiWorkSheet.load_worksheet(path)
+            self.KanjiWorkSheetLoader.load(path, self.Event_LoadKanjiWorkSheet)
             ################################################################################
 
-            # 問題集を正しく読み込めた場合
-            # If the workbook is loaded correctly
-            if opn_err_num == 0 and fmt_err_num == 0:
-                # オブザーバーに通知する。
-                # # Notify the observer.
-                self.notify(self.KNotify_load_successful)
-            else:
-                # オブザーバーに通知する。
-                # # Notify the observer.
-                self.notify(self.kNotify_load_failed)
-                # 何らかのエラーメッセージを取得した場合は、メッセージボックスで通知する。
-                # If any error message is obtained, notify with a message box.
-                # ただし、ファイルが存在しないことをこのイベントでは通知しない.(煩わしいため)
-                # However, do not notify about the non-existence of the file in this event (to avoid annoyance).
-                for msg in fmt_err_msg:
-                    tk.messagebox.showerror('Error', msg)
+    # イベント発生条件:選択した生徒の問題集を読み込み終わったとき
+    # Event trigger condition: When loading the workbook of the selected student has finished.
+    # 処理概要:問題集を正しく読み込めなかった場合は、エラーを表示する。
+    # Process overview: If the workbook could not be loaded correctly, display the errors.
+    def Event_LoadKanjiWorkSheet(self, opn_err, opn_err_msg, fmt_err, fmt_err_msg):
+        self.DebugPrint.print_info('Call: Event_LoadKanjiWorkSheet')
+        # 何らかのエラーメッセージを取得した場合は、メッセージボックスで通知する。
+        # If any error message is obtained, notify with a message box.
+        # ただし、ファイルが存在しないことをこのイベントでは通知しない.(煩わしいため)
+        # However, do not notify about the non-existence of the file in this event (to avoid annoyance).
+        for msg in fmt_err_msg:
+            tk.messagebox.showerror('Error', msg)
 
     # イベント発生条件:「削除」ボタンを押したとき
     # Event trigger condition: When the 'Delete' button is pressed.
@@ -173,7 +174,9 @@ class WidgetSelectStudent(Subject):
                 ################################################################################
                 # 問題集を読み込んで内容クリアする。
                 # Load the workbook and clear the contents.
-                self.KanjiWorkSheet.load_worksheet('')
+                # 読み込み中の問題集があれば、その結果は捨てる。
+                # If a workbook is being loaded, its result is discarded.
+                self.KanjiWorkSheetLoader.load('')
                 ################################################################################
 
     # 「生徒選択」エントリーのメニューを設定する。
@@ -197,3 +200,24 @@ class WidgetSelectStudent(Subject):
     # Disable the 'Delete' button.
     def disable_delete_student_button(self):
         self.SelectStudentFrame_Button['state'] = tk.DISABLED
+
+    # 「生徒選択」コンボボックスを有効にする。
+    # Enable the 'Select Student' combo box.
+    def enable_select_student_combobox(self):
+        self.SelectStudentFrame_Combobox['state'] = 'readonly'
+
+    # 「生徒選択」コンボボックスを無効にする。
+    # Disable the 'Select Student' combo box.
+    def disable_select_student_combobox(self):
+        self.SelectStudentFrame_Combobox['state'] = tk.DISABLED
+
+    def update(self, subject):
+        if subject.notify_status == subject.kNotify_create_worksheet_start:
+            # 漢字プリントの作成中は、問題集を読み直さないように生徒を変更できなくする。
+            # While creating a kanji worksheet, prevent changing the student so the workbook is not reloaded.
+            self.disable_select_student_combobox()
+            self.disable_delete_student_button()
+        elif subject.notify_status == subject.kNotify_create_worksheet \
+                or subject.notify_status == subject.kNotify_create_worksheet_stop:
+            self.enable_select_student_combobox()
+            self.enable_delete_student_button()
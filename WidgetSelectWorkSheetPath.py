@@ -15,7 +15,7 @@ from UserSettings import UserSettings
 class WidgetSelectWorkSheetPath(Subject):
     def __init__(self, root, row, column):
         Subject.__init__(self)
-        self.DebugPrint = DebugPrint(debug=True)  # デバッグ表示クラス
+        self.DebugPrint = DebugPrint()  # デバッグ表示クラス
         self.UserSettings = UserSettings()  # ユーザ設定クラス
 
         # 問題集選択ラベルフレーム
@@ -41,9 +41,10 @@ class WidgetSelectWorkSheetPath(Subject):
         )
         self.SelectWorksheetPath_Button.pack(side=tk.LEFT)
 
-    def set_class(self, kanji_worksheet, wg_select_student):
+    def set_class(self, kanji_worksheet, wg_select_student, kanji_worksheet_loader):
         self.KanjiWorkSheet = kanji_worksheet
         self.WidgetSelectStudent = wg_select_student
+        self.KanjiWorkSheetLoader = kanji_worksheet_loader
 
     # イベント発生条件:「選択」ボタンを押したとき
     # 処理概要:選択したCSVファイルを設定する.
@@ -68,35 +69,18 @@ class WidgetSelectWorkSheetPath(Subject):
             self.UserSettings.save_setting_file()
 
             ################################################################################
-            # 登録した問題集のパスを取得し, 問題集を読み込む.
-            (_, _, err, err_msg) = self.KanjiWorkSheet.load_worksheet(path)
+            # 登録した問題集のパスを取得し, 問題集をバックグラウンドで読み込む.
+            # 読み込みの結果は読み込みサービスがオブザーバーに通知し, ボタンとレポートを更新する.
+            self.KanjiWorkSheetLoader.load(path, self.Event_LoadKanjiWorkSheet)
             ################################################################################
-            # 問題集を正しく読み込めたとき
-            if err == 0:
-                self.notify(self.KNotify_load_successful)
-                # 「採点完了」ボタンを有効にする.
-                #self.WidgetScoring.enable_scoring_button()
-                # 「プリント作成」ボタンを有効にする.
-                #self.WidgetCreateWorkSheet.enable_create_button()
-                # 「印刷」ボタンを有効にする.
-                #self.WidgetCreateWorkSheet.enable_print_button()
-
-            # 問題集を正しく読み込めなかったとき
-            else:
-                self.notify(self.kNotify_load_failed)
-                # 「採点完了」ボタンを無効にする.
-                #self.WidgetScoring.disable_scoring_button()
-                # 「プリント作成」ボタンを無効にする.
-                #self.WidgetCreateWorkSheet.disable_create_button()
-                # 「印刷」ボタンを無効にする.
-                #self.WidgetCreateWorkSheet.disable_print_button()
-
-                # 何らかのエラーメッセージを取得した場合は, メッセージボックスで通知する.
-                for msg in err_msg:
-                    tk.messagebox.showerror('Error', msg)
-
-            # 登録者を変更, 問題集を新しく読み直したため, レポートを更新する.
-            self.WidgetReport.update_report()
+
+    # イベント発生条件:選択した問題集を読み込み終わったとき
+    # 処理概要:問題集を正しく読み込めなかった場合は, エラーを表示する.
+    def Event_LoadKanjiWorkSheet(self, opn_err, opn_err_msg, fmt_err, fmt_err_msg):
+        self.DebugPrint.print_info('Call: Event_LoadKanjiWorkSheet')
+        # 何らかのエラーメッセージを取得した場合は, メッセージボックスで通知する.
+        for msg in opn_err_msg + fmt_err_msg:
+            tk.messagebox.showerror('Error', msg)
 
     # 「問題集選択」エントリーを設定する。
     def set_selected_worksheet_path(self, path):
@@ -130,3 +114,11 @@ class WidgetSelectWorkSheetPath(Subject):
             self.disable_select_button()
             # 「問題集選択」エントリーを空白に設定する。
             self.set_selected_worksheet_path('')
+
+        elif subject.notify_status == subject.kNotify_create_worksheet_start:
+            # 漢字プリントの作成中は、問題集を変更できなくする。
+            self.disable_select_button()
+        elif subject.notify_status == subject.kNotify_create_worksheet \
+                or subject.notify_status == subject.kNotify_create_worksheet_stop:
+            # 「選択」ボタンを有効にする。
+            self.enable_select_button()
@@ -0,0 +1,190 @@
+# benchmark/bench_gate.py
+# Copyright (c) 2023 Masaya Yamamoto
+# Released under the MIT license.
+# see https://opensource.org/licenses/MIT (英語)
+# see https://licenses.opensource.jp/MIT/MIT.html (日本語)
+#
+# 使い方 / Usage:
+#   python -m benchmark.bench_scenarios --json result.json
+#   python -m benchmark.bench_gate save result.json --profile classroom-laptop
+#   python -m benchmark.bench_gate check result.json --profile classroom-laptop --tolerance 0.2
+#
+# ベンチマークの結果を環境(プロファイル)ごとの基準としてJSONで保存し、新しい結果と比較する。
+# 監視するシナリオが許容範囲を超えて遅くなった場合や、結果から消えた場合は、終了コード1を返す。
+# Save benchmark results as JSON baselines per environment (profile) and compare new results against them.
+# Returns exit code 1 if a watched scenario slows down beyond the tolerance or is missing from the result.
+import os
+import re
+import sys
+import json
+import argparse
+
+# 基準を保存するディレクトリ / Directory to store the baselines
+kBaselineDir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline')
+
+# 既定で監視するシナリオ(問題集の読み込み、問題の選択、PDFの作成)
+# Scenarios watched by default (loading the problem set, selecting problems, rendering the PDF)
+kGateScenarioList = [
+    'load_worksheet',
+    'create_kanji_worksheet_review',
+    'create_kanji_worksheet_train',
+    'create_pdf_kanji_worksheet',
+]
+
+kStatusOk = 'OK'
+kStatusSlow = 'SLOW'
+kStatusFast = 'FAST'
+kStatusNew = 'NEW'
+kStatusMissing = 'MISSING'
+
+
+# 結果のJSONを読み込む。
+# Load a result JSON.
+def load_result(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+# プロファイル名を取得する(指定がない場合は測定したマシン名)。
+# Get the profile name (the name of the measured machine if not given).
+def get_profile_name(result, profile=None):
+    if profile is None:
+        profile = result['machine']['node']
+    # ファイル名に使えない文字を置き換える。 / Replace characters that cannot be used in file names.
+    return re.sub(r'[^0-9A-Za-z._-]', '_', profile)
+
+
+def get_path_of_baseline(profile, baseline_dir):
+    return os.path.join(baseline_dir, profile + '.json')
+
+
+# 結果を基準として保存する。
+# Save a result as the baseline.
+def save_baseline(result, profile, baseline_dir):
+    os.makedirs(baseline_dir, exist_ok=True)
+    path = get_path_of_baseline(profile, baseline_dir)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2)
+    os.replace(path + '.tmp', path)
+    return path
+
+
+# 基準と結果を比較する。
+# Compare a result with the baseline.
+def compare(baseline, result, tolerance, min_diff, gate_list):
+    """
+    :param baseline: 基準の結果 / Baseline result
+    :type baseline: dict
+    :param result: 新しい結果 / New result
+    :type result: dict
+    :param tolerance: 遅くなってもよい割合(0.2の場合は20%まで) / Allowed slowdown ratio (0.2 allows up to 20%)
+    :type tolerance: float
+    :param min_diff: 遅くなったとみなす最小の差[s] / Minimum difference to count as a slowdown [s]
+    :type min_diff: float
+    :param gate_list: 監視するシナリオ / Scenarios to watch
+    :type gate_list: list
+
+    シナリオと問題数の組ごとに、最小時間を比較する。
+    短い処理は誤差で割合が大きく振れるため、差がmin_diff未満の場合は遅くなったとみなさない。
+    (シナリオ, 問題数, 基準[s], 結果[s], 比, 状態, 監視対象か)のリストを返す。
+    Compare the minimum times for each pair of scenario and number of problems.
+    Short tasks swing widely in ratio due to noise, so differences under min_diff are not counted as slowdowns.
+    Returns a list of (scenario, rows, baseline [s], result [s], ratio, status, whether watched).
+    """
+    base_dict = {(item['scenario'], item['rows']): item['min'] for item in baseline['results']}
+    new_dict = {(item['scenario'], item['rows']): item['min'] for item in result['results']}
+
+    row_list = []
+    for key in sorted(set(base_dict) | set(new_dict), key=lambda key: (key[1], key[0])):
+        (scenario, rows) = key
+        base = base_dict.get(key)
+        new = new_dict.get(key)
+        if base is None:
+            (ratio, status) = (None, kStatusNew)
+        elif new is None:
+            (ratio, status) = (None, kStatusMissing)
+        else:
+            ratio = new / base if base > 0 else float('inf')
+            if new > base * (1 + tolerance) and new - base >= min_diff:
+                status = kStatusSlow
+            elif new < base * (1 - tolerance) and base - new >= min_diff:
+                status = kStatusFast
+            else:
+                status = kStatusOk
+        row_list.append((scenario, rows, base, new, ratio, status, scenario in gate_list))
+
+    return row_list
+
+
+def print_compare(row_list, out=sys.stdout):
+    print('{:>8} {:<32} {:>12} {:>12} {:>7} {:<8}'.format(
+        'rows', 'scenario', 'base[ms]', 'new[ms]', 'ratio', 'status'), file=out)
+    for (scenario, rows, base, new, ratio, status, gate) in row_list:
+        print('{:>8} {:<32} {:>12} {:>12} {:>7} {:<8}{}'.format(
+            rows,
+            scenario,
+            '-' if base is None else '{:.2f}'.format(base * 1000),
+            '-' if new is None else '{:.2f}'.format(new * 1000),
+            '-' if ratio is None else '{:.2f}'.format(ratio),
+            status,
+            ' *' if gate else ''), file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='ベンチマークの基準の保存と比較')
+    parser.add_argument('--baseline-dir', default=kBaselineDir, help='基準を保存するディレクトリ')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    save_parser = subparsers.add_parser('save', help='結果を基準として保存する')
+    save_parser.add_argument('result', help='bench_scenarios の結果のJSON')
+    save_parser.add_argument('--profile', default=None, help='プロファイル名(既定はマシン名)')
+
+    check_parser = subparsers.add_parser('check', help='結果を基準と比較する')
+    check_parser.add_argument('result', help='bench_scenarios の結果のJSON')
+    check_parser.add_argument('--profile', default=None, help='プロファイル名(既定はマシン名)')
+    check_parser.add_argument('--tolerance', type=float, default=0.2, help='遅くなってもよい割合')
+    check_parser.add_argument('--min-diff', type=float, default=5.0, help='遅くなったとみなす最小の差[ms]')
+    check_parser.add_argument('--gate', nargs='+', default=kGateScenarioList, help='監視するシナリオ')
+    args = parser.parse_args(argv)
+
+    result = load_result(args.result)
+    profile = get_profile_name(result, args.profile)
+
+    if args.command == 'save':
+        path = save_baseline(result, profile, args.baseline_dir)
+        print('baseline saved: ' + path)
+        return 0
+
+    path = get_path_of_baseline(profile, args.baseline_dir)
+    if not os.path.exists(path):
+        print('baseline not found: ' + path, file=sys.stderr)
+        return 2
+    baseline = load_result(path)
+
+    # 基準にも結果にもないシナリオは、名前の間違いとみなす。
+    # Scenarios in neither the baseline nor the result are treated as misspelled names.
+    known = set(item['scenario'] for item in baseline['results'] + result['results'])
+    unknown_list = [scenario for scenario in args.gate if scenario not in known]
+    if len(unknown_list) > 0:
+        print('unknown gated scenario(s): ' + ', '.join(unknown_list), file=sys.stderr)
+        return 2
+
+    row_list = compare(baseline, result, args.tolerance, args.min_diff / 1000, args.gate)
+    print('profile: ' + profile + ' (tolerance ' + '{:.0%}'.format(args.tolerance) + ', * = gated)')
+    print_compare(row_list)
+
+    # 監視するシナリオが落ちたり名前が変わったりして結果にない場合も、通さない。
+    # Also fail if a watched scenario is missing from the result because it crashed or was renamed.
+    slow_list = [row for row in row_list if row[6] and row[5] == kStatusSlow]
+    missing_list = [row for row in row_list if row[6] and row[5] == kStatusMissing]
+    if len(slow_list) > 0:
+        print(str(len(slow_list)) + ' gated scenario(s) slowed down past the tolerance.')
+    if len(missing_list) > 0:
+        print(str(len(missing_list)) + ' gated scenario(s) missing from the result.')
+    if len(slow_list) > 0 or len(missing_list) > 0:
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,111 @@
+# benchmark/bench_long_time_no_question.py
+# Copyright (c) 2023 Masaya Yamamoto
+# Released under the MIT license.
+# see https://opensource.org/licenses/MIT (英語)
+# see https://licenses.opensource.jp/MIT/MIT.html (日本語)
+#
+# 使い方 / Usage:
+#   python -m benchmark.bench_long_time_no_question --rows 1000 5000 20000
+import argparse
+import datetime
+import random
+import time
+import numpy as np
+import pandas as pd
+from KanjiWorkSheet_prob import KanjiWorkSheet_prob
+
+
+# 1文字ずつ処理していた以前の実装(比較用)。
+# The previous character-by-character implementation (for comparison).
+def reference_long_time_no_question_dict(prob, ans_list, date_list, days=30):
+    date_map = {}
+    for i, phrase in enumerate(ans_list):
+        for char in phrase:
+            if isinstance(date_list[i], str) or ~np.isnan(date_list[i]):
+                idx_date_list = [i, date_list[i]]
+                if char in date_map:
+                    date_map[char].append(idx_date_list)
+                else:
+                    date_map[char] = [idx_date_list]
+
+    newest_dates_dict = {}
+    old_kanji_dict = {}
+    for key, idx_date_list in date_map.items():
+        for idx_date_str in idx_date_list:
+            date_str = idx_date_str[1]
+            date_str = date_str.replace('"', '')
+            date_str = date_str.replace("'", '')
+            date_obj = datetime.datetime.strptime(date_str, "%Y-%m-%d %H:%M:%S.%f")
+            if key not in newest_dates_dict or date_obj > newest_dates_dict[key][1]:
+                newest_dates_dict[key] = [idx_date_str[0], date_obj]
+
+        for grade in prob.grade:
+            if key in prob.get_kanji_by_grade_list(grade):
+                if prob.create_date - newest_dates_dict[key][1] > datetime.timedelta(days=days):
+                    old_kanji_dict[key] = newest_dates_dict[key][0]
+
+    return old_kanji_dict
+
+
+# 答えと最終更新日の組を作成する。
+# Create pairs of answers and last update dates.
+def create_problem_set(rows, seed=0):
+    rnd = random.Random(seed)
+    kanji = [chr(code) for code in range(0x4e00, 0x4e00 + 1026)]
+    now = datetime.datetime(2023, 4, 1)
+
+    ans_list = []
+    date_list = []
+    for _ in range(rows):
+        ans_list.append(''.join(rnd.sample(kanji, rnd.randint(1, 3))))
+        # 未出題の問題も混ぜる。 / Mix in unasked problems.
+        if rnd.random() < 0.3:
+            date_list.append(np.nan)
+        else:
+            date = now - datetime.timedelta(days=rnd.randint(0, 90), seconds=rnd.randint(0, 86399),
+                                            microseconds=rnd.randint(1, 999999))
+            date_list.append("'" + str(pd.to_datetime(date)) + "'")
+
+    kanji_by_grade_list = [[] for _ in range(7)]
+    for grade in range(1, 7):
+        kanji_by_grade_list[grade] = kanji[(grade - 1) * 171:grade * 171]
+
+    return ans_list, date_list, kanji_by_grade_list, now
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='create_long_time_no_question_dict のベンチマーク')
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 5000, 20000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--days', type=int, default=30)
+    args = parser.parse_args(argv)
+
+    prob = KanjiWorkSheet_prob(debug=False)
+    prob.grade = [1, 2, 3, 4, 5, 6]
+
+    print('{:>8} {:>12} {:>12} {:>8}'.format('rows', 'before[ms]', 'after[ms]', 'speedup'))
+    for rows in args.rows:
+        (ans_list, date_list, prob.kanji_by_grade_list, prob.create_date) = create_problem_set(rows)
+        date_time = prob.to_last_update_time(pd.Series(date_list)).tolist()
+
+        before = []
+        after = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            expected = reference_long_time_no_question_dict(prob, ans_list, date_list, args.days)
+            before.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            actual = prob.create_long_time_no_question_dict(ans_list, date_time, args.days)
+            after.append(time.perf_counter() - start)
+
+        # 結果が以前の実装と一致することを確認する。
+        # Confirm that the result matches the previous implementation.
+        assert list(expected.items()) == list(actual.items())
+
+        print('{:>8} {:>12.2f} {:>12.2f} {:>7.1f}x'.format(
+            rows, min(before) * 1000, min(after) * 1000, min(before) / min(after)))
+
+
+if __name__ == '__main__':
+    main()
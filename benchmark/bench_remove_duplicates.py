@@ -0,0 +1,130 @@
+# benchmark/bench_remove_duplicates.py
+# Copyright (c) 2023 Masaya Yamamoto
+# Released under the MIT license.
+# see https://opensource.org/licenses/MIT (英語)
+# see https://licenses.opensource.jp/MIT/MIT.html (日本語)
+#
+# 使い方 / Usage:
+#   python -m benchmark.bench_remove_duplicates --rows 1000 10000 100000
+#
+# 答えの漢字が重複する問題を後回しにする処理(iter_independent_kanji_problem_index)の時間を、
+# リストで除外判定をしていた以前の実装と比べる。
+# Compare the time of putting problems with duplicate answer kanji last (iter_independent_kanji_problem_index)
+# with the previous implementation that checked exclusions against lists.
+import argparse
+import random
+import time
+import numpy as np
+from KanjiWorkSheet_prob import iter_independent_kanji_problem_index
+
+
+# リストで除外判定をしていた以前の実装(比較用)。
+# The previous implementation that checked exclusions against lists (for comparison).
+def reference_remove_duplicates_index(list_value, exclusion_list):
+    return [value for value in list_value if value not in exclusion_list]
+
+
+# 答えの漢字が重複しているインデックスを作成する(以前の実装)。
+# Create an index where the answer kanji is duplicated (the previous implementation).
+def reference_create_duplicate_kanji_index_dict(ans_list):
+    index_map = {}
+    for i, phrase in enumerate(ans_list):
+        for char in phrase:
+            index_map.setdefault(char, []).append(i)
+    return {char: index for char, index in index_map.items() if len(index) > 1}
+
+
+def reference_remove_duplicates_kanji_problem_index(kanji_worksheet_idx, duplicate_dict):
+    first_idx = []
+    exclusion_list = []
+    for list_value in duplicate_dict.values():
+        list_value = set(list_value)
+        list_value = reference_remove_duplicates_index(list_value, exclusion_list)
+        if len(list_value) > 0:
+            first_idx.append(list_value[0])
+        exclusion_list = exclusion_list + [value for value in list_value]
+
+    duplicate = []
+    for list_value in duplicate_dict.values():
+        for value in list_value:
+            duplicate.append(value)
+
+    duplicate = reference_remove_duplicates_index(duplicate, first_idx)
+    duplicate = sorted(set(duplicate))
+    duplicate = kanji_worksheet_idx[duplicate]
+
+    not_duplicate = reference_remove_duplicates_index(kanji_worksheet_idx, duplicate)
+
+    return not_duplicate, duplicate
+
+
+# 答えの漢字を共有しない問題が先に並び、すべての候補を1回ずつ返したことを確認する。
+# Confirm that problems not sharing answer kanji come first and every candidate is returned exactly once.
+def verify(kanji_worksheet_idx, ans_list, actual):
+    assert sorted(actual) == sorted(kanji_worksheet_idx)
+    ans_dict = dict(zip(kanji_worksheet_idx, ans_list))
+
+    # 先頭から、答えの漢字を共有しない問題が続く。 / From the head, problems not sharing answer kanji follow.
+    used_kanji = set()
+    pos = len(actual)
+    for i, idx in enumerate(actual):
+        if not used_kanji.isdisjoint(ans_dict[idx]):
+            pos = i
+            break
+        used_kanji.update(ans_dict[idx])
+
+    # 後回しにした問題は、先に並んだ問題と答えの漢字を共有する。
+    # Problems put last share answer kanji with the problems in front.
+    assert all(not used_kanji.isdisjoint(ans_dict[idx]) for idx in actual[pos:])
+    return pos
+
+
+# 候補の問題のインデックスと答えを作成する。
+# Create the indices and answers of candidate problems.
+def create_candidate(rows, seed=0):
+    rnd = random.Random(seed)
+    kanji = [chr(code) for code in range(0x4e00, 0x4e00 + 1026)]
+    ans_list = [''.join(rnd.sample(kanji, rnd.randint(1, 3))) for _ in range(rows)]
+    # 問題集から抽出した候補を想定し、インデックスは飛び飛びにする。
+    # Assume candidates extracted from a problem set, so the indices are sparse.
+    kanji_worksheet_idx = np.array(sorted(rnd.sample(range(rows * 3), rows)))
+    return kanji_worksheet_idx, ans_list
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='iter_independent_kanji_problem_index のベンチマーク')
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--max-reference-rows', type=int, default=10000,
+                        help='以前の実装を計測する最大の候補数(2乗で遅くなるため、既定では10000までにする)')
+    args = parser.parse_args(argv)
+
+    print('{:>8} {:>12} {:>12} {:>8} {:>12}'.format('rows', 'before[ms]', 'after[ms]', 'speedup', 'independent'))
+    for rows in args.rows:
+        (kanji_worksheet_idx, ans_list) = create_candidate(rows)
+
+        # すべての候補を取り出すまでの時間を測る(漢字プリントの作成では出題数に達した時点で止まる)。
+        # Measure the time to take every candidate (creating a worksheet stops once the number is reached).
+        after = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            actual = list(iter_independent_kanji_problem_index(kanji_worksheet_idx, ans_list))
+            after.append(time.perf_counter() - start)
+        independent = verify(kanji_worksheet_idx, ans_list, actual)
+
+        # 以前の実装は遅いため、1回だけ計測する。
+        # The previous implementation is slow, so measure it only once.
+        if rows <= args.max_reference_rows:
+            start = time.perf_counter()
+            duplicate_dict = reference_create_duplicate_kanji_index_dict(ans_list)
+            reference_remove_duplicates_kanji_problem_index(kanji_worksheet_idx, duplicate_dict)
+            before = time.perf_counter() - start
+
+            print('{:>8} {:>12.2f} {:>12.2f} {:>7.1f}x {:>12}'.format(
+                rows, before * 1000, min(after) * 1000, before / min(after), independent))
+        else:
+            print('{:>8} {:>12} {:>12.2f} {:>8} {:>12}'.format(rows, '-', min(after) * 1000, '-', independent))
+
+
+if __name__ == '__main__':
+    main()
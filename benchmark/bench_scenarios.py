@@ -0,0 +1,226 @@
+# benchmark/bench_scenarios.py
+# Copyright (c) 2023 Masaya Yamamoto
+# Released under the MIT license.
+# see https://opensource.org/licenses/MIT (英語)
+# see https://licenses.opensource.jp/MIT/MIT.html (日本語)
+#
+# 使い方 / Usage:
+#   python -m benchmark.bench_scenarios --rows 1000 10000 100000 --json result.json
+#   python -m benchmark.bench_scenarios --rows 10000 --scenario load_worksheet create_kanji_worksheet_train
+#
+# 作成した問題集で、問題集の読み込みから漢字プリントの作成までの各処理の時間を測る。
+# 結果は表で表示し、--json を指定した場合はJSONでも保存する('-' の場合は標準出力)。
+# Measure the time of each step from loading a problem set to creating a kanji worksheet, using generated problem sets.
+# The results are shown as a table, and also saved as JSON if --json is given ('-' for standard output).
+import os
+import io
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import datetime
+import tempfile
+import statistics
+import contextlib
+import numpy as np
+from KanjiWorkSheet_prob import KanjiWorkSheet_prob
+from benchmark.generate_worksheet import generate_worksheet, write_worksheet
+
+# 結果の形式の版数 / Version of the result format
+kResultVersion = 1
+
+# 検査の関数名 / Names of the check functions
+kCheckList = [
+    'check_file_format',
+    'check_column_nan',
+    'check_column_non_numeric',
+    'check_column_non_integer',
+    'check_column_out_of_range',
+    'check_kanji_ruby',
+    'check_kanji_syntax',
+]
+
+# シナリオ名 / Scenario names
+kScenarioList = [
+    'load_worksheet',
+    'load_worksheet_cached',
+] + kCheckList + [
+    'create_kanji_worksheet_review',
+    'create_kanji_worksheet_train',
+    'update_kanji_worksheet',
+    'create_pdf_kanji_worksheet',
+]
+
+
+# 測定した環境を取得する。
+# Get the environment that was measured.
+def get_machine_info():
+    return {
+        'node': platform.node(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'python': platform.python_version(),
+    }
+
+
+# 準備(時間に含めない)をしてから処理の時間を測る。
+# Measure the time of a task after a setup (not included in the time).
+def measure(func, repeat, setup=None):
+    time_list = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        time_list.append(time.perf_counter() - start)
+    return time_list
+
+
+# 問題集を読み込んだ状態のクラスを作成する。
+# Create a class with the problem set loaded.
+def load(path, mode):
+    prob = KanjiWorkSheet_prob(debug=False)
+    (opn_err, opn_err_msg, fmt_err, fmt_err_msg) = prob.load_worksheet(path)
+    if opn_err or fmt_err:
+        raise ValueError((opn_err_msg + fmt_err_msg)[0])
+    prob.set_student_name('benchmark')
+    prob.set_grade([1, 2, 3, 4, 5, 6])
+    prob.set_mode(mode)
+    prob.set_number_of_problem(20)
+    return prob
+
+
+# 1つの問題集で、各シナリオの時間を測る。
+# Measure the time of each scenario with one problem set.
+def run_scenarios(path, scenario_list, repeat, seed):
+    """
+    :param path: 問題集のパス / Path to the problem set
+    :type path: string
+    :param scenario_list: 測るシナリオ / Scenarios to measure
+    :type scenario_list: list
+    :param repeat: 繰り返す回数 / Number of repetitions
+    :type repeat: int
+    :param seed: 乱数の種 / Random seed
+    :type seed: int
+
+    シナリオ名と時間[s]のリストの辞書を返す。
+    漢字プリントの作成と採点は問題集を書き換えるため、毎回問題集を読み込み直してから測る。
+    Returns a dict of scenario names and lists of times [s].
+    Creating and scoring a kanji worksheet modify the problem set, so it is reloaded before each measurement.
+    """
+    cache_path = KanjiWorkSheet_prob(debug=False).get_path_of_check_cache(path)
+    log_path = path + '.log'
+    pdf_path = path + '.pdf'
+    state = {'prob': load(path, 1)}
+    result = {}
+
+    def remove_cache():
+        if os.path.exists(cache_path):
+            os.remove(cache_path)
+
+    def reload(mode):
+        state['prob'] = load(path, mode)
+        # 作成のたびに選ぶ問題が変わらないようにする。 / Select the same problems every time.
+        random.seed(seed)
+        np.random.seed(seed)
+
+    # 採点済みの出題記録を作成する。 / Create a scored question log.
+    def create_scored_log():
+        reload(1)
+        state['prob'].create_kanji_worksheet()
+        state['prob'].create_kanji_worksheet_logfile(log_path)
+        rnd = random.Random(seed)
+        result_list = [rnd.choice('ox') for _ in range(len(state['prob'].kanji_worksheet))]
+        state['prob'].record_kanji_worksheet_logfile(log_path, result_list)
+
+    def create_worksheet_for_pdf():
+        reload(1)
+        state['prob'].create_kanji_worksheet()
+        from KanjiWorkSheet_draw import layout_problem_statement
+        # 1人目のプリントと同じ条件にするため、レイアウトのキャッシュを空にする。
+        # Clear the layout cache so that the conditions are the same as the first student's worksheet.
+        layout_problem_statement.cache_clear()
+
+    for scenario in scenario_list:
+        if scenario == 'load_worksheet':
+            result[scenario] = measure(lambda: load(path, 1), repeat, remove_cache)
+        elif scenario == 'load_worksheet_cached':
+            load(path, 1)
+            result[scenario] = measure(lambda: load(path, 1), repeat)
+        elif scenario in kCheckList:
+            prob = state['prob']
+            check = getattr(prob, '_KanjiWorkSheet__' + scenario)
+            if scenario == 'check_file_format':
+                result[scenario] = measure(lambda: check(), repeat)
+            else:
+                result[scenario] = measure(lambda: check(prob.worksheet, []), repeat)
+        elif scenario == 'create_kanji_worksheet_review':
+            result[scenario] = measure(lambda: state['prob'].create_kanji_worksheet(), repeat, lambda: reload(0))
+        elif scenario == 'create_kanji_worksheet_train':
+            result[scenario] = measure(lambda: state['prob'].create_kanji_worksheet(), repeat, lambda: reload(1))
+        elif scenario == 'update_kanji_worksheet':
+            result[scenario] = measure(lambda: state['prob'].update_kanji_worksheet(log_path), repeat,
+                                       create_scored_log)
+        elif scenario == 'create_pdf_kanji_worksheet':
+            result[scenario] = measure(lambda: state['prob'].create_pdf_kanji_worksheet(pdf_path), repeat,
+                                       create_worksheet_for_pdf)
+
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='問題集の読み込みから漢字プリントの作成までのベンチマーク')
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--scenario', nargs='+', default=kScenarioList, choices=kScenarioList)
+    parser.add_argument('--json', default=None, help='結果を保存するJSONのパス(- の場合は標準出力)')
+    args = parser.parse_args(argv)
+
+    report = {
+        'version': kResultVersion,
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'machine': get_machine_info(),
+        'repeat': args.repeat,
+        'seed': args.seed,
+        'results': [],
+    }
+
+    # JSONを標準出力する場合は、表を標準エラー出力にする。
+    # When JSON goes to standard output, the table goes to standard error.
+    out = sys.stderr if args.json == '-' else sys.stdout
+    print('{:>8} {:<32} {:>12} {:>12}'.format('rows', 'scenario', 'min[ms]', 'median[ms]'), file=out)
+    with tempfile.TemporaryDirectory() as work_dir:
+        for rows in args.rows:
+            path = os.path.join(work_dir, 'bench_' + str(rows) + '.csv')
+            write_worksheet(generate_worksheet(rows, seed=args.seed, now=datetime.datetime.today()), path)
+
+            # 処理の中の表示は測定の邪魔になるため捨てる。 / Discard output from inside the tasks; it disturbs the measurement.
+            with contextlib.redirect_stdout(io.StringIO()):
+                result = run_scenarios(path, args.scenario, args.repeat, args.seed)
+
+            for scenario in args.scenario:
+                time_list = result[scenario]
+                report['results'].append({
+                    'scenario': scenario,
+                    'rows': rows,
+                    'min': min(time_list),
+                    'median': statistics.median(time_list),
+                    'times': time_list,
+                })
+                print('{:>8} {:<32} {:>12.2f} {:>12.2f}'.format(
+                    rows, scenario, min(time_list) * 1000, statistics.median(time_list) * 1000), file=out)
+
+    if args.json == '-':
+        print(json.dumps(report, indent=2))
+    elif args.json is not None:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
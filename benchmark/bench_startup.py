@@ -0,0 +1,101 @@
+# benchmark/bench_startup.py
+# Copyright (c) 2023 Masaya Yamamoto
+# Released under the MIT license.
+# see https://opensource.org/licenses/MIT (英語)
+# see https://licenses.opensource.jp/MIT/MIT.html (日本語)
+#
+# 使い方 / Usage:
+#   python -m benchmark.bench_startup --repeat 5 --import-budget 500 --paint-budget 1500
+#
+# 起動のたびに新しいプロセスで、main.py と同じ import とウィンドウの最初の描画までの時間を測る。
+# 予算を超えた場合は終了コード1を返す。
+# Measure, in a new process each time, the same imports as main.py and the time until the window is first drawn.
+# Returns exit code 1 if the budget is exceeded.
+import sys
+import json
+import argparse
+import subprocess
+
+# 起動時にimportしてはならないモジュール / Modules that must not be imported at startup
+kHeavyModuleList = ['pandas', 'numpy', 'reportlab']
+
+
+# 子プロセスで起動時間を測る。
+# Measure the startup time in a child process.
+def measure_startup():
+    import time
+    start = time.perf_counter()
+    import tkinter as tk
+    import KanjiWorkSheet_gui
+    result = {'import': time.perf_counter() - start, 'paint': None}
+    result['heavy'] = [name for name in kHeavyModuleList if name in sys.modules]
+
+    # mainloopの代わりに、最初の描画を終えたら時間を記録してウィンドウを閉じる。
+    # Instead of mainloop, record the time once the first drawing is done and close the window.
+    def first_paint(root, n=0):
+        root.update()
+        result['paint'] = time.perf_counter() - start
+        result['heavy'] = [name for name in kHeavyModuleList if name in sys.modules]
+        root.destroy()
+
+    tk.Tk.mainloop = first_paint
+    try:
+        KanjiWorkSheet_gui.KanjiWorkSheet_gui()
+    except tk.TclError as e:
+        # ディスプレイがない環境では描画の時間は測れない。
+        # The drawing time cannot be measured without a display.
+        result['error'] = str(e)
+
+    # 最初に問題集を使うときに、遅らせたimportにかかる時間
+    # Time taken by the deferred imports when the problem set is first used
+    start = time.perf_counter()
+    from KanjiWorkSheet_prob import KanjiWorkSheet_prob
+    KanjiWorkSheet_prob()
+    result['engine'] = time.perf_counter() - start
+
+    print(json.dumps(result))
+
+
+def run_child():
+    out = subprocess.run([sys.executable, '-m', 'benchmark.bench_startup', '--child'],
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='起動時間のベンチマーク')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--import-budget', type=float, default=500, help='importの予算[ms]')
+    parser.add_argument('--paint-budget', type=float, default=1500, help='最初の描画までの予算[ms]')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        measure_startup()
+        return 0
+
+    result_list = [run_child() for _ in range(args.repeat)]
+    import_ms = min(result['import'] for result in result_list) * 1000
+    engine_ms = min(result['engine'] for result in result_list) * 1000
+    paint_list = [result['paint'] for result in result_list if result['paint'] is not None]
+    paint_ms = min(paint_list) * 1000 if len(paint_list) > 0 else None
+    heavy = sorted(set(name for result in result_list for name in result['heavy']))
+
+    print('{:>12} {:>12} {:>12}'.format('', 'time[ms]', 'budget[ms]'))
+    print('{:>12} {:>12.1f} {:>12.1f}'.format('import', import_ms, args.import_budget))
+    if paint_ms is not None:
+        print('{:>12} {:>12.1f} {:>12.1f}'.format('first paint', paint_ms, args.paint_budget))
+    else:
+        print('{:>12} {:>12} {:>12.1f}  ({})'.format('first paint', '-', args.paint_budget, result_list[0].get('error')))
+    print('{:>12} {:>12.1f} {:>12}'.format('first load', engine_ms, '-'))
+    print('heavy modules at startup: ' + (', '.join(heavy) if len(heavy) > 0 else 'none'))
+
+    over = import_ms > args.import_budget or (paint_ms is not None and paint_ms > args.paint_budget)
+    if over or len(heavy) > 0:
+        print('startup budget exceeded')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
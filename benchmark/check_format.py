@@ -0,0 +1,69 @@
+# benchmark/check_format.py
+# Copyright (c) 2023 Masaya Yamamoto
+# Released under the MIT license.
+# see https://opensource.org/licenses/MIT (英語)
+# see https://licenses.opensource.jp/MIT/MIT.html (日本語)
+#
+# 使い方 / Usage:
+#   python -m benchmark.check_format --rows 200
+#
+# 書式に誤りがある問題集を読み込んだときに、例外ではなく書式のエラーとして返すことを確認する。
+# 失敗した場合は、終了コード1を返す。
+# Check that loading a problem set with format errors returns them as format errors instead of raising.
+# Returns exit code 1 if any case fails.
+import os
+import sys
+import argparse
+import datetime
+import tempfile
+from KanjiWorkSheet import KanjiWorkSheet
+from benchmark.generate_worksheet import generate_worksheet, write_worksheet
+
+# 誤りのある列と値 / Column and value of the error
+kCaseList = [
+    ('学年', 'a'),
+    ('学年', '1年'),
+]
+
+
+# 1つの問題を誤りのある値にした問題集を読み込む。
+# Load a problem set where one problem has an erroneous value.
+def check(worksheet, path, column, value):
+    worksheet = worksheet.copy()
+    worksheet[column] = worksheet[column].astype(object)
+    worksheet.loc[worksheet.index[len(worksheet) // 2], column] = value
+    write_worksheet(worksheet, path)
+
+    kw = KanjiWorkSheet()
+    try:
+        (opn_err, opn_err_msg, fmt_err, fmt_err_msg) = kw.load_worksheet(path)
+    except Exception as e:
+        return type(e).__name__ + ': ' + str(e)
+    if opn_err:
+        return opn_err_msg[0]
+    if not fmt_err:
+        return '書式のエラーになりませんでした.'
+    return ''
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='書式に誤りがある問題集の確認')
+    parser.add_argument('--rows', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    worksheet = generate_worksheet(args.rows, seed=args.seed, now=datetime.datetime.today())
+    fail = 0
+    with tempfile.TemporaryDirectory() as work_dir:
+        path = os.path.join(work_dir, 'check.csv')
+        for (column, value) in kCaseList:
+            msg = check(worksheet, path, column, value)
+            print('{:<12} {}'.format(column + '=' + value, 'OK' if msg == '' else msg))
+            if msg != '':
+                fail += 1
+
+    return 1 if fail > 0 else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
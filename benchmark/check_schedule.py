@@ -0,0 +1,92 @@
+# benchmark/check_schedule.py
+# Copyright (c) 2023 Masaya Yamamoto
+# Released under the MIT license.
+# see https://opensource.org/licenses/MIT (英語)
+# see https://licenses.opensource.jp/MIT/MIT.html (日本語)
+#
+# 使い方 / Usage:
+#   python -m benchmark.check_schedule --rows 2000
+#
+# 間隔を空欄にした(再出題しない結果がある)出題スケジュールで、練習モードの漢字プリントを作成できることを確認する。
+# 失敗した組み合わせがある場合は、終了コード1を返す。
+# Check that training-mode kanji worksheets can be created with schedules that leave intervals empty
+# (some results are never scheduled).
+# Returns exit code 1 if any combination fails.
+import os
+import sys
+import argparse
+import datetime
+import tempfile
+import pandas as pd
+from KanjiWorkSheet_prob import KanjiWorkSheet_prob
+from benchmark.generate_worksheet import generate_worksheet, write_worksheet
+
+# 間隔を空欄にする結果の組み合わせ / Combinations of results whose interval is left empty
+kBlankList = [[], ['d'], ['w'], ['m'], ['d', 'w', 'm']]
+
+
+# 指定した結果の間隔を空欄にした出題スケジュールを保存する。
+# Save a schedule with the intervals of the specified results left empty.
+def write_schedule(prob, path, blank_list):
+    rows = []
+    for result in prob.report_key_list:
+        (correct, incorrect) = prob.transition_table[result]
+        interval = prob.interval_table.get(result)
+        rows.append([result, correct, incorrect, None if result in blank_list else interval])
+    pd.DataFrame(rows, columns=prob.kScheduleColumns).to_csv(path, index=False, encoding='shift-jis')
+
+
+# 1つの出題スケジュールで、練習モードの漢字プリントを作成する。
+# Create a training-mode kanji worksheet with one schedule.
+def check(worksheet_path, schedule_path, blank_list):
+    prob = KanjiWorkSheet_prob(debug=False)
+    (err, err_msg) = prob.load_schedule_file(schedule_path)
+    if err:
+        return err_msg[0]
+    if any(result in prob.interval_table for result in blank_list):
+        return '間隔が空欄の結果が間隔表に残っています.'
+
+    (opn_err, opn_err_msg, fmt_err, fmt_err_msg) = prob.load_worksheet(worksheet_path)
+    if opn_err or fmt_err:
+        return (opn_err_msg + fmt_err_msg)[0]
+    prob.set_grade([1, 2, 3, 4, 5, 6])
+    prob.set_mode(1)
+    prob.set_number_of_problem(20)
+    try:
+        (err, err_msg) = prob.create_kanji_worksheet()
+    except Exception as e:
+        return type(e).__name__ + ': ' + str(e)
+    if err:
+        return err_msg[0]
+
+    # 再出題しない結果の問題は選ばない。 / Problems with unscheduled results are not selected.
+    bucket_dict = {'d': prob.list_d_idx, 'w': prob.list_w_idx, 'm': prob.list_m_idx}
+    if any(len(bucket_dict[result]) != 0 for result in blank_list):
+        return '間隔が空欄の結果の問題を選びました.'
+    return ''
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='間隔が空欄の出題スケジュールの確認')
+    parser.add_argument('--rows', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    fail = 0
+    with tempfile.TemporaryDirectory() as work_dir:
+        worksheet_path = os.path.join(work_dir, 'check.csv')
+        schedule_path = os.path.join(work_dir, '.schedule')
+        write_worksheet(generate_worksheet(args.rows, seed=args.seed, now=datetime.datetime.today()), worksheet_path)
+
+        for blank_list in kBlankList:
+            write_schedule(KanjiWorkSheet_prob(debug=False), schedule_path, blank_list)
+            msg = check(worksheet_path, schedule_path, blank_list)
+            print('{:<12} {}'.format(','.join(blank_list) if len(blank_list) > 0 else '-', 'OK' if msg == '' else msg))
+            if msg != '':
+                fail += 1
+
+    return 1 if fail > 0 else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
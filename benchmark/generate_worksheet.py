@@ -0,0 +1,195 @@
+# benchmark/generate_worksheet.py
+# Copyright (c) 2023 Masaya Yamamoto
+# Released under the MIT license.
+# see https://opensource.org/licenses/MIT (英語)
+# see https://licenses.opensource.jp/MIT/MIT.html (日本語)
+#
+# 使い方 / Usage:
+#   python -m benchmark.generate_worksheet --rows 10000 --out ./bench_10000.csv
+#   python -m benchmark.generate_worksheet --rows 1000 --grade-mix 1:3,2:1 --ruby-density 2 \
+#       --frame-density 1.5 --result-mix=-:5,o:3,x:1,d:1,w:1,m:1 --history-length 0 20 --out ./bench.csv
+#
+# 問題集と同じ形式(kFileColumns)の、検査を通る問題集を作成する。
+# Create a problem set in the same format (kFileColumns) that passes the checks.
+import argparse
+import datetime
+import random
+import pandas as pd
+
+# 学年ごとの漢字の数(学年別漢字配当表) / Number of kanji per grade (the grade-level kanji table)
+kKanjiPerGrade = [80, 160, 200, 202, 193, 191]
+# ふりがなに使う文字 / Characters used for readings
+kHiragana = [chr(code) for code in range(ord('あ'), ord('ん') + 1) if chr(code) not in 'ぁぃぅぇぉっゃゅょゎ']
+# 問題文の区切り / Separators in problem statements
+kParticle = ['の', 'が', 'を', 'に', 'で', 'と', 'は', 'へ']
+
+# 問題集の列(KanjiWorkSheet.kFileColumns と同じ) / Columns of the problem set (same as KanjiWorkSheet.kFileColumns)
+kFileColumns = ['学年', '問題文', '答え', '番号', '管理番号', '最終更新日', '結果', '履歴']
+# 結果の記号 / Result marks
+kResultList = ['-', 'o', 'x', 'd', 'w', 'm']
+kDefaultResultMix = {'-': 4, 'o': 3, 'x': 1, 'd': 1, 'w': 1, 'm': 1}
+
+
+# 学年ごとの漢字のリストを作成する。
+# Create the list of kanji per grade.
+def create_kanji_by_grade_list():
+    """
+    学年ごとの漢字のリストを作成する。
+    問題集はShift_JISで保存するため、Shift_JISで表せる漢字だけを使う。
+    Create the list of kanji per grade.
+    The problem set is saved in Shift_JIS, so only kanji that can be encoded in Shift_JIS are used.
+    """
+    kanji = []
+    for code in range(0x4e00, 0x9fa0):
+        try:
+            chr(code).encode('shift-jis')
+        except UnicodeEncodeError:
+            continue
+        kanji.append(chr(code))
+        if len(kanji) >= sum(kKanjiPerGrade):
+            break
+
+    kanji_by_grade_list = [[]]
+    start = 0
+    for num in kKanjiPerGrade:
+        kanji_by_grade_list.append(kanji[start:start + num])
+        start += num
+
+    return kanji_by_grade_list
+
+
+# "1:3,2:1" の形式の重みを辞書に変換する。
+# Convert weights in the form "1:3,2:1" into a dict.
+def parse_mix(text, key_type=str):
+    mix = {}
+    for item in text.split(','):
+        key, value = item.split(':')
+        mix[key_type(key)] = float(value)
+    return mix
+
+
+# 平均がdensityになるように個数を決める。
+# Decide a count whose average is density.
+def draw_count(rnd, density):
+    count = int(density)
+    if rnd.random() < density - count:
+        count += 1
+    return count
+
+
+def create_reading(rnd):
+    return ''.join(rnd.choice(kHiragana) for _ in range(rnd.randint(1, 3)))
+
+
+# 問題集を作成する。
+# Create a problem set.
+def generate_worksheet(rows, seed=0, grade_mix=None, ruby_density=1.0, frame_density=1.5,
+                       result_mix=None, history_length=(0, 10), days=90, now=None):
+    """
+    :param rows: 問題数 / Number of problems
+    :type rows: int
+    :param seed: 乱数の種 / Random seed
+    :type seed: int
+    :param grade_mix: 学年ごとの重み(Noneの場合は均等) / Weight per grade (equal if None)
+    :type grade_mix: dict
+    :param ruby_density: 1問あたりのルビ付きの漢字の平均数 / Average number of kanji with ruby per problem
+    :type ruby_density: float
+    :param frame_density: 1問あたりの問題枠の平均数(1以上) / Average number of frames per problem (1 or more)
+    :type frame_density: float
+    :param result_mix: 結果ごとの重み / Weight per result
+    :type result_mix: dict
+    :param history_length: 出題済みの問題の履歴の長さの範囲 / Range of history lengths of asked problems
+    :type history_length: tuple
+    :param days: 最終更新日を散らばらせる日数 / Number of days the last update dates are spread over
+    :type days: int
+    :param now: 最終更新日の基準日時(Noneの場合は現在) / Reference date of the last update (now if None)
+    :type now: datetime.datetime
+
+    問題集と同じ形式のデータフレームを作成する。
+    問題枠の数は答えの文字数と一致させ、問題文の漢字にはすべてルビを付けるため、問題集の検査を通る。
+    Create a data frame in the same format as a problem set.
+    The number of frames matches the length of the answer and every kanji in the statement has ruby,
+    so it passes the checks of the problem set.
+    """
+    rnd = random.Random(seed)
+    kanji_by_grade_list = create_kanji_by_grade_list()
+    if grade_mix is None:
+        grade_mix = {grade: 1 for grade in range(1, len(kKanjiPerGrade) + 1)}
+    if result_mix is None:
+        result_mix = kDefaultResultMix
+    if now is None:
+        now = datetime.datetime.today()
+    grade_list = list(grade_mix.keys())
+    grade_weight = list(grade_mix.values())
+    result_list = [result for result in kResultList if result in result_mix]
+    result_weight = [result_mix[result] for result in result_list]
+
+    data = []
+    for i in range(rows):
+        grade = rnd.choices(grade_list, grade_weight)[0]
+        result = rnd.choices(result_list, result_weight)[0]
+
+        # 答えの漢字の数だけ問題枠を作る。 / Create as many frames as the kanji in the answer.
+        ans = ''.join(rnd.choice(kanji_by_grade_list[grade]) for _ in range(max(1, draw_count(rnd, frame_density))))
+        frames = ''.join('[' + create_reading(rnd) + ']' for _ in ans)
+
+        # ルビを付けた漢字と助詞で問題文を組み立てる。 / Build the statement from kanji with ruby and particles.
+        words = [frames]
+        for _ in range(draw_count(rnd, ruby_density)):
+            ruby_grade = rnd.randint(1, grade)
+            words.append(rnd.choice(kanji_by_grade_list[ruby_grade]) + '<' + create_reading(rnd) + '>')
+        rnd.shuffle(words)
+        problem = rnd.choice(kParticle).join(words) + '。'
+
+        # 出題済みの問題には最終更新日と履歴を付ける。 / Asked problems get a last update date and history.
+        if result == '-':
+            last_update = None
+            history = None
+        else:
+            date = now - datetime.timedelta(days=rnd.randint(0, days), seconds=rnd.randint(0, 86399),
+                                            microseconds=rnd.randint(1, 999999))
+            last_update = "'" + str(pd.to_datetime(date)) + "'"
+            # 出題済みの問題の履歴は1文字以上で、最後の履歴は結果と合わせる。
+            # The history of an asked problem has at least one mark, and the last one matches the result.
+            history = ''.join(rnd.choice('ox') for _ in range(max(1, rnd.randint(*history_length)) - 1))
+            history = history + ('x' if result == 'x' else 'o')
+
+        data.append([grade, problem, ans, i + 1, i + 1, last_update, result, history])
+
+    return pd.DataFrame(data, columns=kFileColumns)
+
+
+# 問題集を保存する。
+# Save a problem set.
+def write_worksheet(worksheet, path):
+    worksheet.to_csv(path, index=False, encoding='shift-jis')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='ベンチマーク用の問題集を作成する')
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--out', required=True, help='保存先のパス')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--grade-mix', default=None, help='学年ごとの重み(例: 1:3,2:1)')
+    parser.add_argument('--ruby-density', type=float, default=1.0, help='1問あたりのルビ付きの漢字の平均数')
+    parser.add_argument('--frame-density', type=float, default=1.5, help='1問あたりの問題枠の平均数')
+    parser.add_argument('--result-mix', default=None, help='結果ごとの重み(例: --result-mix=-:4,o:3,x:1,d:1,w:1,m:1)')
+    parser.add_argument('--history-length', type=int, nargs=2, default=[0, 10], metavar=('MIN', 'MAX'))
+    parser.add_argument('--days', type=int, default=90)
+    args = parser.parse_args(argv)
+
+    worksheet = generate_worksheet(
+        args.rows,
+        seed=args.seed,
+        grade_mix=None if args.grade_mix is None else parse_mix(args.grade_mix, int),
+        ruby_density=args.ruby_density,
+        frame_density=args.frame_density,
+        result_mix=None if args.result_mix is None else parse_mix(args.result_mix),
+        history_length=tuple(args.history_length),
+        days=args.days)
+    write_worksheet(worksheet, args.out)
+    print(str(len(worksheet)) + ' rows -> ' + args.out)
+
+
+if __name__ == '__main__':
+    main()